@@ -3,13 +3,14 @@
 사용자 질문에 따라 적절한 도구 선택 및 결과 통합
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, AsyncIterator, Optional, Tuple
 from datetime import datetime
+import asyncio
+import contextvars
 import sys
 import os
-from langchain.memory import ConversationBufferWindowMemory
-from langchain.schema import HumanMessage, AIMessage
 import re
+import time
 
 # 상위 디렉토리를 Python 경로에 추가
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -17,64 +18,149 @@ project_root = os.path.dirname(os.path.dirname(current_dir))
 sys.path.insert(0, project_root)
 
 from app.core.intent_classifier import IntentClassifier
+from app.core.metrics import current_intent, metrics, stage_timer
 from app.core.response_integrator import ResponseIntegrator
+from app.core.session_memory import ConversationTurn, SessionMemoryStore
 from app.tools.rag_tools.rag_pipeline import RAGPipeline
 
 
+DEFAULT_SESSION_ID = "default"
+HISTORY_TURNS = 5  # 프롬프트에 포함할 최근 대화 턴 수
+
+
 class ChatbotAgent:
-    """챗봇 AI 에이전트 - LangChain 메모리 적용"""
+    """챗봇 AI 에이전트 - 세션별 대화 메모리 적용"""
+
+    def __init__(
+        self,
+        rag_tool: Optional[RAGPipeline] = None,
+        memory_store: Optional[SessionMemoryStore] = None
+    ):
+        """챗봇 에이전트 초기화
 
-    def __init__(self):
+        Args:
+            rag_tool: 공유할 RAG 파이프라인 (없으면 새로 생성)
+            memory_store: 세션 메모리 저장소 (없으면 새로 생성)
+        """
         # 분석 도구들
         self.intent_classifier = IntentClassifier()
         self.response_integrator = ResponseIntegrator()
-        self.rag_tool = RAGPipeline()
+        self.rag_tool = rag_tool or RAGPipeline()
         self.ml_tool = MockMLTool()
         self.api_tool = MockAPITool()
 
-        # LangChain 메모리 적용 (최근 10턴)
-        self.memory = ConversationBufferWindowMemory(k=10, memory_key="chat_history", return_messages=True)
+        # 세션별 대화 메모리 (세션 수/턴 수/유휴 시간 제한)
+        self.memory_store = memory_store or SessionMemoryStore()
 
-    def process_message(self, user_input: str) -> str:
-        """사용자 메시지 처리 (LangChain 메모리 기반, 멀티턴 프롬프트 지원, 지시어 치환 고도화)"""
-        try:
-            self.memory.chat_memory.add_user_message(user_input)
-            history_msgs = self.memory.chat_memory.messages[-10:-1]
-            history_str = ""
-            for msg in history_msgs:
-                if isinstance(msg, HumanMessage):
-                    history_str += f"사용자: {msg.content}\n"
-                elif isinstance(msg, AIMessage):
-                    history_str += f"챗봇: {msg.content}\n"
+    def _plan_message(self, user_input: str, session_id: str) -> Tuple[str, str, str, str]:
+        """의도 분류 및 도구 입력 구성 (세션 히스토리, 후속 질문 지시어 치환 포함)
+
+        Returns:
+            (의도, 도구 입력, 도구 실행 의도, 히스토리 문자열)
+        """
+        turns = self.memory_store.get_turns(session_id)
+        history_str = ""
+        for turn in turns[-HISTORY_TURNS:]:
+            history_str += f"사용자: {turn.user}\n"
+            history_str += f"챗봇: {turn.assistant}\n"
+        with stage_timer("intent_classification"):
             intent, confidence = self.intent_classifier.get_intent_confidence(user_input)
-            if intent == "followup":
-                prev_msgs = self.memory.chat_memory.messages[-3:-1]  # 직전 질문/답변
-                prev_context = ""
-                prev_question = ""
-                for msg in prev_msgs:
-                    if isinstance(msg, HumanMessage):
-                        prev_context += f"이전 질문: {msg.content}\n"
-                        prev_question = msg.content
-                    elif isinstance(msg, AIMessage):
-                        prev_context += f"이전 답변: {msg.content}\n"
-                # 1. 직전 질문에서 핵심 명사(가장 긴 단어)를 추출 (간단 버전)
-                words = re.findall(r'[가-힣A-Za-z0-9]+', prev_question)
-                keyword = max(words, key=len) if words else "이 제도"
-                # 2. 후속질문 내 모든 지시어(조사 포함)를 keyword로 치환
-                # ex: '이 제도의', '그런 경우에는', '이것은', '그 정책은' 등
-                anaphora_pattern = r'(이|그|저)(런|것|제도|정책|내용|부분|경우)?(은|는|이|가|을|를|의)?'
-                replaced_question = re.sub(anaphora_pattern, keyword, user_input)
-                rag_input = f"{prev_context}후속 질문: {replaced_question}"
-                results = self.execute_tools(rag_input, "policy_info", history=history_str)
-            else:
-                results = self.execute_tools(user_input, intent, history=history_str)
-            final_response = self.response_integrator.integrate(results, intent)
-            self.memory.chat_memory.add_ai_message(final_response)
+        current_intent.set(intent)
+        if intent == "followup" and turns:
+            prev_turn = turns[-1]  # 직전 질문/답변
+            prev_context = f"이전 질문: {prev_turn.user}\n이전 답변: {prev_turn.assistant}\n"
+            prev_question = prev_turn.user
+            # 1. 직전 질문에서 핵심 명사(가장 긴 단어)를 추출 (간단 버전)
+            words = re.findall(r'[가-힣A-Za-z0-9]+', prev_question)
+            keyword = max(words, key=len) if words else "이 제도"
+            # 2. 후속질문 내 모든 지시어(조사 포함)를 keyword로 치환
+            # ex: '이 제도의', '그런 경우에는', '이것은', '그 정책은' 등
+            anaphora_pattern = r'(이|그|저)(런|것|제도|정책|내용|부분|경우)?(은|는|이|가|을|를|의)?'
+            replaced_question = re.sub(anaphora_pattern, keyword, user_input)
+            return intent, f"{prev_context}후속 질문: {replaced_question}", "policy_info", history_str
+        if intent == "followup":
+            # 이전 대화가 없는 후속 질문은 일반 정책 질문으로 처리
+            return intent, user_input, "policy_info", history_str
+        return intent, user_input, intent, history_str
+
+    async def _aplan_message(self, user_input: str, session_id: str) -> Tuple[str, str, str, str]:
+        """_plan_message를 실행기에서 실행 (의도 분류/정규식 치환이 이벤트 루프를 막지 않도록)"""
+        loop = asyncio.get_running_loop()
+        plan = await loop.run_in_executor(
+            None, contextvars.copy_context().run, self._plan_message, user_input, session_id
+        )
+        # 실행기의 컨텍스트 복사본에서 설정한 의도 라벨을 호출 측 컨텍스트에도 반영
+        current_intent.set(plan[0])
+        return plan
+
+    def _finish_message(self, user_input: str, session_id: str, intent: str, results: Dict[str, Any]) -> str:
+        """도구 결과 통합 및 세션 메모리 기록"""
+        # 후속 질문도 RAG 결과이므로 정책 정보 응답 포맷으로 통합
+        response_intent = "policy_info" if intent == "followup" else intent
+        with stage_timer("response_integration"):
+            final_response = self.response_integrator.integrate(results, response_intent)
+        self.memory_store.append_turn(session_id, user_input, final_response, intent)
+        return final_response
+
+    def process_message(self, user_input: str, session_id: str = DEFAULT_SESSION_ID) -> str:
+        """사용자 메시지 처리 (세션 메모리 기반, 멀티턴 프롬프트 지원, 지시어 치환 고도화)"""
+        started = time.perf_counter()
+        try:
+            intent, tool_input, tool_intent, history_str = self._plan_message(user_input, session_id)
+            results = self.execute_tools(tool_input, tool_intent, history=history_str)
+            final_response = self._finish_message(user_input, session_id, intent, results)
+            metrics.observe("rag_stage_latency_seconds", time.perf_counter() - started, ("total", intent))
+            return final_response
+        except Exception as e:
+            metrics.inc("rag_errors_total", ("process_message",))
+            error_msg = f"메시지 처리 중 오류가 발생했습니다: {str(e)}"
+            return self.response_integrator.format_error_response(error_msg)
+
+    async def aprocess_message(self, user_input: str, session_id: str = DEFAULT_SESSION_ID) -> str:
+        """사용자 메시지 처리 (비동기, LLM 호출 동안 이벤트 루프를 점유하지 않음)"""
+        started = time.perf_counter()
+        try:
+            intent, tool_input, tool_intent, history_str = await self._aplan_message(user_input, session_id)
+            results = await self.aexecute_tools(tool_input, tool_intent, history=history_str)
+            final_response = self._finish_message(user_input, session_id, intent, results)
+            metrics.observe("rag_stage_latency_seconds", time.perf_counter() - started, ("total", intent))
             return final_response
         except Exception as e:
+            metrics.inc("rag_errors_total", ("process_message",))
             error_msg = f"메시지 처리 중 오류가 발생했습니다: {str(e)}"
             return self.response_integrator.format_error_response(error_msg)
 
+    async def astream_message(self, user_input: str, session_id: str = DEFAULT_SESSION_ID) -> AsyncIterator[Dict[str, Any]]:
+        """사용자 메시지 처리 (스트리밍)
+
+        정책/후속 질문은 RAG 답변을 토큰 단위로 흘려보내고, 그 외 의도는 통합된 응답을 한 번에 보낸다.
+
+        Yields:
+            {"event": "sources" | "token" | "done" | "error", "data": ...}
+        """
+        try:
+            intent, tool_input, tool_intent, history_str = await self._aplan_message(user_input, session_id)
+            if tool_intent == "policy_info":
+                answer = ""
+                documents: List[Dict[str, Any]] = []
+                async for event in self.rag_tool.astream_query(tool_input, history=history_str):
+                    if event["event"] == "sources":
+                        documents = event["data"]["documents"]
+                        yield event
+                    elif event["event"] == "token":
+                        yield event
+                    elif event["event"] == "done":
+                        answer = event["data"]["answer"]
+                self._finish_message(user_input, session_id, intent, {"rag": {"answer": answer, "documents": documents}})
+            else:
+                results = await self.aexecute_tools(tool_input, tool_intent, history=history_str)
+                yield {"event": "token", "data": self._finish_message(user_input, session_id, intent, results)}
+            yield {"event": "done", "data": {"intent": intent}}
+        except Exception as e:
+            metrics.inc("rag_errors_total", ("stream_message",))
+            error_msg = f"메시지 처리 중 오류가 발생했습니다: {str(e)}"
+            yield {"event": "error", "data": self.response_integrator.format_error_response(error_msg)}
+
     def execute_tools(self, user_input: str, intent: str, history: str = "") -> Dict[str, Any]:
         """의도에 따라 적절한 도구 실행 (history 전달)"""
         results = {}
@@ -100,6 +186,19 @@ class ChatbotAgent:
             results["default"] = self.generate_default_response(user_input)
         return results
 
+    async def aexecute_tools(self, user_input: str, intent: str, history: str = "") -> Dict[str, Any]:
+        """의도에 따라 적절한 도구 실행 (비동기, RAG만 비동기 경로 사용)"""
+        if intent in ("policy_info", "comprehensive"):
+            results = {"rag": await self.rag_tool.aquery(user_input, history=history)}
+            if intent == "comprehensive":
+                parsed_data = self.parse_prediction_request(user_input)
+                results["ml"] = self.ml_tool.predict(
+                    location=parsed_data["location"],
+                    capacity=parsed_data["capacity"]
+                )
+            return results
+        return self.execute_tools(user_input, intent, history=history)
+
     def parse_prediction_request(self, user_input: str) -> Dict[str, Any]:
         """발전량 예측 요청 파싱"""
         # 자연어에서 위치와 용량 추출
@@ -140,12 +239,12 @@ class ChatbotAgent:
         """기본 응답 생성"""
         return "죄송합니다. 질문을 이해하지 못했습니다. 재생에너지 관련 질문을 해주세요."
 
-    def get_conversation_history(self):
-        """LangChain 메모리 기반 대화 히스토리 반환"""
-        return self.memory.chat_memory.messages
+    def get_conversation_history(self, session_id: str = DEFAULT_SESSION_ID) -> List[ConversationTurn]:
+        """세션 메모리 기반 대화 히스토리 반환"""
+        return self.memory_store.get_turns(session_id)
 
-    def clear_conversation_history(self):
-        self.memory.clear()
+    def clear_conversation_history(self, session_id: str = DEFAULT_SESSION_ID):
+        self.memory_store.clear(session_id)
 
     def get_embedding_model_info(self) -> Dict[str, str]:
         """현재 사용 중인 임베딩 모델 정보 반환"""
@@ -153,10 +252,11 @@ class ChatbotAgent:
 
     def get_system_info(self) -> Dict[str, Any]:
         """시스템 정보 반환"""
+        memory_stats = self.memory_store.stats()
         return {
             "embedding_model": self.get_embedding_model_info(),
-            "conversation_history_count": len(self.memory.chat_memory.messages),
-            "max_history": 10
+            "active_sessions": memory_stats["sessions"],
+            "max_history": memory_stats["max_turns"]
         }
 
 
@@ -202,7 +302,7 @@ def test_chatbot_agent():
     print("=== 챗봇 에이전트 시스템 정보 ===")
     print(f"임베딩 모델: {system_info['embedding_model']['type']} - {system_info['embedding_model']['name']}")
     print(f"모델 상태: {system_info['embedding_model']['status']}")
-    print(f"대화 히스토리: {system_info['conversation_history_count']}/{system_info['max_history']}")
+    print(f"활성 세션: {system_info['active_sessions']} (세션당 최대 {system_info['max_history']}턴)")
     print()
     
     test_cases = [
@@ -226,7 +326,7 @@ def test_chatbot_agent():
         history = agent.get_conversation_history()
         last_entry = history[-1] if history else None
         if last_entry:
-            print(f"의도: {last_entry['intent']} (신뢰도: {last_entry['confidence']:.2f})")
+            print(f"의도: {last_entry.intent}")
         
         print("\n" + "=" * 60 + "\n")
 
@@ -0,0 +1,106 @@
+"""
+동시성 제한기 (Concurrency Limiter)
+비동기 엔드포인트의 동시 처리 수와 대기열 길이를 제한하고, 대기열이 가득 차면 즉시 거절
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional
+
+
+class ServerOverloadedError(RuntimeError):
+    """처리 슬롯과 대기열이 모두 가득 찬 경우 (HTTP 503으로 변환)"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """in-flight 요청 수 제한 + 제한된 대기열
+
+    max_in_flight개까지는 바로 처리하고, 그 이상은 max_waiting개까지 대기시킨다.
+    대기열까지 가득 차거나 queue_timeout 안에 슬롯을 얻지 못하면 ServerOverloadedError를 발생시킨다.
+    이벤트 루프 스레드에서만 사용되므로 카운터에 별도 락이 필요 없다.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        max_waiting: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+        retry_after: Optional[int] = None
+    ):
+        """동시성 제한기 초기화
+
+        Args:
+            max_in_flight: 동시에 처리할 최대 요청 수 (기본값: CHAT_MAX_IN_FLIGHT 또는 100)
+            max_waiting: 슬롯을 기다릴 수 있는 최대 요청 수 (기본값: CHAT_MAX_WAITING 또는 200)
+            queue_timeout: 대기열 최대 대기 시간(초) (기본값: CHAT_QUEUE_TIMEOUT_SECONDS 또는 30)
+            retry_after: 거절 시 Retry-After 헤더 값(초) (기본값: CHAT_RETRY_AFTER_SECONDS 또는 5)
+        """
+        self.max_in_flight = max_in_flight or int(os.getenv("CHAT_MAX_IN_FLIGHT", "100"))
+        self.max_waiting = max_waiting if max_waiting is not None else int(os.getenv("CHAT_MAX_WAITING", "200"))
+        self.queue_timeout = queue_timeout or float(os.getenv("CHAT_QUEUE_TIMEOUT_SECONDS", "30"))
+        self.retry_after = retry_after or int(os.getenv("CHAT_RETRY_AFTER_SECONDS", "5"))
+
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._in_flight = 0
+        self._waiting = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    async def acquire(self) -> Callable[[], None]:
+        """처리 슬롯 획득 후 해제 함수 반환 (대기열이 가득 차면 ServerOverloadedError)
+
+        해제 함수는 여러 번 호출해도 슬롯을 한 번만 반환하므로, 스트리밍 응답처럼
+        해제 경로가 여러 개인 경우 모든 경로에서 호출해도 된다.
+        """
+        if self._semaphore.locked():
+            if self._waiting >= self.max_waiting:
+                self._rejected += 1
+                raise ServerOverloadedError("요청이 많아 잠시 후 다시 시도해주세요.", self.retry_after)
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._timed_out += 1
+                raise ServerOverloadedError("대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.", self.retry_after)
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self._in_flight += 1
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if released:
+                return
+            released = True
+            self._in_flight -= 1
+            self._semaphore.release()
+
+        return release
+
+    @asynccontextmanager
+    async def slot(self):
+        """처리 슬롯 획득 (대기열이 가득 차면 ServerOverloadedError)"""
+        release = await self.acquire()
+        try:
+            yield
+        finally:
+            release()
+
+    def stats(self) -> Dict[str, Any]:
+        """동시성 통계 반환"""
+        return {
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "max_in_flight": self.max_in_flight,
+            "max_waiting": self.max_waiting,
+            "rejected": self._rejected,
+            "timed_out": self._timed_out
+        }
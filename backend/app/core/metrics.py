@@ -0,0 +1,202 @@
+"""
+메트릭 수집기 (Metrics Collector)
+챗봇 파이프라인 단계별 지연 시간, 캐시/폴백/오류 카운터, 토큰 사용량을 Prometheus 텍스트 포맷으로 노출
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 현재 요청의 의도 (단계별 지연 시간의 intent 라벨로 사용)
+current_intent: ContextVar[str] = ContextVar("current_intent", default="none")
+
+Labels = Tuple[str, ...]
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Family:
+    __slots__ = ("name", "kind", "help", "label_names", "callback")
+
+    def __init__(self, name: str, kind: str, help: str, label_names: Labels, callback=None):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.label_names = label_names
+        self.callback = callback
+
+
+class _Shard:
+    """스레드별 집계 저장소 (해당 스레드만 기록하므로 락이 필요 없음)"""
+
+    __slots__ = ("values",)
+
+    def __init__(self):
+        # 카운터/게이지: (이름, 라벨) -> [값]
+        # 히스토그램: (이름, 라벨) -> [버킷별 개수..., 합계, 전체 개수]
+        self.values: Dict[Tuple[str, Labels], List[float]] = {}
+
+
+class _Timer:
+    __slots__ = ("_collector", "_name", "_labels", "_start")
+
+    def __init__(self, collector: "MetricsCollector", name: str, labels: Labels):
+        self._collector = collector
+        self._name = name
+        self._labels = labels
+        self._start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._collector.observe(self._name, time.perf_counter() - self._start, self._labels)
+
+
+class MetricsCollector:
+    """Prometheus 포맷 메트릭 수집기
+
+    기록(observe/inc)은 호출 스레드 전용 샤드에만 쓰므로 락을 잡지 않는다. 키별 버킷 배열은
+    처음 한 번만 만들어지고 이후에는 제자리에서 갱신된다. 스크레이프(render) 시점에만 모든 샤드를 합산한다.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._families: Dict[str, _Family] = {}
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.Lock()
+
+    def register(self, name: str, kind: str, help: str, label_names: Labels = ()) -> None:
+        """메트릭 등록 (kind: counter, gauge, histogram)"""
+        self._families[name] = _Family(name, kind, help, label_names)
+
+    def register_callback_gauge(self, name: str, help: str, callback: Callable[[], Dict[Labels, float]], label_names: Labels = ()) -> None:
+        """스크레이프 시점에 callback으로 값을 읽는 게이지 등록"""
+        self._families[name] = _Family(name, "gauge", help, label_names, callback)
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard()
+            self._local.shard = shard
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1.0) -> None:
+        """카운터/게이지 증가"""
+        values = self._shard().values
+        slot = values.get((name, labels))
+        if slot is None:
+            values[(name, labels)] = [value]
+        else:
+            slot[0] += value
+
+    def dec(self, name: str, labels: Labels = (), value: float = 1.0) -> None:
+        """게이지 감소"""
+        self.inc(name, labels, -value)
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        """히스토그램에 값 기록"""
+        values = self._shard().values
+        slot = values.get((name, labels))
+        if slot is None:
+            slot = [0.0] * (len(self.buckets) + 2)
+            values[(name, labels)] = slot
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            slot[index] += 1
+        slot[-2] += value
+        slot[-1] += 1
+
+    def timer(self, name: str, labels: Labels = ()) -> _Timer:
+        """with 블록의 실행 시간을 히스토그램에 기록"""
+        return _Timer(self, name, labels)
+
+    def _merged(self) -> Dict[Tuple[str, Labels], List[float]]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        merged: Dict[Tuple[str, Labels], List[float]] = {}
+        for shard in shards:
+            for key, slot in list(shard.values.items()):
+                total = merged.get(key)
+                if total is None:
+                    merged[key] = list(slot)
+                else:
+                    for i, v in enumerate(slot):
+                        total[i] += v
+        return merged
+
+    @staticmethod
+    def _format_labels(label_names: Labels, labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = [f'{key}="{_escape_label_value(str(value))}"' for key, value in zip(label_names, labels)]
+        if extra is not None:
+            pairs.append(f'{extra[0]}="{extra[1]}"')
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> str:
+        """Prometheus 텍스트 포맷(0.0.4)으로 출력"""
+        merged = self._merged()
+        by_family: Dict[str, List[Tuple[Labels, List[float]]]] = {}
+        for (name, labels), slot in merged.items():
+            by_family.setdefault(name, []).append((labels, slot))
+
+        lines: List[str] = []
+        for family in self._families.values():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            if family.callback is not None:
+                for labels, value in family.callback().items():
+                    lines.append(f"{family.name}{self._format_labels(family.label_names, labels)} {value}")
+                continue
+            for labels, slot in sorted(by_family.get(family.name, []), key=lambda item: item[0]):
+                if family.kind != "histogram":
+                    lines.append(f"{family.name}{self._format_labels(family.label_names, labels)} {slot[0]}")
+                    continue
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, slot):
+                    cumulative += count
+                    lines.append(f"{family.name}_bucket{self._format_labels(family.label_names, labels, ('le', repr(bound)))} {cumulative}")
+                lines.append(f"{family.name}_bucket{self._format_labels(family.label_names, labels, ('le', '+Inf'))} {slot[-1]}")
+                lines.append(f"{family.name}_sum{self._format_labels(family.label_names, labels)} {slot[-2]}")
+                lines.append(f"{family.name}_count{self._format_labels(family.label_names, labels)} {slot[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsCollector()
+
+metrics.register("rag_stage_latency_seconds", "histogram", "챗봇 파이프라인 단계별 지연 시간(초)", ("stage", "intent"))
+metrics.register("rag_cache_hits_total", "counter", "캐시 적중 수", ("cache",))
+metrics.register("rag_cache_misses_total", "counter", "캐시 미스 수", ("cache",))
+metrics.register("rag_empty_retrieval_total", "counter", "관련 문서가 없어 기본 응답으로 대체된 횟수", ())
+metrics.register("rag_errors_total", "counter", "단계별 오류 수", ("stage",))
+metrics.register("llm_tokens_total", "counter", "LLM 토큰 사용량", ("type",))
+metrics.register("embedding_batches_total", "counter", "마이크로 배처가 실행한 질의 임베딩 배치 수", ())
+metrics.register("embedding_batched_queries_total", "counter", "마이크로 배처로 처리한 질의 임베딩 요청 수", ())
+metrics.register("http_requests_in_flight", "gauge", "처리 중인 HTTP 요청 수", ("endpoint",))
+
+
+def stage_timer(stage: str) -> _Timer:
+    """현재 요청 의도를 라벨로 붙인 단계별 지연 시간 타이머"""
+    return metrics.timer("rag_stage_latency_seconds", (stage, current_intent.get()))
+
+
+def record_token_usage(message) -> None:
+    """LLM 응답 메시지의 토큰 사용량 기록"""
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        metrics.inc("llm_tokens_total", ("prompt",), usage.get("input_tokens", 0))
+        metrics.inc("llm_tokens_total", ("completion",), usage.get("output_tokens", 0))
+        return
+    token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage")
+    if token_usage:
+        metrics.inc("llm_tokens_total", ("prompt",), token_usage.get("prompt_tokens", 0))
+        metrics.inc("llm_tokens_total", ("completion",), token_usage.get("completion_tokens", 0))
@@ -0,0 +1,149 @@
+"""
+컴포넌트 레지스트리 (Component Registry)
+워커 프로세스당 한 번 임베딩 모델, 벡터 저장소, LLM 클라이언트를 생성/웜업하여 모든 엔드포인트가 공유
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.tools.rag_tools.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class RegistryNotReadyError(RuntimeError):
+    """웜업이 끝나기 전에 공유 컴포넌트를 요청한 경우"""
+
+
+class ComponentRegistry:
+    """프로세스 단위 공유 컴포넌트 레지스트리
+
+    FastAPI lifespan에서 warm_up()을 한 번 호출하면 RAGPipeline(임베딩 모델, Chroma, ChatOpenAI)과
+    ChatbotAgent를 생성하고, 더미 임베딩 1회와 더미 검색 1회로 모델/인덱스를 메모리에 올린 뒤에만
+    준비 완료(ready)로 전환한다. 엔드포인트는 매 요청마다 새로 만들지 않고 get_rag()/get_agent()로
+    같은 인스턴스를 공유한다. 준비 여부와 웜업 결과는 snapshot()의 캐시된 값으로, 세션 수나 인덱스 버전처럼
+    운영 중 바뀌는 값은 공유 컴포넌트에서 바로 읽는다.
+
+    공유 컴포넌트는 요청 처리 중 읽기 전용으로만 사용된다. ChatOpenAI는 내부 HTTP 클라이언트가,
+    HuggingFaceEmbeddings(SentenceTransformer.encode)와 Chroma 조회는 상태 변경 없이 동작하므로
+    여러 스레드에서 동시에 호출해도 안전하다.
+    """
+
+    def __init__(self, embedding_type: Optional[str] = None):
+        """레지스트리 초기화 (컴포넌트는 warm_up()에서 생성)
+
+        Args:
+            embedding_type: 'openai', 'huggingface', 'onnx', 'auto' (기본값: RAG_EMBEDDING_TYPE 환경 변수)
+        """
+        self.embedding_type = embedding_type or os.getenv("RAG_EMBEDDING_TYPE", "auto")
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._rag = None
+        self._agent = None
+        self._error: Optional[str] = None
+        self._snapshot: Dict[str, Any] = {"status": "initializing"}
+
+    @property
+    def is_ready(self) -> bool:
+        """웜업 완료 여부"""
+        return self._ready.is_set()
+
+    def warm_up(self) -> None:
+        """공유 컴포넌트 생성 및 웜업 (이미 준비된 경우 아무 것도 하지 않음)"""
+        with self._lock:
+            if self._ready.is_set():
+                return
+
+            from app.agents.chatbot_agent import ChatbotAgent
+            from app.tools.rag_tools.rag_pipeline import RAGPipeline
+
+            started = time.perf_counter()
+            try:
+                logger.info(f"공유 컴포넌트를 생성합니다 (embedding_type={self.embedding_type})")
+                rag = RAGPipeline(embedding_type=self.embedding_type)
+                agent = ChatbotAgent(rag_tool=rag)
+                build_seconds = time.perf_counter() - started
+
+                # 더미 임베딩/검색으로 모델 가중치와 인덱스를 미리 메모리에 적재
+                # (embed_documents는 질의 임베딩 캐시를 거치지 않으므로 항상 모델을 실제로 호출)
+                t0 = time.perf_counter()
+                embedding = rag.embeddings.embed_documents(["웜업"])[0]
+                embed_seconds = time.perf_counter() - t0
+
+                t0 = time.perf_counter()
+                rag._search_by_vector(rag._active_index(), embedding, k=1)
+                search_seconds = time.perf_counter() - t0
+
+                system_info = agent.get_system_info()
+                self._snapshot = {
+                    "status": "ready",
+                    "system_info": system_info,
+                    "embedding_model": system_info["embedding_model"],
+                    **rag.index_info(),
+                    "hnsw": rag.vectorstore._collection.metadata or {},
+                    "warmup": {
+                        "build_seconds": round(build_seconds, 3),
+                        "embed_seconds": round(embed_seconds, 3),
+                        "search_seconds": round(search_seconds, 3),
+                        "total_seconds": round(time.perf_counter() - started, 3),
+                    },
+                    "ready_at": datetime.now().isoformat(),
+                }
+                self._rag = rag
+                self._agent = agent
+                self._error = None
+                self._ready.set()
+                logger.info(f"공유 컴포넌트 웜업 완료: {self._snapshot['warmup']}")
+            except Exception as e:
+                self._error = str(e)
+                self._snapshot = {"status": "error", "error": str(e)}
+                logger.error(f"공유 컴포넌트 웜업 실패: {str(e)}")
+                raise
+
+    def shutdown(self) -> None:
+        """공유 컴포넌트의 백그라운드 작업 중지 및 참조 해제"""
+        with self._lock:
+            self._ready.clear()
+            if self._rag is not None:
+                from app.tools.rag_tools.retrievers.multi_query import shutdown_search_executor
+                self._rag.close()
+                shutdown_search_executor()
+            self._rag = None
+            self._agent = None
+            self._snapshot = {"status": "stopped"}
+
+    def _require_ready(self) -> None:
+        if not self._ready.is_set():
+            detail = f"웜업 실패: {self._error}" if self._error else "컴포넌트 웜업 중입니다."
+            raise RegistryNotReadyError(detail)
+
+    def get_rag(self):
+        """공유 RAGPipeline 반환"""
+        self._require_ready()
+        return self._rag
+
+    def get_agent(self):
+        """공유 ChatbotAgent 반환"""
+        self._require_ready()
+        return self._agent
+
+    def snapshot(self) -> Dict[str, Any]:
+        """웜업 시점에 캐시된 상태 스냅샷 반환 (컴포넌트를 새로 만들지 않음)"""
+        return dict(self._snapshot)
+
+
+_registry: Optional[ComponentRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ComponentRegistry:
+    """프로세스 전역 레지스트리 반환"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ComponentRegistry()
+    return _registry
@@ -0,0 +1,167 @@
+"""
+세션 메모리 저장소 (Session Memory Store)
+세션 ID별 대화 턴을 보관하고 세션 수/턴 수/유휴 시간 기준으로 메모리를 제한
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+MAX_SESSION_ID_LENGTH = 128  # 클라이언트가 보낸 세션 ID가 메모리 키로 쓰이므로 길이 제한
+
+
+class ConversationTurn:
+    """대화 한 턴(사용자 질문 + 챗봇 답변) 레코드"""
+
+    __slots__ = ("user", "assistant", "intent", "created_at")
+
+    def __init__(self, user: str, assistant: str, intent: str, created_at: float):
+        self.user = user
+        self.assistant = assistant
+        self.intent = intent
+        self.created_at = created_at
+
+    def size_bytes(self) -> int:
+        """턴이 점유하는 대략적인 메모리 크기"""
+        return sys.getsizeof(self.user) + sys.getsizeof(self.assistant) + sys.getsizeof(self.intent)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "user": self.user,
+            "assistant": self.assistant,
+            "intent": self.intent,
+            "created_at": self.created_at
+        }
+
+
+class _Session:
+    __slots__ = ("turns", "last_access", "size_bytes")
+
+    def __init__(self, max_turns: int, now: float):
+        self.turns: Deque[ConversationTurn] = deque(maxlen=max_turns)
+        self.last_access = now
+        self.size_bytes = 0
+
+
+class SessionMemoryStore:
+    """세션 단위 대화 메모리 저장소 (LRU + TTL)
+
+    세션은 마지막 접근 순서대로 OrderedDict에 보관되므로, 가장 오래 사용되지 않은 세션이 항상 맨 앞에 있다.
+    - max_sessions를 넘으면 맨 앞(LRU) 세션부터 제거
+    - ttl_seconds 동안 접근이 없던 세션은 접근/추가 시점에 맨 앞부터 정리
+    - 세션별로 최근 max_turns 턴만 유지하고, 각 메시지는 max_chars로 잘라 보관
+    - MAX_SESSION_ID_LENGTH자를 넘는 세션 ID는 ValueError로 거절
+    모든 연산은 하나의 락으로 보호되어 여러 스레드에서 동시에 호출해도 안전하다.
+    """
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        max_turns: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        max_chars: Optional[int] = None
+    ):
+        """세션 메모리 저장소 초기화
+
+        Args:
+            max_sessions: 동시에 유지할 최대 세션 수 (기본값: SESSION_MAX_SESSIONS 또는 10000)
+            max_turns: 세션별 최대 턴 수 (기본값: SESSION_MAX_TURNS 또는 10)
+            ttl_seconds: 유휴 세션 만료 시간(초) (기본값: SESSION_TTL_SECONDS 또는 1800)
+            max_chars: 메시지별 최대 보관 글자 수 (기본값: SESSION_MAX_CHARS 또는 2000)
+        """
+        self.max_sessions = max_sessions or int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+        self.max_turns = max_turns or int(os.getenv("SESSION_MAX_TURNS", "10"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+        self.max_chars = max_chars or int(os.getenv("SESSION_MAX_CHARS", "2000"))
+
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes_held = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions_lru = 0
+        self._evictions_ttl = 0
+
+    @staticmethod
+    def _check_session_id(session_id: str) -> None:
+        if len(session_id) > MAX_SESSION_ID_LENGTH:
+            raise ValueError(f"세션 ID는 {MAX_SESSION_ID_LENGTH}자 이하여야 합니다.")
+
+    def get_turns(self, session_id: str) -> List[ConversationTurn]:
+        """세션의 대화 턴 목록 반환 (오래된 순)"""
+        self._check_session_id(session_id)
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                self._misses += 1
+                return []
+            self._hits += 1
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            return list(session.turns)
+
+    def append_turn(self, session_id: str, user: str, assistant: str, intent: str) -> None:
+        """세션에 대화 턴 추가"""
+        self._check_session_id(session_id)
+        now = time.monotonic()
+        turn = ConversationTurn(user[:self.max_chars], assistant[:self.max_chars], intent, time.time())
+        with self._lock:
+            self._purge_expired(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = _Session(self.max_turns, now)
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    _, evicted = self._sessions.popitem(last=False)
+                    self._bytes_held -= evicted.size_bytes
+                    self._evictions_lru += 1
+            else:
+                self._sessions.move_to_end(session_id)
+
+            if len(session.turns) == session.turns.maxlen:
+                dropped = session.turns[0].size_bytes()
+                session.size_bytes -= dropped
+                self._bytes_held -= dropped
+            session.turns.append(turn)
+            added = turn.size_bytes()
+            session.size_bytes += added
+            self._bytes_held += added
+            session.last_access = now
+
+    def clear(self, session_id: str) -> None:
+        """세션 대화 기록 삭제"""
+        self._check_session_id(session_id)
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self._bytes_held -= session.size_bytes
+
+    def _purge_expired(self, now: float) -> None:
+        """만료된 세션 정리 (락을 잡은 상태에서 호출)"""
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access < self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+            self._bytes_held -= session.size_bytes
+            self._evictions_ttl += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """세션 메모리 통계 반환"""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "max_turns": self.max_turns,
+                "ttl_seconds": self.ttl_seconds,
+                "bytes_held": self._bytes_held,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions_lru": self._evictions_lru,
+                "evictions_ttl": self._evictions_ttl
+            }
@@ -3,31 +3,105 @@
 FastAPI 백엔드 API 서버
 """
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
 import os
 import sys
+import uuid
 
 # 현재 디렉토리를 Python 경로에 추가
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 sys.path.insert(0, project_root)
 
+from app.core.concurrency import ConcurrencyLimiter, ServerOverloadedError
+from app.core.metrics import metrics
+from app.core.registry import ComponentRegistry, get_registry
+from app.core.session_memory import MAX_SESSION_ID_LENGTH
+
 # Pydantic 모델 정의
 class ChatRequest(BaseModel):
     message: str
+    session_id: Optional[str] = Field(None, max_length=MAX_SESSION_ID_LENGTH)
 
 class ChatResponse(BaseModel):
     status: str
     message: str
     response: str
+    session_id: Optional[str] = None
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=256)
+    k: int = Field(3, ge=1, le=50)
+    score_threshold: Optional[float] = Field(None, ge=0.0, le=1.0)
+    filter: Optional[Dict[str, Any]] = None
+
+def _warm_up_registry(registry: ComponentRegistry) -> None:
+    """백그라운드 웜업 (실패 내용은 레지스트리 스냅샷에 기록됨)"""
+    try:
+        registry.warm_up()
+    except Exception:
+        pass
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """워커 시작 시 공유 컴포넌트를 한 번 생성/웜업하고 종료 시 해제"""
+    registry = get_registry()
+    loop = asyncio.get_running_loop()
+    warm_up_task = loop.run_in_executor(None, _warm_up_registry, registry)
+    yield
+    await warm_up_task
+    registry.shutdown()
+
+def get_ready_registry() -> ComponentRegistry:
+    """웜업이 끝난 레지스트리 반환 (준비 전이면 503)"""
+    registry = get_registry()
+    if not registry.is_ready:
+        raise HTTPException(
+            status_code=503,
+            detail=registry.snapshot(),
+            headers={"Retry-After": "5"}
+        )
+    return registry
+
+# LLM 호출 경로의 동시 처리 수/대기열 제한 (워커별)
+chat_limiter = ConcurrencyLimiter()
+
+def overloaded_response(error: ServerOverloadedError) -> HTTPException:
+    """과부하 오류를 503 + Retry-After 응답으로 변환"""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+# 동시성 제한기 상태를 스크레이프 시점에 게이지로 노출
+metrics.register_callback_gauge(
+    "chat_limiter_slots",
+    "LLM 경로 동시성 제한기 상태 (in_flight, waiting)",
+    lambda: {
+        ("in_flight",): chat_limiter.stats()["in_flight"],
+        ("waiting",): chat_limiter.stats()["waiting"]
+    },
+    ("state",)
+)
+
+# in-flight 게이지를 기록할 엔드포인트 (라벨 카디널리티 제한)
+TRACKED_PATHS = {"/api/chat", "/api/chat/stream", "/api/rag/search", "/api/rag/search/batch"}
 
 # FastAPI 앱 생성
 app = FastAPI(
     title="재생에너지 AI 가이드 API",
     description="정책/제도/RAG/예측/실시간 데이터 통합 상담 시스템 API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS 설정
@@ -39,6 +113,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def track_in_flight(request: Request, call_next):
+    """주요 API 엔드포인트의 처리 중 요청 수 기록"""
+    path = request.url.path
+    if path not in TRACKED_PATHS:
+        return await call_next(request)
+    labels = (path,)
+    metrics.inc("http_requests_in_flight", labels)
+    try:
+        return await call_next(request)
+    finally:
+        metrics.dec("http_requests_in_flight", labels)
+
 # FastAPI 라우트
 @app.get("/")
 def root():
@@ -58,88 +145,233 @@ def health_check():
     """헬스 체크 엔드포인트"""
     return {
         "status": "healthy",
+        "ready": get_registry().is_ready,
         "services": {
             "fastapi": "running",
             "chroma": "running"
         }
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus 메트릭 엔드포인트"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/health/ready")
+def readiness_check(registry: ComponentRegistry = Depends(get_ready_registry)):
+    """레디니스 체크 엔드포인트 (웜업 완료 후에만 200)"""
+    snapshot = registry.snapshot()
+    return {
+        "status": snapshot["status"],
+        "warmup": snapshot["warmup"]
+    }
+
 @app.get("/api/chatbot/status")
 def chatbot_status():
-    """챗봇 상태 확인"""
-    try:
-        from app.agents.chatbot_agent import ChatbotAgent
-        agent = ChatbotAgent()
-        system_info = agent.get_system_info()
+    """챗봇 상태 확인 (준비 여부는 레지스트리 스냅샷, 시스템 정보는 공유 컴포넌트에서 매번 계산)"""
+    registry = get_registry()
+    snapshot = registry.snapshot()
+    if snapshot["status"] == "ready":
+        agent = registry.get_agent()
+        rag = registry.get_rag()
         return {
             "status": "ready",
-            "system_info": system_info
+            "system_info": {
+                **agent.get_system_info(),
+                "index_version": rag.index_version
+            },
+            "session_memory": agent.memory_store.stats(),
+            "concurrency": chat_limiter.stats(),
+            "singleflight": rag.singleflight.stats()
         }
-    except Exception as e:
+    if snapshot["status"] == "error":
         return {
             "status": "error",
-            "error": str(e)
+            "error": snapshot["error"]
         }
+    return {
+        "status": snapshot["status"]
+    }
 
 @app.post("/api/chat", response_model=ChatResponse)
-def chat_with_bot(request: ChatRequest):
+async def chat_with_bot(request: ChatRequest, registry: ComponentRegistry = Depends(get_ready_registry)):
     """챗봇과 대화하는 API 엔드포인트"""
+    # 세션 ID가 없으면 새 세션을 발급하고 응답으로 돌려줌
+    session_id = request.session_id or uuid.uuid4().hex
     try:
-        from app.agents.chatbot_agent import ChatbotAgent
-        agent = ChatbotAgent()
-        response = agent.process_message(request.message)
+        agent = registry.get_agent()
+        async with chat_limiter.slot():
+            response = await agent.aprocess_message(request.message, session_id=session_id)
         return ChatResponse(
             status="success",
             message=request.message,
-            response=response
+            response=response,
+            session_id=session_id
         )
+    except ServerOverloadedError as e:
+        raise overloaded_response(e)
     except Exception as e:
         return ChatResponse(
             status="error",
             message=request.message,
-            response=f"오류가 발생했습니다: {str(e)}"
+            response=f"오류가 발생했습니다: {str(e)}",
+            session_id=session_id
         )
 
+def format_sse(event: str, data) -> str:
+    """Server-Sent Events 메시지 포맷"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/api/chat/stream")
+async def chat_with_bot_stream(request: ChatRequest, registry: ComponentRegistry = Depends(get_ready_registry)):
+    """챗봇 답변 스트리밍 API 엔드포인트 (SSE: sources → token... → done)"""
+    session_id = request.session_id or uuid.uuid4().hex
+    agent = registry.get_agent()
+
+    # 응답을 시작하기 전에 슬롯을 확보해야 과부하 시 503을 돌려줄 수 있음
+    try:
+        release = await chat_limiter.acquire()
+    except ServerOverloadedError as e:
+        raise overloaded_response(e)
+
+    async def event_stream():
+        try:
+            async for event in agent.astream_message(request.message, session_id=session_id):
+                data = event["data"]
+                if event["event"] == "done":
+                    data = {**data, "session_id": session_id}
+                yield format_sse(event["event"], data)
+        finally:
+            release()
+
+    # 제너레이터가 한 번도 실행되지 않는 경우(응답 전 연결 종료 등)에도 슬롯이 반환되도록
+    # 응답 완료 후 백그라운드 작업으로도 해제 (해제 함수는 한 번만 동작)
+    try:
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",
+                "X-Session-Id": session_id
+            },
+            background=BackgroundTask(release)
+        )
+    except BaseException:
+        release()
+        raise
+
 @app.get("/api/rag/search")
-def rag_search(query: str, k: int = 3):
-    """RAG 검색 API 엔드포인트"""
+async def rag_search(
+    query: str,
+    k: int = Query(3, ge=1, le=50),
+    score_threshold: Optional[float] = Query(None, ge=0.0, le=1.0),
+    filter: Optional[str] = None,
+    generate: bool = False,
+    registry: ComponentRegistry = Depends(get_ready_registry)
+):
+    """RAG 검색 API 엔드포인트
+
+    기본은 검색 전용 모드로, LLM 호출 없이 순위/점수/메타데이터가 포함된 문서를 반환한다.
+    generate=true일 때만 검색된 문서로 답변을 생성한다.
+    filter는 메타데이터 조건 JSON 문자열이다 (예: {"category": "REC"}, {"year": {"$gte": 2020}}).
+    지원하지 않는 연산자나 잘못된 피연산자는 400으로 응답한다.
+    """
     try:
-        from app.tools.rag_tools.rag_pipeline import RAGPipeline
-        rag = RAGPipeline()
-        result = rag.query(query)
+        where = json.loads(filter) if filter else None
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"filter JSON 형식 오류: {str(e)}")
+    if where is not None and not isinstance(where, dict):
+        raise HTTPException(status_code=400, detail="filter는 JSON 객체여야 합니다 (예: {\"category\": \"REC\"}).")
+    try:
+        rag = registry.get_rag()
+        if not generate:
+            try:
+                documents = await rag.asearch(query, k=k, score_threshold=score_threshold, filter=where)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"filter 조건 오류: {str(e)}")
+            return {
+                "status": "success",
+                "query": query,
+                "documents": documents
+            }
+        async with chat_limiter.slot():
+            result = await rag.aquery(query, k=k)
         return {
             "status": "success",
             "query": query,
             "result": result
         }
+    except ServerOverloadedError as e:
+        raise overloaded_response(e)
+    except HTTPException:
+        raise
     except Exception as e:
         return {
             "status": "error",
             "error": str(e)
         }
 
-@app.get("/api/system/info")
-def system_info():
-    """시스템 정보 API 엔드포인트"""
+@app.post("/api/rag/search/batch")
+async def rag_search_batch(request: BatchSearchRequest, registry: ComponentRegistry = Depends(get_ready_registry)):
+    """RAG 배치 검색 API 엔드포인트 (쿼리 전체를 한 번에 임베딩/검색, LLM 호출 없음)"""
     try:
-        from app.tools.rag_tools.rag_pipeline import RAGPipeline
-        rag = RAGPipeline()
-        embedding_info = rag.get_embedding_model_info()
-        
+        rag = registry.get_rag()
+        try:
+            batched = await rag.asearch_batch(
+                request.queries,
+                k=request.k,
+                score_threshold=request.score_threshold,
+                filter=request.filter
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"filter 조건 오류: {str(e)}")
         return {
             "status": "success",
-            "system_info": {
-                "embedding_model": embedding_info,
-                "vectorstore_path": rag.persist_directory,
-                "collection_name": rag.collection_name
-            }
+            "results": [
+                {"query": query, "documents": documents}
+                for query, documents in zip(request.queries, batched)
+            ]
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return {
             "status": "error",
             "error": str(e)
         }
 
+@app.get("/api/rag/cache")
+def rag_cache_stats(registry: ComponentRegistry = Depends(get_ready_registry)):
+    """RAG 캐시 통계 (의미 기반 답변 캐시, 질의 임베딩 캐시)"""
+    return {
+        "status": "success",
+        **registry.get_rag().cache_stats()
+    }
+
+@app.get("/api/system/info")
+def system_info():
+    """시스템 정보 API 엔드포인트 (준비 여부는 레지스트리 스냅샷, 인덱스 정보는 활성 인덱스에서 매번 계산)"""
+    registry = get_registry()
+    snapshot = registry.snapshot()
+    if snapshot["status"] != "ready":
+        return {
+            "status": "error",
+            "error": snapshot.get("error", "컴포넌트 웜업 중입니다.")
+        }
+    rag = registry.get_rag()
+    index_info = rag.index_info()
+    return {
+        "status": "success",
+        "system_info": {
+            "embedding_model": rag.get_embedding_model_info(),
+            "vectorstore_path": index_info["vectorstore_path"],
+            "index_version": index_info["index_version"],
+            "collection_name": index_info["collection_name"],
+            "document_count": index_info["document_count"]
+        }
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -5,20 +5,28 @@ RAG (Retrieval-Augmented Generation) 도구 모듈
 표준 RAG 파이프라인 구조를 따르는 모듈들입니다.
 """
 
-from .rag_pipeline import RAGPipeline
-
-# 하위 모듈들
-from . import crawlers
-from . import loaders
-from . import splitters
-from . import embeddings
-from . import vectorstores
-from . import retrievers
-from . import chains
-from . import utils
+import importlib
+
+# 하위 모듈은 처음 접근할 때 임포트 (PEP 562)
+# 패키지 임포트만으로 LangChain, Chroma, Selenium 등 무거운 의존성이 로드되지 않도록 한다.
+_SUBMODULES = {
+    'caches',
+    'crawlers',
+    'loaders',
+    'splitters',
+    'embeddings',
+    'vectorstores',
+    'retrievers',
+    'chains',
+    'utils'
+}
+_ATTRIBUTES = {
+    'RAGPipeline': '.rag_pipeline'
+}
 
 __all__ = [
     'RAGPipeline',
+    'caches',
     'crawlers',
     'loaders', 
     'splitters',
@@ -28,3 +36,18 @@ __all__ = [
     'chains',
     'utils'
 ]
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        module = importlib.import_module(f'.{name}', __name__)
+    elif name in _ATTRIBUTES:
+        module = getattr(importlib.import_module(_ATTRIBUTES[name], __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = module
+    return module
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,362 @@
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.metrics import metrics
+from app.tools.rag_tools.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# backend/data/cache
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))),
+    "data", "cache"
+)
+PRUNE_INTERVAL = 1000  # 디스크 항목 정리 주기(삽입 횟수)
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키용 텍스트 정규화 (NFC, 연속 공백 축약, 앞뒤 공백 제거)"""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', text)).strip()
+
+
+class QueryEmbeddingCache:
+    """질의 임베딩 2단 캐시
+
+    - 메모리: 프로세스별 LRU(OrderedDict), 값은 float32 배열로 보관
+    - 디스크: 모든 워커가 공유하는 sqlite 파일(WAL), 값은 float32 바이트(BLOB)
+    키는 (모델 이름, 정규화된 텍스트)의 해시이므로 모델이 다르면 같은 파일을 써도 섞이지 않는다.
+    메모리 계층(_lock)과 sqlite 연결(_db_lock)은 잠금이 분리되어 있어,
+    디스크 조회/기록 중에도 메모리 조회는 기다리지 않는다 (비동기 경로는 메모리 계층만 이벤트 루프에서 조회).
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        max_disk_entries: Optional[int] = None
+    ):
+        """질의 임베딩 캐시 초기화
+
+        Args:
+            db_path: sqlite 파일 경로 (기본값: EMBEDDING_CACHE_PATH 또는 data/cache/query_embeddings.sqlite3)
+            max_entries: 메모리 LRU 최대 항목 수 (기본값: EMBEDDING_CACHE_MAX_ENTRIES 또는 10000)
+            max_disk_entries: 디스크 최대 항목 수 (기본값: EMBEDDING_CACHE_MAX_DISK_ENTRIES 또는 200000)
+        """
+        self.db_path = db_path or os.getenv(
+            "EMBEDDING_CACHE_PATH", os.path.join(DEFAULT_CACHE_DIR, "query_embeddings.sqlite3")
+        )
+        self.max_entries = max_entries or int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "10000"))
+        self.max_disk_entries = max_disk_entries or int(os.getenv("EMBEDDING_CACHE_MAX_DISK_ENTRIES", "200000"))
+
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._inserts = 0
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT, dim INTEGER, vector BLOB, created_at REAL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        """(모델 이름, 정규화된 텍스트) 캐시 키"""
+        return hashlib.sha1(f"{model_name}\x00{text}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """메모리 → 디스크 순으로 조회 (디스크 적중 시 메모리로 승격)"""
+        vector = self.get_memory(key)
+        if vector is None:
+            vector = self.get_disk(key)
+        return vector
+
+    def get_memory(self, key: str) -> Optional[np.ndarray]:
+        """메모리 계층만 조회 (디스크 I/O 없음, 이벤트 루프에서 호출 가능)"""
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is None:
+                return None
+            self._memory.move_to_end(key)
+            self._memory_hits += 1
+        metrics.inc("rag_cache_hits_total", ("query_embedding_memory",))
+        return vector
+
+    def get_disk(self, key: str) -> Optional[np.ndarray]:
+        """디스크 계층 조회 (적중 시 메모리로 승격, 블로킹 I/O)"""
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT vector FROM query_embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        with self._lock:
+            if row is None:
+                self._misses += 1
+            else:
+                vector = np.frombuffer(row[0], dtype=np.float32)
+                self._put_memory_locked(key, vector)
+                self._disk_hits += 1
+        if row is None:
+            metrics.inc("rag_cache_misses_total", ("query_embedding",))
+            return None
+        metrics.inc("rag_cache_hits_total", ("query_embedding_disk",))
+        return vector
+
+    def put(self, key: str, model_name: str, vector: np.ndarray) -> None:
+        """메모리와 디스크에 저장"""
+        self.put_memory(key, vector)
+        self.put_disk(key, model_name, vector)
+
+    def put_memory(self, key: str, vector: np.ndarray) -> None:
+        """메모리 계층에만 저장"""
+        with self._lock:
+            self._put_memory_locked(key, vector)
+
+    def put_disk(self, key: str, model_name: str, vector: np.ndarray) -> None:
+        """디스크 계층에 저장 (블로킹 I/O, 오류는 로그만 남김)"""
+        try:
+            with self._db_lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO query_embeddings VALUES (?, ?, ?, ?, ?)",
+                    (key, model_name, int(vector.shape[0]), vector.tobytes(), time.time())
+                )
+                self._inserts += 1
+                if self._inserts % PRUNE_INTERVAL == 0:
+                    self._prune_disk_locked()
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"질의 임베딩 캐시 기록 중 오류 발생: {str(e)}")
+
+    def _put_memory_locked(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _prune_disk_locked(self) -> None:
+        """디스크 항목이 상한을 넘으면 오래된 항목부터 삭제 (_db_lock 안에서 호출)"""
+        count = self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM query_embeddings WHERE key IN "
+                "(SELECT key FROM query_embeddings ORDER BY created_at LIMIT ?)",
+                (overflow,)
+            )
+            logger.info(f"질의 임베딩 캐시에서 오래된 항목 {overflow}개를 삭제했습니다.")
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 통계 반환"""
+        with self._lock:
+            total = self._memory_hits + self._disk_hits + self._misses
+            return {
+                "path": self.db_path,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": (self._memory_hits + self._disk_hits) / total if total else 0.0
+            }
+
+
+class DocumentEmbeddingCache:
+    """문서 임베딩 영속 캐시
+
+    키는 (임베딩 모델, page_content 원문의 SHA-256)이며 값은 float32 바이트로 sqlite에 저장한다.
+    재구축 시 내용이 바뀌지 않은 청크는 다시 임베딩하지 않으므로 임베딩 시간/비용이 변경분에 비례한다.
+    적재는 배치 단위로만 일어나므로 메모리 계층 없이 디스크에서 한 번에 조회한다.
+    """
+
+    QUERY_CHUNK = 500  # sqlite IN 절 하나에 넣을 최대 키 수
+
+    def __init__(self, db_path: Optional[str] = None):
+        """문서 임베딩 캐시 초기화
+
+        Args:
+            db_path: sqlite 파일 경로 (기본값: DOCUMENT_EMBEDDING_CACHE_PATH 또는 data/cache/document_embeddings.sqlite3)
+        """
+        self.db_path = db_path or os.getenv(
+            "DOCUMENT_EMBEDDING_CACHE_PATH", os.path.join(DEFAULT_CACHE_DIR, "document_embeddings.sqlite3")
+        )
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS document_embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT, dim INTEGER, vector BLOB, created_at REAL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_name: str, content: str) -> str:
+        """(모델 이름, 원문 내용 해시) 캐시 키"""
+        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        return f"{model_name}:{content_hash}"
+
+    def get_many(self, model_name: str, contents: List[str]) -> List[Optional[np.ndarray]]:
+        """내용별 캐시된 임베딩 조회 (없으면 None)"""
+        keys = [self.make_key(model_name, content) for content in contents]
+        found: Dict[str, np.ndarray] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique_keys), self.QUERY_CHUNK):
+                chunk = unique_keys[start:start + self.QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM document_embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return [found.get(key) for key in keys]
+
+    def put_many(self, model_name: str, contents: List[str], vectors: List[np.ndarray]) -> None:
+        """내용별 임베딩 저장"""
+        now = time.time()
+        rows = [
+            (self.make_key(model_name, content), model_name, int(vector.shape[0]), vector.tobytes(), now)
+            for content, vector in zip(contents, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO document_embeddings VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """질의 임베딩 캐시를 적용한 임베딩 래퍼
+
+    embed_query/aembed_query와 여러 질의를 한 번에 임베딩하는 embed_queries/aembed_queries만 캐시를 거치고,
+    embed_documents는 원래 모델에 그대로 위임한다.
+    정규화 텍스트는 캐시 키에만 쓰고 임베딩은 원문으로 계산한다 (캐시 사용 여부와 관계없이 같은 벡터).
+    aembed_query는 메모리 계층만 이벤트 루프에서 조회하고, 디스크 조회는 실행기에서, 디스크 기록은
+    실행기에 넘겨 기다리지 않는다 (write-behind).
+    LangChain Embeddings 인터페이스를 그대로 따르므로 Chroma의 embedding_function 등에 원래 모델 대신 넘길 수 있다.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: Optional[QueryEmbeddingCache] = None):
+        """래퍼 초기화
+
+        Args:
+            embeddings: 원래 임베딩 모델 (OpenAIEmbeddings, HuggingFaceEmbeddings 등)
+            model_name: 캐시 키에 사용할 모델 이름
+            cache: 공유할 캐시 (기본값: 새 QueryEmbeddingCache)
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache or QueryEmbeddingCache()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.cache.make_key(self.model_name, normalize_text(text))
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+            self.cache.put(key, self.model_name, vector)
+        return vector.tolist()
+
+    def _lookup_many(self, texts: List[str]) -> Tuple[List[str], List[Optional[np.ndarray]]]:
+        """질의별 캐시 키와 캐시된 벡터 (없으면 None)"""
+        keys = [self.cache.make_key(self.model_name, normalize_text(text)) for text in texts]
+        return keys, [self.cache.get(key) for key in keys]
+
+    def _fill_misses(
+        self,
+        texts: List[str],
+        keys: List[str],
+        vectors: List[Optional[np.ndarray]],
+        embedded: List[List[float]]
+    ) -> List[List[float]]:
+        """배치 임베딩한 미스 결과를 캐시에 기록하고 입력 순서대로 결과 구성"""
+        missing = iter(embedded)
+        results = []
+        for text, key, vector in zip(texts, keys, vectors):
+            if vector is None:
+                vector = np.asarray(next(missing), dtype=np.float32)
+                self.cache.put(key, self.model_name, vector)
+            results.append(vector.tolist())
+        return results
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """여러 질의 임베딩 (캐시에 없는 질의만 embed_documents 한 번으로 배치 계산 후 캐시에 기록)"""
+        keys, vectors = self._lookup_many(texts)
+        misses = [text for text, vector in zip(texts, vectors) if vector is None]
+        embedded = self.embeddings.embed_documents(misses) if misses else []
+        return self._fill_misses(texts, keys, vectors, embedded)
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """여러 질의 임베딩 (비동기, 캐시 조회/기록은 실행기에서)"""
+        loop = asyncio.get_running_loop()
+        keys, vectors = await loop.run_in_executor(None, self._lookup_many, texts)
+        misses = [text for text, vector in zip(texts, vectors) if vector is None]
+        embedded = await self.embeddings.aembed_documents(misses) if misses else []
+        return await loop.run_in_executor(None, self._fill_misses, texts, keys, vectors, embedded)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self.cache.make_key(self.model_name, normalize_text(text))
+        vector = self.cache.get_memory(key)
+        if vector is not None:
+            return vector.tolist()
+        loop = asyncio.get_running_loop()
+        vector = await loop.run_in_executor(None, self.cache.get_disk, key)
+        if vector is None:
+            vector = np.asarray(await self.embeddings.aembed_query(text), dtype=np.float32)
+            self.cache.put_memory(key, vector)
+            loop.run_in_executor(None, self.cache.put_disk, key, self.model_name, vector)
+        return vector.tolist()
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """여러 질의를 배치 임베딩 (질의 임베딩 캐시 래퍼면 캐시를 거침)"""
+    if isinstance(embeddings, CachedQueryEmbeddings):
+        return embeddings.embed_queries(texts)
+    return embeddings.embed_documents(texts)
+
+
+async def aembed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """여러 질의를 배치 임베딩 (비동기, 질의 임베딩 캐시 래퍼면 캐시를 거침)"""
+    if isinstance(embeddings, CachedQueryEmbeddings):
+        return await embeddings.aembed_queries(texts)
+    return await embeddings.aembed_documents(texts)
+
+
+def with_query_cache(embeddings: Embeddings, model_name: str) -> Embeddings:
+    """EMBEDDING_CACHE_ENABLED 설정에 따라 질의 임베딩 캐시 래퍼 적용"""
+    if os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() != "true":
+        return embeddings
+    return CachedQueryEmbeddings(embeddings, model_name, _shared_cache())
+
+
+_cache: Optional[QueryEmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def _shared_cache() -> QueryEmbeddingCache:
+    """프로세스 전역 질의 임베딩 캐시 (sqlite 연결 하나를 공유)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QueryEmbeddingCache()
+    return _cache
@@ -0,0 +1,354 @@
+import copy
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.metrics import metrics
+from app.tools.rag_tools.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+VERSION_CHECK_INTERVAL = 5.0  # 코퍼스 버전 파일 확인 주기(초)
+INITIAL_MATRIX_ROWS = 64  # 유사도 행렬 초기 행 수 (가득 차면 두 배로 늘림)
+
+
+def read_corpus_version(version_path: str) -> str:
+    """코퍼스 버전 파일 읽기 (없으면 빈 문자열)"""
+    try:
+        with open(version_path, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
+
+
+def bump_corpus_version(version_path: str, version: Optional[str] = None) -> str:
+    """코퍼스 버전 갱신 (컬렉션 재구성/문서 적재 후 호출, version이 없으면 새로 생성)"""
+    version = version or uuid.uuid4().hex
+    os.makedirs(os.path.dirname(version_path), exist_ok=True)
+    tmp_path = f"{version_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(tmp_path, version_path)
+    return version
+
+
+class _Entry:
+    __slots__ = ("entry_id", "query", "embedding", "k", "doc_ids", "result", "created_at", "llm_seconds", "row")
+
+    def __init__(self, entry_id, query, embedding, k, doc_ids, result, created_at, llm_seconds):
+        self.row = -1  # 유사도 행렬의 행 번호
+        self.entry_id = entry_id
+        self.query = query
+        self.embedding = embedding
+        self.k = k
+        self.doc_ids = doc_ids
+        self.result = result
+        self.created_at = created_at
+        self.llm_seconds = llm_seconds
+
+
+class SemanticAnswerCache:
+    """의미 기반 답변 캐시
+
+    (질의 임베딩, 검색 문서 수 k, 검색된 문서 ID, 답변)을 저장하고, 같은 k로 저장된 항목 중
+    새 질의의 임베딩과 코사인 유사도가 임계값 이상인 항목이 있으면 LLM을 호출하지 않고
+    저장된 답변의 복사본을 반환한다.
+    - 메모리: LRU(OrderedDict) + TTL, 유사도 계산은 정규화된 float32 행렬 한 번의 행렬-벡터 곱
+      (행렬은 미리 할당해 두고 저장/제거 시 해당 행만 채우거나 비우므로 항목 수만큼 다시 쌓지 않음)
+    - 버전: lookup이 돌려준 코퍼스 버전을 store에 넘기며, 그 사이 버전이 바뀌었으면 저장하지 않음
+      (이전 코퍼스로 만든 답변이 무효화 뒤에 새 버전 항목으로 저장되지 않도록)
+    - 디스크: sqlite 파일에 영속화하여 재시작/다른 워커에서도 재사용
+      (쓰기는 메모리 락 안에서 순서대로 쌓아 두고 락을 놓은 뒤 반영하므로 조회가 디스크 I/O를 기다리지 않음)
+    - 무효화: 코퍼스 버전 파일이 바뀌면(문서 적재/재구성) 모든 항목 폐기
+    - 튜닝: 적중률, 절약한 LLM 시간, 적중 샘플(새 질의, 캐시된 질의, 유사도)을 stats()로 제공
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        version_path: str,
+        similarity_threshold: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        sample_rate: Optional[float] = None,
+        sample_size: int = 100
+    ):
+        """의미 기반 답변 캐시 초기화
+
+        Args:
+            db_path: 캐시 sqlite 파일 경로
+            version_path: 코퍼스 버전 파일 경로
+            similarity_threshold: 적중으로 판단할 최소 코사인 유사도 (기본값: SEMANTIC_CACHE_THRESHOLD 또는 0.95)
+            max_entries: 최대 항목 수 (기본값: SEMANTIC_CACHE_MAX_ENTRIES 또는 5000)
+            ttl_seconds: 항목 유효 시간(초) (기본값: SEMANTIC_CACHE_TTL_SECONDS 또는 86400)
+            sample_rate: 적중 샘플 기록 비율 (기본값: SEMANTIC_CACHE_SAMPLE_RATE 또는 0.05)
+            sample_size: 보관할 최대 적중 샘플 수
+        """
+        self.db_path = db_path
+        self.version_path = version_path
+        self.similarity_threshold = similarity_threshold or float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+        self.max_entries = max_entries or int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "86400"))
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv("SEMANTIC_CACHE_SAMPLE_RATE", "0.05"))
+
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._pending: Deque[Tuple[str, tuple]] = deque()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # 유사도 행렬: 행 i는 _row_ids[i] 항목의 임베딩, 빈 행은 k가 -1이라 조회에서 제외
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ks: Optional[np.ndarray] = None
+        self._row_ids: List[Optional[str]] = []
+        self._free_rows: List[int] = []
+        self._samples: Deque[Dict[str, Any]] = deque(maxlen=sample_size)
+        self._hits = 0
+        self._misses = 0
+        self._saved_llm_seconds = 0.0
+        self._invalidations = 0
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS semantic_cache ("
+            "id TEXT PRIMARY KEY, corpus_version TEXT, query TEXT, embedding BLOB, "
+            "doc_ids TEXT, result TEXT, created_at REAL, llm_seconds REAL, k INTEGER)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(semantic_cache)")}
+        if "k" not in columns:
+            # k 컬럼이 없던 이전 캐시 파일 (기존 항목은 k가 NULL이라 적재하지 않음)
+            self._conn.execute("ALTER TABLE semantic_cache ADD COLUMN k INTEGER")
+        self._conn.commit()
+
+        self._corpus_version = read_corpus_version(version_path)
+        self._version_mtime = self._stat_version()
+        self._version_checked_at = time.monotonic()
+        self._load()
+
+    def _stat_version(self) -> float:
+        try:
+            return os.stat(self.version_path).st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    def _load(self) -> None:
+        """디스크에서 현재 코퍼스 버전의 유효한 항목 적재"""
+        cutoff = time.time() - self.ttl_seconds
+        rows = self._conn.execute(
+            "SELECT id, query, embedding, k, doc_ids, result, created_at, llm_seconds FROM semantic_cache "
+            "WHERE corpus_version = ? AND created_at >= ? AND k IS NOT NULL ORDER BY created_at DESC LIMIT ?",
+            (self._corpus_version, cutoff, self.max_entries)
+        ).fetchall()
+        for entry_id, query, blob, k, doc_ids, result, created_at, llm_seconds in reversed(rows):
+            entry = _Entry(
+                entry_id, query, np.frombuffer(blob, dtype=np.float32), k,
+                json.loads(doc_ids), json.loads(result), created_at, llm_seconds
+            )
+            self._entries[entry_id] = entry
+            self._add_row_locked(entry)
+        if rows:
+            logger.info(f"의미 캐시 {len(rows)}개 항목을 로드했습니다: {self.db_path}")
+
+    def _check_corpus_version(self) -> None:
+        """코퍼스 버전 파일 변경 확인 (락을 잡은 상태에서 호출, 주기적으로만 stat)"""
+        now = time.monotonic()
+        if now - self._version_checked_at < VERSION_CHECK_INTERVAL:
+            return
+        self._version_checked_at = now
+        mtime = self._stat_version()
+        if mtime == self._version_mtime:
+            return
+        self._version_mtime = mtime
+        version = read_corpus_version(self.version_path)
+        if version != self._corpus_version:
+            logger.info("코퍼스 버전이 변경되어 의미 캐시를 비웁니다.")
+            self._invalidate_locked(version)
+
+    def _invalidate_locked(self, version: str) -> None:
+        self._corpus_version = version
+        self._entries.clear()
+        self._matrix = None
+        self._matrix_ks = None
+        self._row_ids = []
+        self._free_rows = []
+        self._invalidations += 1
+        self._pending.append(("DELETE FROM semantic_cache WHERE corpus_version != ?", (version,)))
+
+    def _flush(self) -> None:
+        """쌓인 sqlite 쓰기를 순서대로 반영 (메모리 락 밖에서 호출)"""
+        with self._db_lock:
+            if not self._pending:
+                return
+            try:
+                while self._pending:
+                    sql, params = self._pending.popleft()
+                    self._conn.execute(sql, params)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"의미 캐시 디스크 반영 중 오류 발생: {str(e)}")
+
+    def invalidate(self) -> None:
+        """코퍼스 버전 파일을 다시 읽어 캐시 무효화"""
+        with self._lock:
+            self._version_mtime = self._stat_version()
+            self._invalidate_locked(read_corpus_version(self.version_path))
+        self._flush()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _add_row_locked(self, entry: _Entry) -> None:
+        """항목 임베딩을 유사도 행렬의 빈 행에 기록 (빈 행이 없으면 행렬을 두 배로 늘림)"""
+        if self._matrix is None:
+            self._matrix = np.zeros((INITIAL_MATRIX_ROWS, entry.embedding.shape[0]), dtype=np.float32)
+            self._matrix_ks = np.full(INITIAL_MATRIX_ROWS, -1, dtype=np.int64)
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            row = len(self._row_ids)
+            self._row_ids.append(None)
+            if row >= self._matrix.shape[0]:
+                capacity = self._matrix.shape[0] * 2
+                matrix = np.zeros((capacity, self._matrix.shape[1]), dtype=np.float32)
+                matrix[:row] = self._matrix
+                ks = np.full(capacity, -1, dtype=np.int64)
+                ks[:row] = self._matrix_ks
+                self._matrix, self._matrix_ks = matrix, ks
+        self._matrix[row] = entry.embedding
+        self._matrix_ks[row] = entry.k
+        self._row_ids[row] = entry.entry_id
+        entry.row = row
+
+    def _clear_row_locked(self, entry: _Entry) -> None:
+        """항목의 행을 비우고 재사용 목록에 추가"""
+        self._matrix_ks[entry.row] = -1
+        self._row_ids[entry.row] = None
+        self._free_rows.append(entry.row)
+        entry.row = -1
+
+    def lookup(self, query: str, embedding: List[float], k: int) -> Tuple[Optional[Dict[str, Any]], str]:
+        """유사한 질의의 캐시된 답변 조회 (같은 k로 저장된 항목만)
+
+        Returns:
+            Tuple[Optional[Dict[str, Any]], str]: (캐시된 답변 또는 None, 조회 시점의 코퍼스 버전 - store에 그대로 전달)
+        """
+        vector = self._normalize(embedding)
+        try:
+            with self._lock:
+                return self._lookup_locked(query, vector, k), self._corpus_version
+        finally:
+            self._flush()
+
+    def _lookup_locked(self, query: str, vector: np.ndarray, k: int) -> Optional[Dict[str, Any]]:
+        self._check_corpus_version()
+        if not self._entries:
+            self._misses += 1
+            metrics.inc("rag_cache_misses_total", ("semantic",))
+            return None
+        used = len(self._row_ids)
+        similarities = self._matrix[:used] @ vector
+        # 빈 행(k=-1)과 k가 다른 항목(답변 근거 문서 수가 다름)은 제외
+        similarities = np.where(self._matrix_ks[:used] == k, similarities, -np.inf)
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+        entry_id = self._row_ids[best]
+        entry = self._entries.get(entry_id) if entry_id is not None else None
+        if entry is None or similarity < self.similarity_threshold:
+            self._misses += 1
+            metrics.inc("rag_cache_misses_total", ("semantic",))
+            return None
+        if time.time() - entry.created_at > self.ttl_seconds:
+            self._remove_locked(entry.entry_id)
+            self._misses += 1
+            metrics.inc("rag_cache_misses_total", ("semantic",))
+            return None
+        self._entries.move_to_end(entry.entry_id)
+        self._hits += 1
+        self._saved_llm_seconds += entry.llm_seconds
+        metrics.inc("rag_cache_hits_total", ("semantic",))
+        if random.random() < self.sample_rate:
+            self._samples.append({
+                "query": query,
+                "cached_query": entry.query,
+                "similarity": similarity,
+                "doc_ids": entry.doc_ids
+            })
+        # 호출자가 결과를 고쳐도 캐시된 답변이 바뀌지 않도록 복사본 반환
+        return copy.deepcopy(entry.result)
+
+    def store(
+        self,
+        query: str,
+        embedding: List[float],
+        doc_ids: List[str],
+        result: Dict[str, Any],
+        llm_seconds: float,
+        k: int,
+        corpus_version: str
+    ) -> None:
+        """답변을 캐시에 저장
+
+        Args:
+            k: 답변 생성에 사용한 검색 문서 수
+            corpus_version: lookup이 돌려준 코퍼스 버전 (그 사이 버전이 바뀌었으면 저장하지 않음)
+        """
+        vector = self._normalize(embedding)
+        result_json = json.dumps(result, ensure_ascii=False)
+        entry = _Entry(
+            uuid.uuid4().hex, query, vector, k, doc_ids, json.loads(result_json), time.time(), llm_seconds
+        )
+        with self._lock:
+            self._check_corpus_version()
+            if corpus_version != self._corpus_version:
+                logger.info("답변 생성 중 코퍼스 버전이 바뀌어 의미 캐시에 저장하지 않습니다.")
+                return
+            self._entries[entry.entry_id] = entry
+            self._add_row_locked(entry)
+            self._pending.append((
+                "INSERT OR REPLACE INTO semantic_cache "
+                "(id, corpus_version, query, embedding, doc_ids, result, created_at, llm_seconds, k) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.entry_id, self._corpus_version, query, vector.tobytes(),
+                    json.dumps(doc_ids, ensure_ascii=False), result_json,
+                    entry.created_at, llm_seconds, k
+                )
+            ))
+            while len(self._entries) > self.max_entries:
+                oldest_id = next(iter(self._entries))
+                self._remove_locked(oldest_id)
+        self._flush()
+
+    def _remove_locked(self, entry_id: str) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is not None:
+            self._clear_row_locked(entry)
+        self._pending.append(("DELETE FROM semantic_cache WHERE id = ?", (entry_id,)))
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 통계 및 적중 샘플 반환"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "similarity_threshold": self.similarity_threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "saved_llm_seconds": round(self._saved_llm_seconds, 3),
+                "invalidations": self._invalidations,
+                "corpus_version": self._corpus_version,
+                "hit_samples": list(self._samples)
+            }
@@ -0,0 +1,121 @@
+import os
+from typing import List, Optional
+
+import numpy as np
+from langchain.schema import Document
+
+from app.tools.rag_tools.splitters.context_block import get_content_hash, get_context_block, get_context_tokens
+
+
+class ContextPacker:
+    """토큰 예산 기반 컨텍스트 패커 (MMR 중복 제거)
+
+    검색 결과를 Maximal Marginal Relevance 순서로 고르면서
+    - 내용 해시가 같은 문서와, 이미 고른 문서와의 코사인 유사도가 duplicate_threshold 이상인 문서(거의 같은 FAQ)는 버리고
+    - 적재 시 계산해 둔 컨텍스트 블록 토큰 수로 예산(token_budget)을 넘는 문서는 건너뛰어 남은 예산을 다음 문서로 채운다.
+    첫 문서는 예산을 넘더라도 항상 포함한다 (컨텍스트가 비지 않도록).
+    유사도 계산에는 검색 시 함께 받은 문서 임베딩을 사용하므로 추가 임베딩 호출이 없다.
+    """
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        mmr_lambda: Optional[float] = None,
+        duplicate_threshold: Optional[float] = None
+    ):
+        """컨텍스트 패커 초기화
+
+        Args:
+            token_budget: 컨텍스트 최대 토큰 수 (기본값: CONTEXT_TOKEN_BUDGET 또는 1500)
+            mmr_lambda: 관련도 가중치 (1이면 관련도만, 0이면 다양성만) (기본값: CONTEXT_MMR_LAMBDA 또는 0.7)
+            duplicate_threshold: 중복으로 보고 버릴 문서 간 코사인 유사도 (기본값: CONTEXT_DUPLICATE_THRESHOLD 또는 0.95)
+        """
+        self.token_budget = token_budget or int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+        self.mmr_lambda = mmr_lambda if mmr_lambda is not None else float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))
+        self.duplicate_threshold = duplicate_threshold or float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.95"))
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    def pack(
+        self,
+        docs: List[Document],
+        query_embedding: List[float],
+        vectors: List[Optional[np.ndarray]]
+    ) -> List[Document]:
+        """문서를 MMR 순서로 골라 토큰 예산 안에서 반환
+
+        Args:
+            docs: 검색 순위 순서의 후보 문서
+            query_embedding: 질의 임베딩
+            vectors: 문서별 임베딩 (docs와 같은 순서, 없으면 None)
+
+        Returns:
+            List[Document]: 선택 순서대로의 문서 리스트
+        """
+        # 내용이 완전히 같은 문서와 컨텍스트 블록이 빈 문서 제거
+        candidates = []
+        seen_hashes = set()
+        for doc, vector in zip(docs, vectors):
+            content_hash = get_content_hash(doc)
+            if content_hash in seen_hashes or not get_context_block(doc):
+                continue
+            seen_hashes.add(content_hash)
+            candidates.append((doc, vector))
+        if not candidates:
+            return []
+
+        query = self._normalize(np.asarray(query_embedding, dtype=np.float32))
+        dim = query.shape[0]
+        has_vector = np.array([vector is not None for _, vector in candidates])
+        matrix = self._normalize(np.stack([
+            np.asarray(vector, dtype=np.float32) if vector is not None else np.zeros(dim, dtype=np.float32)
+            for _, vector in candidates
+        ]))
+        # 임베딩이 없는 문서는 검색 순위로 관련도를 대신하고 다른 문서와 겹치지 않는 것으로 취급
+        rank_relevance = 1.0 - np.arange(len(candidates)) / max(len(candidates), 1)
+        relevance = np.where(has_vector, matrix @ query, rank_relevance)
+        pairwise = matrix @ matrix.T
+
+        selected: List[int] = []
+        remaining = list(range(len(candidates)))
+        used_tokens = 0
+        max_similarity = np.full(len(candidates), -np.inf, dtype=np.float32)
+        while remaining:
+            redundancy = np.where(np.isfinite(max_similarity[remaining]), max_similarity[remaining], 0.0)
+            mmr = self.mmr_lambda * relevance[remaining] - (1.0 - self.mmr_lambda) * redundancy
+            best = remaining.pop(int(np.argmax(mmr)))
+            if selected and max_similarity[best] >= self.duplicate_threshold:
+                continue
+            tokens = get_context_tokens(candidates[best][0])
+            if selected and used_tokens + tokens > self.token_budget:
+                continue
+            selected.append(best)
+            used_tokens += tokens
+            if has_vector[best]:
+                max_similarity = np.maximum(max_similarity, np.where(has_vector, pairwise[best], -np.inf))
+        return [candidates[i][0] for i in selected]
+
+
+def test_context_packer():
+    """ContextPacker 테스트"""
+    from app.tools.rag_tools.splitters.context_block import attach_context_block
+
+    contents = [
+        "RE100은 기업이 사용하는 전력의 100%를 재생에너지로 충당하겠다는 자발적 캠페인입니다.",
+        "RE100은 기업이 사용하는 전력의 100%를 재생에너지로 충당하겠다는 자발적인 캠페인입니다.",
+        "REC는 신재생에너지 설비로 생산한 전력량을 증명하는 공급인증서입니다.",
+    ]
+    docs = [attach_context_block(Document(page_content=content)) for content in contents]
+    vectors = [np.array([1.0, 0.0, 0.1]), np.array([1.0, 0.0, 0.11]), np.array([0.6, 0.8, 0.0])]
+    packer = ContextPacker(token_budget=1000, mmr_lambda=0.7, duplicate_threshold=0.95)
+    packed = packer.pack(docs, [1.0, 0.1, 0.0], vectors)
+    print(f"선택된 문서 ({len(packed)}개): {[doc.page_content[:10] for doc in packed]}")
+    small = ContextPacker(token_budget=1, mmr_lambda=0.7, duplicate_threshold=0.95)
+    print(f"예산 1토큰: {len(small.pack(docs, [1.0, 0.1, 0.0], vectors))}개 (첫 문서는 항상 포함)")
+
+
+if __name__ == "__main__":
+    test_context_packer()
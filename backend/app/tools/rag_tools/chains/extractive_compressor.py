@@ -0,0 +1,127 @@
+import os
+import re
+from typing import List, Optional
+
+import numpy as np
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+
+from app.tools.rag_tools.splitters.context_block import CONTEXT_BLOCK_KEY, CONTEXT_TOKENS_KEY
+
+# 마침표/물음표/느낌표 뒤 공백 또는 줄바꿈에서 문장 분리 (숫자 속 '.'은 공백이 없어 나뉘지 않음)
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?。])\s+|\n+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """문장 단위로 분리 (빈 문장 제외)"""
+    return [sentence.strip() for sentence in _SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+
+
+class ExtractiveCompressor:
+    """임베딩 기반 추출형 컨텍스트 압축기
+
+    검색된 청크를 문장으로 나누고, 이미 로드된 임베딩 모델로 모든 문서의 문장을 한 번에 배치 임베딩해
+    질의 임베딩과의 코사인 유사도가 높은 문장부터 문서별 글자 수 예산(max_chars) 안에서 고른다.
+    고른 문장은 원래 순서대로 이어 붙이며, 문서마다 가장 관련 있는 문장 하나는 예산을 넘어도 남긴다.
+    이미 예산 안인 문서는 임베딩 없이 그대로 둔다.
+    (문서마다 LLM을 호출하던 LLMChainExtractor와 달리 CPU에서 배치 forward 한 번으로 끝난다)
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_chars: Optional[int] = None
+    ):
+        """추출형 압축기 초기화
+
+        Args:
+            embeddings: 문장/질의 임베딩 모델 (검색에 쓰는 모델과 같은 인스턴스)
+            max_chars: 문서별 최대 글자 수 (기본값: CONTEXT_COMPRESSION_MAX_CHARS 또는 400)
+        """
+        self.embeddings = embeddings
+        self.max_chars = max_chars or int(os.getenv("CONTEXT_COMPRESSION_MAX_CHARS", "400"))
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    def _select(self, sentences: List[str], scores: np.ndarray) -> str:
+        """점수 높은 문장부터 예산 안에서 고르고 원래 순서로 이어 붙임"""
+        selected = []
+        used = 0
+        for index in np.argsort(-scores):
+            length = len(sentences[index]) + (1 if selected else 0)
+            if selected and used + length > self.max_chars:
+                continue
+            selected.append(int(index))
+            used += length
+        return " ".join(sentences[index] for index in sorted(selected))
+
+    def compress_documents(self, documents: List[Document], query: str) -> List[Document]:
+        """질의와 관련된 문장만 남긴 문서 리스트 반환
+
+        Args:
+            documents: 검색된 문서 리스트
+            query: 검색 쿼리
+
+        Returns:
+            List[Document]: 압축된 문서 리스트 (순서 유지, 압축한 문서는 메타데이터 복사본에 원문 길이 기록)
+        """
+        spans = []
+        sentences: List[str] = []
+        for doc in documents:
+            doc_sentences = split_sentences(doc.page_content) if len(doc.page_content) > self.max_chars else []
+            spans.append((len(sentences), len(sentences) + len(doc_sentences)))
+            sentences.extend(doc_sentences)
+        if not sentences:
+            return list(documents)
+
+        query_vector = self._normalize(np.asarray(self.embeddings.embed_query(query), dtype=np.float32))
+        sentence_vectors = self._normalize(np.asarray(self.embeddings.embed_documents(sentences), dtype=np.float32))
+        scores = sentence_vectors @ query_vector
+
+        compressed = []
+        for doc, (start, end) in zip(documents, spans):
+            if start == end:
+                compressed.append(doc)
+                continue
+            metadata = {
+                key: value for key, value in doc.metadata.items()
+                if key not in (CONTEXT_BLOCK_KEY, CONTEXT_TOKENS_KEY)  # 원문 기준 값이므로 제거 (필요 시 즉시 계산)
+            }
+            metadata["original_length"] = len(doc.page_content)
+            compressed.append(Document(page_content=self._select(sentences[start:end], scores[start:end]), metadata=metadata))
+        return compressed
+
+
+def test_extractive_compressor():
+    """ExtractiveCompressor 테스트 (키워드 개수 기반 가짜 임베딩)"""
+    keywords = ["REC", "발급", "RE100", "캠페인"]
+
+    class FakeEmbeddings(Embeddings):
+        def __init__(self):
+            self.calls = 0
+
+        def embed_documents(self, texts):
+            self.calls += 1
+            return [[float(text.count(keyword)) + 0.01 for keyword in keywords] for text in texts]
+
+        def embed_query(self, text):
+            return self.embed_documents([text])[0]
+
+    content = (
+        "RE100은 기업이 사용하는 전력을 재생에너지로 충당하는 캠페인입니다. "
+        "REC는 설비 확인 후 발급됩니다. REC 발급 신청은 공급인증서 발급 및 거래시스템에서 합니다. "
+        "캠페인 참여 기업은 매년 이행 실적을 보고합니다."
+    )
+    fake = FakeEmbeddings()
+    compressor = ExtractiveCompressor(fake, max_chars=80)
+    docs = [Document(page_content=content, metadata={"article_id": 1}), Document(page_content="짧은 문서입니다.")]
+    compressed = compressor.compress_documents(docs, "REC 발급 방법")
+    print(f"압축 결과: {compressed[0].page_content} ({len(content)} → {len(compressed[0].page_content)}자)")
+    print(f"짧은 문서 유지: {compressed[1] is docs[1]}, 임베딩 호출 {fake.calls}회")
+
+
+if __name__ == "__main__":
+    test_extractive_compressor()
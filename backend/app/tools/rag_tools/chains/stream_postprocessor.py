@@ -0,0 +1,120 @@
+from typing import List
+
+REFERENCE_MARKER = '📋 참고 문서:'
+MARKDOWN_CHARS = '*`'
+MIN_LINE_LENGTH = 10
+
+
+class StreamingPostProcessor:
+    """RAGPipeline._post_process_response 규칙의 스트리밍(토큰 단위) 버전
+
+    LLM 토큰을 feed()로 넣으면 지금 내보내도 안전한 텍스트만 반환한다.
+    - 마크다운 기호(*, `) 제거
+    - 줄 앞뒤 공백 제거, 구두점 앞 공백 제거
+    - 빈 줄/연속 줄바꿈 제거 (남는 줄 사이에는 줄바꿈 하나만)
+    - 10자 이하의 짧은 줄은 줄이 끝날 때까지 보류했다가 버림
+    - '📋 참고 문서:' 이후 내용은 버림
+
+    전체 문자열 후처리와 달리 이미 내보낸 줄은 되돌릴 수 없으므로, 말줄임표('...')로 끝나는 줄은
+    줄 전체 대신 끝의 말줄임표만 제거한다.
+    """
+
+    def __init__(self):
+        self._hold = ""          # 참고 문서 마커 일부일 수 있어 보류 중인 원문
+        self._pending = ""       # 현재 줄에서 아직 내보내지 않은 정리된 텍스트
+        self._tail = ""          # 줄 끝 공백/마침표 (다음 글자가 와야 확정)
+        self._line_emitted = False
+        self._any_line_emitted = False
+        self._stopped = False
+        self._parts: List[str] = []
+
+    @property
+    def text(self) -> str:
+        """지금까지 내보낸 전체 텍스트"""
+        return "".join(self._parts)
+
+    def feed(self, token: str) -> str:
+        """토큰을 처리하고 바로 내보낼 수 있는 텍스트 반환"""
+        if self._stopped or not token:
+            return ""
+        out: List[str] = []
+        buffer = self._hold + token
+        marker_index = buffer.find(REFERENCE_MARKER)
+        if marker_index >= 0:
+            self._process(buffer[:marker_index], out)
+            self._end_line(out)
+            self._hold = ""
+            self._stopped = True
+        else:
+            keep = self._marker_prefix_length(buffer)
+            self._process(buffer[:len(buffer) - keep], out)
+            self._hold = buffer[len(buffer) - keep:]
+        return self._collect(out)
+
+    def flush(self) -> str:
+        """스트림 종료 시 보류 중인 텍스트 처리"""
+        out: List[str] = []
+        if not self._stopped:
+            self._process(self._hold, out)
+            self._hold = ""
+            self._end_line(out)
+            self._stopped = True
+        return self._collect(out)
+
+    def _collect(self, out: List[str]) -> str:
+        text = "".join(out)
+        if text:
+            self._parts.append(text)
+        return text
+
+    @staticmethod
+    def _marker_prefix_length(buffer: str) -> int:
+        """버퍼 끝이 참고 문서 마커의 앞부분과 겹치는 길이"""
+        for length in range(min(len(buffer), len(REFERENCE_MARKER) - 1), 0, -1):
+            if REFERENCE_MARKER.startswith(buffer[-length:]):
+                return length
+        return 0
+
+    def _process(self, text: str, out: List[str]) -> None:
+        for ch in text:
+            if ch == '\n':
+                self._end_line(out)
+            elif ch in MARKDOWN_CHARS:
+                continue
+            elif ch.isspace():
+                # 줄 앞 공백은 버리고, 줄 중간 공백은 다음 글자가 올 때까지 보류
+                if self._pending or self._line_emitted or self._tail:
+                    self._tail += ch
+            elif ch in '.!?':
+                # 구두점 앞 공백 제거, 마침표는 말줄임표 판별을 위해 보류
+                self._tail = self._tail.rstrip()
+                if ch == '.':
+                    self._tail += ch
+                else:
+                    self._commit(self._tail + ch, out)
+            else:
+                self._commit(self._tail + ch, out)
+
+    def _commit(self, text: str, out: List[str]) -> None:
+        self._tail = ""
+        self._pending += text
+        if self._line_emitted or len(self._pending) > MIN_LINE_LENGTH:
+            self._emit(out)
+
+    def _emit(self, out: List[str]) -> None:
+        if not self._line_emitted and self._any_line_emitted:
+            out.append('\n')
+        out.append(self._pending)
+        self._pending = ""
+        self._line_emitted = True
+        self._any_line_emitted = True
+
+    def _end_line(self, out: List[str]) -> None:
+        dots = self._tail.strip()
+        if dots and not dots.endswith('...'):
+            self._pending += dots
+        if self._pending and (self._line_emitted or len(self._pending) > MIN_LINE_LENGTH):
+            self._emit(out)
+        self._pending = ""
+        self._tail = ""
+        self._line_emitted = False
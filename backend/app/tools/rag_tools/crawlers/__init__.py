@@ -2,6 +2,13 @@
 크롤링 관련 모듈
 """
 
-from .knrec_faq_crawler import KnrecFAQLoader
+__all__ = ['KnrecFAQLoader']
 
-__all__ = ['KnrecFAQLoader'] 
\ No newline at end of file
+
+def __getattr__(name):
+    # Selenium은 크롤러를 실제로 사용할 때만 임포트
+    if name == 'KnrecFAQLoader':
+        from .knrec_faq_crawler import KnrecFAQLoader
+        globals()[name] = KnrecFAQLoader
+        return KnrecFAQLoader
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,8 @@
 from typing import List, Dict, Any
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_openai import OpenAIEmbeddings
+from app.tools.rag_tools.caches.embedding_cache import with_query_cache
+from app.tools.rag_tools.embeddings.onnx_embeddings import OnnxEmbeddings
 
 class EmbeddingModel:
     """임베딩 모델 클래스"""
@@ -16,7 +18,7 @@ class EmbeddingModel:
         
         Args:
             model_name: 모델 이름
-            model_type: 모델 타입 (huggingface 또는 openai)
+            model_type: 모델 타입 (huggingface, onnx 또는 openai)
             device: 실행 디바이스
             normalize_embeddings: 임베딩 정규화 여부
         """
@@ -31,6 +33,11 @@ class EmbeddingModel:
                 model_kwargs={'device': device},
                 encode_kwargs={'normalize_embeddings': normalize_embeddings}
             )
+        elif model_type == "onnx":
+            self.model = OnnxEmbeddings(
+                model_name=model_name,
+                normalize_embeddings=normalize_embeddings
+            )
         elif model_type == "openai":
             self.model = OpenAIEmbeddings(
                 model=model_name,
@@ -38,6 +45,10 @@ class EmbeddingModel:
             )
         else:
             raise ValueError(f"지원하지 않는 모델 타입입니다: {model_type}")
+        
+        # 질의 임베딩 캐시 (RAGPipeline과 같은 sqlite 파일을 공유)
+        cache_model_name = f"{model_name}#onnx-int8" if model_type == "onnx" and self.model.quantize else model_name
+        self.model = with_query_cache(self.model, cache_model_name)
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """문서 리스트를 임베딩
@@ -0,0 +1,178 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from app.core.metrics import metrics
+from app.tools.rag_tools.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class MicroBatchingEmbeddings(Embeddings):
+    """질의 임베딩 마이크로 배처
+
+    동시에 들어온 embed_query/aembed_query 호출을 백그라운드 스레드 하나가 모아
+    embed_documents 한 번(배치 forward 한 번)으로 계산한 뒤 호출자별 Future로 돌려준다.
+    - 첫 요청이 도착한 뒤 max_wait_ms 동안 또는 max_batch_size개가 찰 때까지 모은다.
+    - 배치 안의 같은 텍스트는 한 번만 계산한다.
+    - 부하가 없을 때 단일 요청의 추가 지연은 최대 max_wait_ms다.
+      (동시 요청이 적은 배포에서는 처리량 이득 없이 지연만 늘 수 있어 기본값은 꺼져 있다)
+    - close()로 백그라운드 스레드를 멈추며, 이후 요청과 남은 요청은 RuntimeError로 끝난다.
+    embed_documents(문서 적재, 배치 검색)는 이미 배치이므로 원래 모델에 그대로 위임한다.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None
+    ):
+        """마이크로 배처 초기화
+
+        Args:
+            embeddings: 원래 임베딩 모델 (HuggingFaceEmbeddings, OnnxEmbeddings 등)
+            max_batch_size: 배치 최대 크기 (기본값: EMBEDDING_BATCH_MAX_SIZE 또는 32)
+            max_wait_ms: 첫 요청 이후 배치를 모으는 최대 대기 시간 (기본값: EMBEDDING_BATCH_MAX_WAIT_MS 또는 3)
+        """
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size or int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+        self.max_wait_ms = max_wait_ms if max_wait_ms is not None else float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "3"))
+        self._queue: "queue.Queue[Tuple[Optional[str], Optional[Future]]]" = queue.Queue()
+        self._closed = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        """첫 요청을 기다린 뒤 대기 시간/최대 크기 안에서 요청을 모음"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # 대기 시간이 끝난 뒤에도 이미 쌓여 있는 요청은 같은 배치에 포함
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        """배치 수집 → 임베딩 → 결과 분배 루프 (close() 후 종료)"""
+        while not self._closed.is_set():
+            # close()가 넣은 깨우기 신호와 호출자가 취소한(비동기 태스크 취소 등) 요청은 제외
+            batch = [
+                (text, future) for text, future in self._collect()
+                if future is not None and future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = dict(zip(texts, self.embeddings.embed_documents(texts)))
+            except Exception as e:
+                logger.error(f"배치 임베딩 중 오류 발생: {str(e)}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            metrics.inc("embedding_batches_total")
+            metrics.inc("embedding_batched_queries_total", value=len(batch))
+            for text, future in batch:
+                future.set_result(vectors[text])
+        self._fail_pending()
+
+    def _fail_pending(self) -> None:
+        """종료 후 큐에 남은 요청을 RuntimeError로 끝냄"""
+        while True:
+            try:
+                _, future = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if future is not None and future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError("임베딩 마이크로 배처가 종료되었습니다."))
+
+    def close(self) -> None:
+        """백그라운드 스레드 중지 (진행 중인 배치는 끝까지 계산)"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._queue.put((None, None))  # 첫 요청을 기다리는 스레드를 깨움
+
+    def submit(self, text: str) -> Future:
+        """질의 임베딩 요청을 큐에 넣고 Future 반환"""
+        if self._closed.is_set():
+            raise RuntimeError("임베딩 마이크로 배처가 종료되었습니다.")
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.submit(text).result()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        # 실행기 스레드를 점유하지 않고 이벤트 루프에서 결과를 기다림
+        return await asyncio.wrap_future(self.submit(text))
+
+
+def with_micro_batching(embeddings: Embeddings) -> Embeddings:
+    """EMBEDDING_MICRO_BATCHING=true일 때만 마이크로 배처 적용 (기본값: 사용 안 함)"""
+    if os.getenv("EMBEDDING_MICRO_BATCHING", "false").lower() != "true":
+        return embeddings
+    return MicroBatchingEmbeddings(embeddings)
+
+
+def test_micro_batching():
+    """MicroBatchingEmbeddings 테스트 (동시 요청이 한 배치로 묶이는지 확인)"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    class FakeEmbeddings(Embeddings):
+        def __init__(self):
+            self.batch_sizes = []
+
+        def embed_documents(self, texts):
+            self.batch_sizes.append(len(texts))
+            time.sleep(0.01)
+            return [[float(len(text)), 1.0] for text in texts]
+
+        def embed_query(self, text):
+            return self.embed_documents([text])[0]
+
+    fake = FakeEmbeddings()
+    batcher = MicroBatchingEmbeddings(fake, max_batch_size=16, max_wait_ms=5)
+    texts = [f"질문 {i}" * (i % 3 + 1) for i in range(64)]
+    with ThreadPoolExecutor(max_workers=64) as executor:
+        results = list(executor.map(batcher.embed_query, texts))
+    assert results == [[float(len(text)), 1.0] for text in texts]
+    print(f"요청 {len(texts)}개 → 배치 {len(fake.batch_sizes)}회, 배치 크기 {fake.batch_sizes}")
+
+    async def concurrent_async():
+        return await asyncio.gather(*(batcher.aembed_query(text) for text in texts))
+
+    fake.batch_sizes.clear()
+    asyncio.run(concurrent_async())
+    print(f"비동기 요청 {len(texts)}개 → 배치 {len(fake.batch_sizes)}회")
+
+    batcher.close()
+    batcher._worker.join(timeout=1)
+    print(f"close() 후 스레드 종료: {not batcher._worker.is_alive()}")
+
+
+if __name__ == "__main__":
+    test_micro_batching()
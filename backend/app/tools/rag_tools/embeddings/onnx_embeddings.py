@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.tools.rag_tools.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# backend/data/models/onnx
+DEFAULT_MODEL_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))),
+    "data", "models", "onnx"
+)
+ONNX_OPSET = 14
+DEFAULT_MAX_LENGTH = 128  # sentence_bert_config.json이 없을 때의 최대 토큰 수
+
+
+def _read_hub_json(model_name: str, filename: str) -> Optional[dict]:
+    """허브(로컬 캐시 포함)의 sentence-transformers 설정 파일 (없으면 None)"""
+    try:
+        from huggingface_hub import hf_hub_download
+        with open(hf_hub_download(model_name, filename), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def export_onnx(model_name: str, output_path: str) -> None:
+    """Transformer 인코더를 ONNX로 내보내기 (출력: last_hidden_state, 배치/길이 동적 축)"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    class _Encoder(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids=None):
+            return self.model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids
+            ).last_hidden_state
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+    sample = tokenizer(["ONNX 변환용 예시 문장입니다."], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            _Encoder(model),
+            tuple(sample[name] for name in input_names),
+            tmp_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET
+        )
+    os.replace(tmp_path, output_path)
+    logger.info(f"ONNX 모델을 내보냈습니다: {output_path}")
+
+
+def quantize_onnx(input_path: str, output_path: str) -> None:
+    """가중치 int8 동적 양자화 (활성값은 실행 시 양자화)"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    quantize_dynamic(input_path, tmp_path, weight_type=QuantType.QInt8)
+    os.replace(tmp_path, output_path)
+    logger.info(f"int8 동적 양자화 모델을 생성했습니다: {output_path}")
+
+
+class OnnxEmbeddings(Embeddings):
+    """ONNX Runtime CPU 임베딩 모델 (HuggingFaceEmbeddings 대체)
+
+    sentence-transformers 모델의 Transformer 인코더를 처음 사용할 때 ONNX로 내보내고(선택적으로 int8 동적 양자화),
+    이후에는 {model_dir}/{모델 이름}/ 아래 파일을 재사용한다.
+    풀링(mean/cls)과 최대 토큰 수는 모델의 sentence-transformers 설정을 따르므로 PyTorch 경로와 같은 벡터 공간을 만든다.
+    배치는 길이순으로 정렬해 패딩을 줄인 뒤 원래 순서로 되돌린다.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        quantize: Optional[bool] = None,
+        intra_op_threads: Optional[int] = None,
+        model_dir: Optional[str] = None,
+        batch_size: int = 32,
+        normalize_embeddings: bool = True
+    ):
+        """ONNX 임베딩 모델 초기화
+
+        Args:
+            model_name: HuggingFace 모델 이름
+            quantize: int8 동적 양자화 모델 사용 여부 (기본값: ONNX_EMBEDDING_QUANTIZE 또는 True)
+            intra_op_threads: 연산자 내부 스레드 수, 0이면 ONNX Runtime 기본값 (기본값: ONNX_INTRA_OP_THREADS 또는 0)
+            model_dir: ONNX 파일 디렉토리 (기본값: ONNX_MODEL_DIR 또는 backend/data/models/onnx)
+            batch_size: 한 번에 실행할 최대 문장 수
+            normalize_embeddings: L2 정규화 여부
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        if quantize is None:
+            quantize = os.getenv("ONNX_EMBEDDING_QUANTIZE", "true").lower() == "true"
+        self.quantize = quantize
+        self.intra_op_threads = (
+            intra_op_threads if intra_op_threads is not None else int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+        )
+        self.model_dir = os.path.join(model_dir or os.getenv("ONNX_MODEL_DIR", DEFAULT_MODEL_DIR), model_name.replace("/", "__"))
+        self.batch_size = batch_size
+        self.normalize_embeddings = normalize_embeddings
+
+        st_config = _read_hub_json(model_name, "sentence_bert_config.json") or {}
+        pooling_config = _read_hub_json(model_name, "1_Pooling/config.json") or {}
+        self.max_length = int(st_config.get("max_seq_length", DEFAULT_MAX_LENGTH))
+        self.pooling = "cls" if pooling_config.get("pooling_mode_cls_token") else "mean"
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        # fast tokenizer는 동시 호출 시 패딩/절단 설정이 충돌하므로 토큰화만 직렬화 (세션 실행은 스레드 안전)
+        self._tokenizer_lock = threading.Lock()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(self._ensure_model(), options, providers=["CPUExecutionProvider"])
+        self._input_names = [i.name for i in self.session.get_inputs()]
+        logger.info(
+            f"ONNX 임베딩 모델을 로드했습니다: {model_name} "
+            f"(int8={self.quantize}, threads={self.intra_op_threads or 'auto'}, pooling={self.pooling}, max_length={self.max_length})"
+        )
+
+    @property
+    def model_path(self) -> str:
+        filename = "model.int8.onnx" if self.quantize else "model.onnx"
+        return os.path.join(self.model_dir, filename)
+
+    def _ensure_model(self) -> str:
+        """ONNX 파일이 없으면 내보내기/양자화 후 경로 반환"""
+        fp32_path = os.path.join(self.model_dir, "model.onnx")
+        if not os.path.exists(self.model_path):
+            os.makedirs(self.model_dir, exist_ok=True)
+            if not os.path.exists(fp32_path):
+                export_onnx(self.model_name, fp32_path)
+            if self.quantize:
+                quantize_onnx(fp32_path, self.model_path)
+        return self.model_path
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """한 배치 임베딩 (풀링 + 정규화)"""
+        with self._tokenizer_lock:
+            encoded = self.tokenizer(
+                texts,
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np"
+            )
+        feeds = {name: encoded[name].astype(np.int64) for name in self._input_names if name in encoded}
+        if "token_type_ids" in self._input_names and "token_type_ids" not in feeds:
+            feeds["token_type_ids"] = np.zeros_like(feeds["input_ids"])
+        hidden = self.session.run(None, feeds)[0]
+        if self.pooling == "cls":
+            vectors = hidden[:, 0]
+        else:
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            vectors = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.clip(norms, 1e-12, None)
+        return vectors.astype(np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vector in zip(batch, self._encode([texts[i] for i in batch])):
+                vectors[i] = vector
+        return np.stack(vectors).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+
+def test_onnx_embeddings():
+    """OnnxEmbeddings 테스트 (PyTorch 경로와 코사인 비교)"""
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    model_name = "snunlp/KR-SBERT-V40K-klueNLI-augSTS"
+    texts = ["RE100이란 무엇인가요?", "REC 발급 절차를 알려주세요.", "태양광 탄소검증제"]
+    reference = np.asarray(HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True}
+    ).embed_documents(texts))
+    for quantize in (False, True):
+        vectors = np.asarray(OnnxEmbeddings(model_name, quantize=quantize).embed_documents(texts))
+        print(f"int8={quantize}: 코사인 일치도 {np.round((vectors * reference).sum(axis=1), 4).tolist()}")
+
+
+if __name__ == "__main__":
+    test_onnx_embeddings()
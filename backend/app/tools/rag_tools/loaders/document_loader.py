@@ -1,55 +1,60 @@
-from typing import List, Dict, Any
-from langchain_community.document_loaders import (
-    TextLoader,
-    JSONLoader,
-    UnstructuredMarkdownLoader,
-    UnstructuredHTMLLoader,
-    UnstructuredWordDocumentLoader,
-    UnstructuredExcelLoader,
-    UnstructuredPowerPointLoader,
-    UnstructuredCSVLoader,
-    UnstructuredRTFLoader,
-    UnstructuredEPubLoader,
-    UnstructuredEmailLoader,
-    UnstructuredImageLoader,
-    UnstructuredURLLoader,
-    UnstructuredFileLoader,
-    PyPDFLoader
-)
+from typing import List, Dict, Any, Tuple
 from langchain.schema import Document
 from app.tools.rag_tools.utils.logger import get_logger
+import importlib
 import os
 import glob
 
 logger = get_logger(__name__)
 
+# 확장자 → (모듈, 로더 클래스 이름)
+# Unstructured 계열 로더는 임포트 비용이 크므로 해당 확장자 파일을 처음 로드할 때 임포트한다.
+LOADER_SPECS: Dict[str, Tuple[str, str]] = {
+    'txt': ('langchain_community.document_loaders.text', 'TextLoader'),
+    'json': ('langchain_community.document_loaders.json_loader', 'JSONLoader'),
+    'md': ('langchain_community.document_loaders.markdown', 'UnstructuredMarkdownLoader'),
+    'html': ('langchain_community.document_loaders.html', 'UnstructuredHTMLLoader'),
+    'doc': ('langchain_community.document_loaders.word_document', 'UnstructuredWordDocumentLoader'),
+    'docx': ('langchain_community.document_loaders.word_document', 'UnstructuredWordDocumentLoader'),
+    'xls': ('langchain_community.document_loaders.excel', 'UnstructuredExcelLoader'),
+    'xlsx': ('langchain_community.document_loaders.excel', 'UnstructuredExcelLoader'),
+    'ppt': ('langchain_community.document_loaders.powerpoint', 'UnstructuredPowerPointLoader'),
+    'pptx': ('langchain_community.document_loaders.powerpoint', 'UnstructuredPowerPointLoader'),
+    'csv': ('langchain_community.document_loaders.csv_loader', 'UnstructuredCSVLoader'),
+    'rtf': ('langchain_community.document_loaders.rtf', 'UnstructuredRTFLoader'),
+    'epub': ('langchain_community.document_loaders.epub', 'UnstructuredEPubLoader'),
+    'eml': ('langchain_community.document_loaders.email', 'UnstructuredEmailLoader'),
+    'jpg': ('langchain_community.document_loaders.image', 'UnstructuredImageLoader'),
+    'jpeg': ('langchain_community.document_loaders.image', 'UnstructuredImageLoader'),
+    'png': ('langchain_community.document_loaders.image', 'UnstructuredImageLoader'),
+    'pdf': ('langchain_community.document_loaders.pdf', 'PyPDFLoader'),
+    'url': ('langchain_community.document_loaders.url', 'UnstructuredURLLoader'),
+    'default': ('langchain_community.document_loaders.unstructured', 'UnstructuredFileLoader')
+}
+
 class DocumentLoader:
     """문서 로더 클래스"""
     
     def __init__(self):
-        """문서 로더 초기화"""
-        self.loaders = {
-            'txt': TextLoader,
-            'json': JSONLoader,
-            'md': UnstructuredMarkdownLoader,
-            'html': UnstructuredHTMLLoader,
-            'doc': UnstructuredWordDocumentLoader,
-            'docx': UnstructuredWordDocumentLoader,
-            'xls': UnstructuredExcelLoader,
-            'xlsx': UnstructuredExcelLoader,
-            'ppt': UnstructuredPowerPointLoader,
-            'pptx': UnstructuredPowerPointLoader,
-            'csv': UnstructuredCSVLoader,
-            'rtf': UnstructuredRTFLoader,
-            'epub': UnstructuredEPubLoader,
-            'eml': UnstructuredEmailLoader,
-            'jpg': UnstructuredImageLoader,
-            'jpeg': UnstructuredImageLoader,
-            'png': UnstructuredImageLoader,
-            'pdf': PyPDFLoader,
-            'url': UnstructuredURLLoader,
-            'default': UnstructuredFileLoader
-        }
+        """문서 로더 초기화 (로더 클래스는 확장자별로 처음 사용할 때 임포트)"""
+        self.loaders: Dict[str, Any] = {}
+    
+    def get_loader_class(self, file_ext: str):
+        """확장자에 맞는 로더 클래스 반환 (처음 요청 시 임포트 후 캐시)
+        
+        Args:
+            file_ext: 파일 확장자 (점 제외, 소문자)
+            
+        Returns:
+            LangChain 문서 로더 클래스 (모르는 확장자는 UnstructuredFileLoader)
+        """
+        key = file_ext if file_ext in LOADER_SPECS else 'default'
+        loader_class = self.loaders.get(key)
+        if loader_class is None:
+            module_name, class_name = LOADER_SPECS[key]
+            loader_class = getattr(importlib.import_module(module_name), class_name)
+            self.loaders[key] = loader_class
+        return loader_class
     
     def load_documents(self, data: List[Dict[str, Any]]) -> List[Document]:
         """문서 로드
@@ -129,7 +134,7 @@ class DocumentLoader:
                     file_ext = os.path.splitext(file_path)[1].lower().lstrip('.')
                     
                     # 적절한 로더 선택
-                    loader_class = self.loaders.get(file_ext, self.loaders['default'])
+                    loader_class = self.get_loader_class(file_ext)
                     
                     # 로더 인스턴스 생성 및 로드
                     if file_ext == 'json':
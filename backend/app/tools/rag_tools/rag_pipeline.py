@@ -1,5 +1,12 @@
+import asyncio
+import contextvars
 import os
-from typing import List, Dict, Any, Optional
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+import numpy as np
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain.schema import Document
@@ -8,15 +15,54 @@ from langchain_community.vectorstores import Chroma
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema.runnable import RunnablePassthrough
 from langchain.schema.output_parser import StrOutputParser
+from app.core.metrics import metrics, record_token_usage, stage_timer
+from app.tools.rag_tools.caches.embedding_cache import DocumentEmbeddingCache, aembed_queries, embed_queries, with_query_cache
+from app.tools.rag_tools.caches.semantic_cache import SemanticAnswerCache, bump_corpus_version, read_corpus_version
+from app.tools.rag_tools.chains.context_packer import ContextPacker
+from app.tools.rag_tools.chains.stream_postprocessor import StreamingPostProcessor
+from app.tools.rag_tools.embeddings.micro_batcher import MicroBatchingEmbeddings, with_micro_batching
+from app.tools.rag_tools.embeddings.onnx_embeddings import OnnxEmbeddings
 from app.tools.rag_tools.loaders.document_loader import DocumentLoader
+from app.tools.rag_tools.retrievers.fusion import RRF_K, reciprocal_rank_fusion
+from app.tools.rag_tools.retrievers.sparse_index import BM25Index
+from app.tools.rag_tools.splitters.context_block import attach_context_block, get_content_hash, get_context_block, public_metadata
 from app.tools.rag_tools.splitters.text_splitter import TextSplitter
 from app.tools.rag_tools.utils.logger import get_logger
+from app.tools.rag_tools.utils.singleflight import SingleFlight, make_query_key
+from app.tools.rag_tools.vectorstores.hnsw_config import collection_space, distance_to_similarity, hnsw_metadata, vector_distance
+from app.tools.rag_tools.vectorstores.index_versions import IndexVersionManager
+from app.tools.rag_tools.vectorstores.numpy_store import NumpyVectorStore
 
 # 환경 변수 로드
 load_dotenv()
 
 logger = get_logger(__name__)
 
+SIMILARITY_THRESHOLD = 0.3  # 답변 생성에 사용할 최소 유사도
+
+# backend/data 디렉토리 (벡터 저장소, 캐시)
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "data")
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+
+CHROMA_ADD_BATCH_SIZE = 1000  # Chroma 컬렉션에 한 번에 추가할 최대 문서 수
+HYBRID_CANDIDATE_MULTIPLIER = 4  # 하이브리드 검색 시 검색기별로 가져올 후보 수 (k의 배수)
+
+class _ActiveIndex:
+    """한 검색 호출이 사용하는 인덱스 참조 묶음 (호출 시작 시 한 번 읽어 끝까지 사용)"""
+    __slots__ = ("vectorstore", "search_index", "sparse_index")
+    
+    def __init__(self, vectorstore, search_index, sparse_index):
+        self.vectorstore = vectorstore
+        self.search_index = search_index
+        self.sparse_index = sparse_index
+    
+    @property
+    def distance_space(self) -> str:
+        """검색 결과 거리의 종류 (NumPy 인덱스는 항상 제곱 L2, Chroma는 컬렉션의 hnsw:space)"""
+        if self.search_index is not None:
+            return "l2"
+        return collection_space(self.vectorstore._collection)
+
 class RAGPipeline:
     """RAG(Retrieval-Augmented Generation) 파이프라인"""
     
@@ -27,7 +73,9 @@ class RAGPipeline:
         backup_embedding_model: str = "snunlp/KR-SBERT-V40K-klueNLI-augSTS",
         persist_directory: str = "./app/tools/rag_tools/vectorstores/data",
         collection_name: str = "knrec_faq",
-        embedding_type: str = "auto"  # 추가: 'openai', 'huggingface', 'auto'
+        embedding_type: str = "auto",  # 추가: 'openai', 'huggingface', 'onnx', 'auto'
+        vector_backend: Optional[str] = None,
+        hnsw_params: Optional[Dict[str, Any]] = None
     ):
         """RAG 파이프라인 초기화
         
@@ -37,7 +85,9 @@ class RAGPipeline:
             backup_embedding_model: 백업 임베딩 모델 (HuggingFace)
             persist_directory: 벡터 저장소 디렉토리
             collection_name: 컬렉션 이름
-            embedding_type: 'openai', 'huggingface', 'auto'
+            embedding_type: 'openai', 'huggingface', 'onnx'(백업 모델을 ONNX Runtime으로 실행), 'auto'
+            vector_backend: 검색 백엔드 'chroma' 또는 'numpy' (기본값: RAG_VECTOR_BACKEND 또는 'chroma')
+            hnsw_params: 새 컬렉션의 HNSW 파라미터 (space, M, construction_ef, search_ef, 기본값: CHROMA_HNSW_* 환경 변수)
         """
         self.model_name = model_name
         self.primary_embedding_model = primary_embedding_model
@@ -45,6 +95,10 @@ class RAGPipeline:
         self.persist_directory = persist_directory
         self.collection_name = collection_name
         self.embedding_type = embedding_type
+        self.vector_backend = vector_backend or os.getenv("RAG_VECTOR_BACKEND", "chroma")
+        self.collection_metadata = hnsw_metadata(**(hnsw_params or {}))
+        self.embedding_runtime = None  # 로컬 임베딩 실행 방식 ('torch', 'onnx', 'onnx-int8', OpenAI는 None)
+        self.micro_batcher: Optional[MicroBatchingEmbeddings] = None  # 질의 임베딩 마이크로 배처 (로컬 임베딩만, 사용 안 하면 None)
         
         # LLM 초기화
         self.llm = ChatOpenAI(
@@ -53,11 +107,36 @@ class RAGPipeline:
         )
         
         # 임베딩 모델 초기화 (embedding_type에 따라 강제 지정)
-        self.embeddings = self._initialize_embeddings()
+        # 질의 임베딩은 (모델, 정규화 텍스트) 키로 메모리 LRU + 워커 공유 sqlite에 캐시
+        self.embeddings = with_query_cache(self._initialize_embeddings(), self.embedding_model_name)
+        
+        # 블루/그린 인덱스 버전 (CURRENT 포인터가 가리키는 버전 디렉토리, 포인터가 없으면 루트 디렉토리 그대로 사용)
+        self.index_root = self.persist_directory
+        self.index_versions = IndexVersionManager(self.index_root)
+        self.index_version = self.index_versions.current()
+        self.persist_directory = self.index_versions.active_directory()
+        self._index_lock = threading.Lock()
         
         # 벡터 저장소 초기화 (Chroma 사용)
         self.vectorstore = self._initialize_vectorstore()
         
+        # 검색 인덱스 ('numpy' 백엔드: Chroma 컬렉션의 memmap 스냅샷에서 정확 검색, 'chroma': None)
+        self.search_index = self._initialize_search_index()
+        
+        # 하이브리드 검색용 BM25 색인 (RAG_HYBRID_SEARCH=true일 때만 생성, 기본은 None으로 벡터 검색만 사용)
+        self.sparse_index = self._initialize_sparse_index()
+        
+        # 답변 생성용 컨텍스트 패커 (토큰 예산 안에서 MMR로 근접 중복 문서 제거)
+        self.context_packer = ContextPacker()
+        
+        # 의미 기반 답변 캐시 (문서 적재/재구성 시 코퍼스 버전으로 무효화)
+        self.semantic_cache = None
+        if os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true":
+            self.semantic_cache = SemanticAnswerCache(
+                db_path=os.path.join(CACHE_DIR, f"semantic_cache_{self.embedding_provider}_{self.collection_name}.sqlite3"),
+                version_path=self.corpus_version_path
+            )
+        
         # 문서 로더 초기화
         self.document_loader = DocumentLoader()
         
@@ -88,43 +167,50 @@ class RAGPipeline:
 """)
         
         # RAG 체인 설정
-        self.chain = (
-            {"context": self.vectorstore.as_retriever(), "question": RunnablePassthrough()}
-            | self.prompt_template
-            | self.llm
-            | StrOutputParser()
-        )
+        self.chain = self._build_chain()
         
         # 텍스트 분할기 초기화
         self.text_splitter = TextSplitter(
             chunk_size=500,  # 더 작은 청크 크기로 문장 중간 절단 방지
             chunk_overlap=100  # 적절한 중복 유지
         )
+        
+        # 비동기 경로에서 CPU 바운드 작업(KR-SBERT 임베딩, Chroma 검색)을 처리할 전용 실행기
+        self.cpu_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("RAG_CPU_WORKERS", "4")),
+            thread_name_prefix="rag-cpu"
+        )
+        
+        # 동시에 들어온 동일 질의(정규화 텍스트 + 히스토리)는 한 번만 계산하고 결과 공유
+        self.singleflight = SingleFlight("query_singleflight")
+        
+        # 다른 프로세스가 재구축한 인덱스 버전을 재시작 없이 반영하는 감시 스레드 (close()로 중지)
+        self._closed = threading.Event()
+        self._start_index_watcher()
     
     def _initialize_embeddings(self):
         """임베딩 모델 초기화 (embedding_type에 따라 강제 지정)"""
-        base_data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "data", "vectorstores")
+        base_data_dir = os.path.join(DATA_DIR, "vectorstores")
         if self.embedding_type == "openai":
             logger.info("OpenAI 임베딩 모델을 강제 사용합니다.")
             self.persist_directory = os.path.join(base_data_dir, "openai")
+            self.embedding_provider = "openai"
             return OpenAIEmbeddings(
                 model=self.primary_embedding_model,
                 openai_api_key=os.getenv("OPENAI_API_KEY")
             )
-        elif self.embedding_type == "huggingface":
+        elif self.embedding_type in ("huggingface", "onnx"):
             logger.info("HuggingFace 임베딩 모델을 강제 사용합니다.")
             self.persist_directory = os.path.join(base_data_dir, "huggingface")
-            return HuggingFaceEmbeddings(
-                model_name=self.backup_embedding_model,
-                model_kwargs={'device': 'cpu'},
-                encode_kwargs={'normalize_embeddings': True}
-            )
+            self.embedding_provider = "huggingface"
+            return self._initialize_local_embeddings()
         else:
             # 기존 auto fallback 로직
             try:
                 if os.getenv("OPENAI_API_KEY"):
                     logger.info("OpenAI 임베딩 모델을 사용합니다.")
                     self.persist_directory = os.path.join(base_data_dir, "openai")
+                    self.embedding_provider = "openai"
                     return OpenAIEmbeddings(
                         model=self.primary_embedding_model,
                         openai_api_key=os.getenv("OPENAI_API_KEY")
@@ -136,59 +222,350 @@ class RAGPipeline:
                 logger.warning(f"OpenAI 임베딩 모델 초기화 실패: {str(e)}")
                 logger.info("백업 임베딩 모델을 사용합니다.")
                 self.persist_directory = os.path.join(base_data_dir, "huggingface")
-                return HuggingFaceEmbeddings(
-                    model_name=self.backup_embedding_model,
-                    model_kwargs={'device': 'cpu'},
-                    encode_kwargs={'normalize_embeddings': True}
-                )
+                self.embedding_provider = "huggingface"
+                return self._initialize_local_embeddings()
     
-    def _initialize_vectorstore(self):
-        """Chroma 벡터 저장소 초기화"""
-        try:
-            # 기존 Chroma 컬렉션이 있는지 확인
-            if os.path.exists(self.persist_directory):
-                logger.info(f"기존 Chroma 컬렉션을 로드합니다: {self.persist_directory}")
-                return Chroma(
-                    persist_directory=self.persist_directory,
-                    embedding_function=self.embeddings,
-                    collection_name=self.collection_name
-                )
-            else:
-                logger.info(f"새로운 Chroma 컬렉션을 생성합니다: {self.persist_directory}")
-                # 빈 Chroma 컬렉션 생성
-                return Chroma.from_texts(["초기화"], self.embeddings, persist_directory=self.persist_directory, collection_name=self.collection_name)
-        except Exception as e:
-            logger.warning(f"Chroma 컬렉션 로드 실패, 새로 생성합니다: {str(e)}")
-            return Chroma.from_texts(["초기화"], self.embeddings, persist_directory=self.persist_directory, collection_name=self.collection_name)
+    def _initialize_local_embeddings(self):
+        """백업(KR-SBERT) 임베딩 모델 초기화
+        
+        embedding_type='onnx'이거나 LOCAL_EMBEDDING_RUNTIME=onnx이면 ONNX Runtime(기본 int8 양자화)으로,
+        그 외에는 PyTorch(sentence-transformers)로 실행한다. 두 경로는 같은 벡터 공간이므로 같은 컬렉션을 사용한다.
+        EMBEDDING_MICRO_BATCHING=true이면 동시 질의 임베딩을 마이크로 배처로 모아 배치 forward 한 번으로 계산한다.
+        """
+        runtime = "onnx" if self.embedding_type == "onnx" else os.getenv("LOCAL_EMBEDDING_RUNTIME", "torch")
+        embeddings = None
+        if runtime == "onnx":
+            try:
+                embeddings = OnnxEmbeddings(self.backup_embedding_model)
+                self.embedding_runtime = "onnx-int8" if embeddings.quantize else "onnx"
+            except ImportError as e:
+                logger.warning(f"ONNX Runtime을 사용할 수 없어 PyTorch로 실행합니다: {str(e)}")
+        if embeddings is None:
+            self.embedding_runtime = "torch"
+            embeddings = HuggingFaceEmbeddings(
+                model_name=self.backup_embedding_model,
+                model_kwargs={'device': 'cpu'},
+                encode_kwargs={'normalize_embeddings': True}
+            )
+        embeddings = with_micro_batching(embeddings)
+        if isinstance(embeddings, MicroBatchingEmbeddings):
+            self.micro_batcher = embeddings
+        return embeddings
+    
+    def _initialize_vectorstore(self, directory: Optional[str] = None):
+        """Chroma 벡터 저장소 초기화 (컬렉션이 없으면 빈 컬렉션 생성, 기본값: 활성 인덱스 디렉토리)
+        
+        HNSW 파라미터(collection_metadata)는 새 컬렉션에만 적용된다. 기존 컬렉션은 만들 때의 설정을 그대로 쓰며,
+        설정이 다르면 경고만 남긴다 (rebuild_vectorstore로 새 버전을 만들면 반영됨).
+        """
+        directory = directory or self.persist_directory
+        exists = os.path.exists(os.path.join(directory, "chroma.sqlite3"))
+        if exists:
+            logger.info(f"기존 Chroma 컬렉션을 로드합니다: {directory}")
+        else:
+            logger.info(f"새로운 Chroma 컬렉션을 생성합니다: {directory} (HNSW: {self.collection_metadata or '기본값'})")
+        vectorstore = Chroma(
+            persist_directory=directory,
+            embedding_function=self.embeddings,
+            collection_name=self.collection_name,
+            collection_metadata=None if exists else (self.collection_metadata or None)
+        )
+        current = vectorstore._collection.metadata or {}
+        stale = {key: value for key, value in self.collection_metadata.items() if current.get(key) != value}
+        if exists and stale:
+            logger.warning(f"기존 컬렉션의 HNSW 설정이 요청과 다릅니다 (재구축 시 반영): 요청 {stale}, 현재 {current}")
+        return vectorstore
+    
+    def _build_chain(self):
+        """LangChain RAG 체인 (활성 벡터 저장소 기준)"""
+        return (
+            {"context": self.vectorstore.as_retriever(), "question": RunnablePassthrough()}
+            | self.prompt_template
+            | self.llm
+            | StrOutputParser()
+        )
+    
+    def _initialize_search_index(
+        self,
+        directory: Optional[str] = None,
+        collection=None,
+        check_version: bool = True
+    ) -> Optional[NumpyVectorStore]:
+        """검색 백엔드에 따라 NumPy 인덱스 로드 (스냅샷이 없거나 코퍼스 버전이 다르면 Chroma에서 다시 생성)
+        
+        check_version=False이면 코퍼스 버전을 비교하지 않는다 (재구축 시 함께 만든 스냅샷을 여는 경우).
+        """
+        if self.vector_backend == "chroma":
+            return None
+        if self.vector_backend != "numpy":
+            raise ValueError(f"지원하지 않는 벡터 검색 백엔드입니다: {self.vector_backend}")
+        
+        index = NumpyVectorStore(os.path.join(directory or self.persist_directory, "numpy_index"), self.collection_name)
+        version = read_corpus_version(self.corpus_version_path)
+        if index.count == 0 or (check_version and index.corpus_version != version):
+            index = self._export_search_index(version, directory, collection)
+        logger.info(f"NumPy 검색 인덱스를 사용합니다: {index.count}개 문서")
+        return index
+    
+    def _export_search_index(self, version: str, directory: Optional[str] = None, collection=None) -> NumpyVectorStore:
+        """Chroma 컬렉션을 NumPy 인덱스 스냅샷으로 내보내기 (기본값: 활성 인덱스 디렉토리/컬렉션)"""
+        return NumpyVectorStore.from_chroma(
+            collection or self.vectorstore._collection,
+            os.path.join(directory or self.persist_directory, "numpy_index"),
+            self.collection_name,
+            version
+        )
+    
+    def _initialize_sparse_index(
+        self,
+        directory: Optional[str] = None,
+        collection=None,
+        check_version: bool = True
+    ) -> Optional[BM25Index]:
+        """BM25 색인 로드 (색인이 없거나 코퍼스 버전이 다르면 Chroma 컬렉션으로 다시 생성)"""
+        if os.getenv("RAG_HYBRID_SEARCH", "false").lower() != "true":
+            return None
+        index = BM25Index(os.path.join(directory or self.persist_directory, "bm25_index"), self.collection_name)
+        version = read_corpus_version(self.corpus_version_path)
+        if index.count == 0 or (check_version and index.corpus_version != version):
+            index = self._export_sparse_index(version, directory, collection)
+        return index
+    
+    def _export_sparse_index(self, version: str, directory: Optional[str] = None, collection=None) -> BM25Index:
+        """Chroma 컬렉션으로 BM25 색인 생성 (기본값: 활성 인덱스 디렉토리/컬렉션)"""
+        return BM25Index.from_chroma(
+            collection or self.vectorstore._collection,
+            os.path.join(directory or self.persist_directory, "bm25_index"),
+            self.collection_name,
+            version
+        )
+    
+    @property
+    def embedding_model_name(self) -> str:
+        """사용 중인 임베딩 모델 이름 (임베딩 캐시 키, int8 양자화 모델은 벡터가 조금 다르므로 구분)"""
+        if self.embedding_provider == "openai":
+            return self.primary_embedding_model
+        if self.embedding_runtime == "onnx-int8":
+            return f"{self.backup_embedding_model}#onnx-int8"
+        return self.backup_embedding_model
+    
+    @property
+    def corpus_version_path(self) -> str:
+        """코퍼스 버전 파일 경로 (문서가 바뀌거나 인덱스 버전이 교체될 때마다 갱신, 모든 인덱스 버전이 공유)"""
+        return os.path.join(self.index_root, "corpus_version")
+    
+    def _mark_corpus_changed(self) -> None:
+        """코퍼스 버전 갱신 및 의미 캐시 무효화 (다른 워커는 버전 파일 변경으로 감지)"""
+        version = bump_corpus_version(self.corpus_version_path)
+        if self.search_index is not None:
+            self.search_index = self._export_search_index(version)
+        if self.sparse_index is not None:
+            self.sparse_index = self._export_sparse_index(version)
+        if self.semantic_cache is not None:
+            self.semantic_cache.invalidate()
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """캐시별 통계 반환 (비활성화된 캐시는 None)"""
+        query_cache = getattr(self.embeddings, "cache", None)
+        return {
+            "semantic_cache": self.semantic_cache.stats() if self.semantic_cache is not None else None,
+            "query_embedding_cache": query_cache.stats() if query_cache is not None else None
+        }
+    
+    def index_info(self) -> Dict[str, Any]:
+        """활성 인덱스 정보를 현재 상태로 계산 (인덱스 교체/문서 추가 후에도 최신 값)"""
+        return {
+            "vectorstore_path": self.persist_directory,
+            "index_version": self.index_version,
+            "collection_name": self.collection_name,
+            "vector_backend": self.vector_backend,
+            "hybrid_search": self.sparse_index is not None,
+            "document_count": self.vectorstore._collection.count()
+        }
     
     def get_embedding_model_info(self) -> Dict[str, str]:
         """현재 사용 중인 임베딩 모델 정보 반환"""
-        model_type = "OpenAI" if isinstance(self.embeddings, OpenAIEmbeddings) else "HuggingFace"
-        model_name = self.primary_embedding_model if model_type == "OpenAI" else self.backup_embedding_model
+        model_type = "OpenAI" if self.embedding_provider == "openai" else "HuggingFace"
+        model_name = self.embedding_model_name
         
         return {
             "type": model_type,
             "name": model_name,
+            "runtime": self.embedding_runtime or "api",
             "status": "primary" if model_type == "OpenAI" else "backup"
         }
     
-    def load_documents(self, documents: List[Dict[str, Any]]) -> None:
-        """문서 로드 및 벡터 저장소에 저장
+    @property
+    def document_embedding_cache(self) -> Optional[DocumentEmbeddingCache]:
+        """문서 임베딩 캐시 (적재 경로에서 처음 사용할 때 생성, 비활성화 시 None)"""
+        if os.getenv("DOCUMENT_EMBEDDING_CACHE_ENABLED", "true").lower() != "true":
+            return None
+        if getattr(self, "_document_embedding_cache", None) is None:
+            self._document_embedding_cache = DocumentEmbeddingCache()
+        return self._document_embedding_cache
+    
+    def _embed_documents_cached(self, texts: List[str]) -> Tuple[List[List[float]], int, int]:
+        """문서 임베딩 (내용이 같은 문서는 캐시에서 재사용)
+        
+        Returns:
+            Tuple[List[List[float]], int, int]: (임베딩 리스트, 캐시 적중 수, 새로 임베딩한 텍스트 수)
+        """
+        cache = self.document_embedding_cache
+        if cache is None:
+            return self.embeddings.embed_documents(texts), 0, len(texts)
+        
+        vectors = cache.get_many(self.embedding_model_name, texts)
+        hits = sum(1 for vector in vectors if vector is not None)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            embedded = [np.asarray(vector, dtype=np.float32) for vector in self.embeddings.embed_documents(missing)]
+            cache.put_many(self.embedding_model_name, missing, embedded)
+            by_text = dict(zip(missing, embedded))
+            vectors = [vector if vector is not None else by_text[text] for text, vector in zip(texts, vectors)]
+        return [vector.tolist() for vector in vectors], hits, len(missing)
+    
+    def _upsert_documents(
+        self,
+        docs: List[Document],
+        delete_missing: bool = True,
+        dry_run: bool = False,
+        vectorstore=None
+    ) -> Dict[str, Any]:
+        """결정적 ID로 문서를 upsert하고 더 이상 없는 문서 삭제
+        
+        - 새 문서(added)와 메타데이터가 바뀐 문서(updated)만 임베딩(문서 임베딩 캐시 경유)하여 기록
+        - 내용이 같은 문서(unchanged)는 건드리지 않음
+          (컨텍스트 블록 메타데이터가 없는 이전 적재 문서는 메타데이터 변경으로 보고 한 번 다시 기록)
+        - delete_missing이면 이번 입력과 같은 source의 기존 문서 중 입력에 없는 것(삭제/수정 전 버전,
+          ID 없이 중복 적재된 이전 문서, 메타데이터 없는 '초기화' 자리표시 문서)을 삭제
+        
+        Args:
+            docs: 적재할 문서 리스트
+            delete_missing: 입력에 없는 기존 문서 삭제 여부
+            dry_run: True이면 변경 없이 차이만 계산
+            vectorstore: 대상 벡터 저장소 (기본값: 활성 벡터 저장소, 재구축 시 새 버전 저장소)
+            
+        Returns:
+            Dict[str, Any]: 적재 통계 (documents, unique, added, updated, unchanged, deleted,
+                cache_hits, embedded, dry_run, sample)
+        """
+        unique: Dict[str, Document] = {}
+        for doc in docs:
+            unique.setdefault(self._document_id(doc), doc)
+        # 프롬프트용 컨텍스트 블록/토큰 수/내용 해시를 메타데이터로 미리 계산 (질의마다 다시 정리하지 않도록)
+        for doc in unique.values():
+            attach_context_block(doc)
+        
+        collection = (vectorstore or self.vectorstore)._collection
+        existing = collection.get(include=["metadatas"])
+        existing_metadata = dict(zip(existing["ids"], existing["metadatas"]))
+        
+        added = [doc_id for doc_id in unique if doc_id not in existing_metadata]
+        updated = [
+            doc_id for doc_id, doc in unique.items()
+            if doc_id in existing_metadata and (existing_metadata[doc_id] or {}) != doc.metadata
+        ]
+        deleted: List[str] = []
+        if delete_missing:
+            sources = {doc.metadata.get("source") for doc in unique.values()}
+            deleted = [
+                doc_id for doc_id, metadata in existing_metadata.items()
+                if doc_id not in unique and (not metadata or metadata.get("source") in sources)
+            ]
+        
+        report: Dict[str, Any] = {
+            "documents": len(docs),
+            "unique": len(unique),
+            "added": len(added),
+            "updated": len(updated),
+            "unchanged": len(unique) - len(added) - len(updated),
+            "deleted": len(deleted),
+            "cache_hits": 0,
+            "embedded": 0,
+            "dry_run": dry_run,
+            "sample": {"added": added[:10], "updated": updated[:10], "deleted": deleted[:10]}
+        }
+        if dry_run:
+            return report
+        
+        write_ids = added + updated
+        if write_ids:
+            write_docs = [unique[doc_id] for doc_id in write_ids]
+            with stage_timer("document_embedding"):
+                embeddings, hits, embedded = self._embed_documents_cached([doc.page_content for doc in write_docs])
+            for start in range(0, len(write_docs), CHROMA_ADD_BATCH_SIZE):
+                self._upsert_to_collection(
+                    collection,
+                    write_ids[start:start + CHROMA_ADD_BATCH_SIZE],
+                    embeddings[start:start + CHROMA_ADD_BATCH_SIZE],
+                    write_docs[start:start + CHROMA_ADD_BATCH_SIZE]
+                )
+            metrics.inc("rag_cache_hits_total", ("document_embedding",), hits)
+            metrics.inc("rag_cache_misses_total", ("document_embedding",), len(write_docs) - hits)
+            report["cache_hits"] = hits
+            report["embedded"] = embedded
+        
+        for start in range(0, len(deleted), CHROMA_ADD_BATCH_SIZE):
+            collection.delete(ids=deleted[start:start + CHROMA_ADD_BATCH_SIZE])
+        return report
+    
+    @staticmethod
+    def _upsert_to_collection(collection, ids: List[str], embeddings: List[List[float]], docs: List[Document]) -> None:
+        """미리 계산한 임베딩으로 Chroma 컬렉션에 upsert (Chroma는 빈 메타데이터를 허용하지 않으므로 나눠서 기록)"""
+        with_metadata = [i for i, doc in enumerate(docs) if doc.metadata]
+        without_metadata = [i for i, doc in enumerate(docs) if not doc.metadata]
+        if with_metadata:
+            collection.upsert(
+                ids=[ids[i] for i in with_metadata],
+                embeddings=[embeddings[i] for i in with_metadata],
+                metadatas=[docs[i].metadata for i in with_metadata],
+                documents=[docs[i].page_content for i in with_metadata]
+            )
+        if without_metadata:
+            collection.upsert(
+                ids=[ids[i] for i in without_metadata],
+                embeddings=[embeddings[i] for i in without_metadata],
+                documents=[docs[i].page_content for i in without_metadata]
+            )
+    
+    def load_documents(
+        self,
+        documents: List[Dict[str, Any]],
+        delete_missing: bool = True,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """문서 로드 및 벡터 저장소에 저장 (결정적 ID로 upsert하므로 여러 번 실행해도 중복되지 않음)
         
         Args:
             documents: 로드할 문서 리스트
+            delete_missing: 같은 source의 기존 문서 중 이번 입력에 없는 문서 삭제 여부
+            dry_run: True이면 저장하지 않고 차이(added/updated/unchanged/deleted)만 반환
+            
+        Returns:
+            Dict[str, Any]: 적재 통계 (_upsert_documents 참고)
         """
         try:
             # 문서 로드
             loaded_docs = self.document_loader.load_documents(documents)
             
-            # Chroma에 문서 추가
-            self.vectorstore.add_documents(loaded_docs)
+            # 바뀐 문서만 upsert, 없어진 문서 삭제 (임베딩은 문서 임베딩 캐시 경유)
+            report = self._upsert_documents(loaded_docs, delete_missing=delete_missing, dry_run=dry_run)
             
-            # Chroma 저장
-            self.vectorstore.persist()
+            if dry_run:
+                logger.info(f"[dry-run] 적재 차이: {report}")
+                return report
             
-            logger.info(f"총 {len(loaded_docs)}개 문서가 Chroma 벡터 저장소에 저장되었습니다.")
+            if report["added"] or report["updated"] or report["deleted"]:
+                # Chroma 저장
+                self.vectorstore.persist()
+                self._mark_corpus_changed()
+            
+            logger.info(
+                f"문서 적재 완료: 추가 {report['added']}개, 갱신 {report['updated']}개, "
+                f"유지 {report['unchanged']}개, 삭제 {report['deleted']}개 "
+                f"(임베딩 캐시 적중 {report['cache_hits']}개, 새로 임베딩 {report['embedded']}개)"
+            )
+            return report
             
         except Exception as e:
             logger.error(f"문서 로드 중 오류 발생: {str(e)}")
@@ -210,60 +587,485 @@ class RAGPipeline:
             logger.error(f"문서 검색 중 오류 발생: {str(e)}")
             return []
     
-    def query(self, query: str, history: Optional[str] = None) -> Dict[str, Any]:
-        """질문에 대한 답변 생성 (이전 대화 히스토리 포함)"""
-        docs = self.vectorstore.similarity_search_with_score(query, k=5)
+    def _active_index(self) -> _ActiveIndex:
+        """현재 활성 인덱스 참조 (검색 중 인덱스 교체/재생성과 경합하지 않도록 호출마다 한 번만 읽음)"""
+        return _ActiveIndex(self.vectorstore, self.search_index, self.sparse_index)
+    
+    def _search_by_vector(
+        self,
+        index: _ActiveIndex,
+        embedding: List[float],
+        k: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+        vectors: Optional[Dict[str, np.ndarray]] = None
+    ) -> List[Tuple[Document, float]]:
+        """임베딩 벡터로 검색 (문서, 거리) 목록 반환
+        
+        vectors가 주어지면 검색 결과와 함께 받은 저장 임베딩을 문서 ID별로 채운다 (컨텍스트 패킹용).
+        """
+        if vectors is None:
+            if index.search_index is not None:
+                return index.search_index.similarity_search_by_vector_with_relevance_scores(embedding, k=k, filter=filter)
+            return index.vectorstore.similarity_search_by_vector_with_relevance_scores(embedding, k=k, filter=filter)
+        if index.search_index is not None:
+            results = index.search_index.similarity_search_by_vector_with_embeddings(embedding, k=k, filter=filter)
+        else:
+            data = index.vectorstore._collection.query(
+                query_embeddings=[embedding],
+                n_results=k,
+                where=filter or None,
+                include=["documents", "metadatas", "distances", "embeddings"]
+            )
+            results = [
+                (Document(page_content=content, metadata=metadata or {}), distance, np.asarray(vector, dtype=np.float32))
+                for content, metadata, distance, vector in zip(
+                    data["documents"][0], data["metadatas"][0], data["distances"][0], data["embeddings"][0]
+                )
+            ]
+        docs_and_scores = []
+        for doc, distance, vector in results:
+            vectors[self._document_id(doc)] = vector
+            docs_and_scores.append((doc, distance))
+        return docs_and_scores
+    
+    def _search_by_vectors(
+        self,
+        index: _ActiveIndex,
+        embeddings: List[List[float]],
+        k: int = 5,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """여러 임베딩 벡터를 한 번의 컬렉션 조회로 검색 (쿼리별 (문서, 거리) 목록 반환)"""
+        if not embeddings:
+            return []
+        if index.search_index is not None:
+            return index.search_index.similarity_search_by_vectors(embeddings, k=k, filter=filter)
+        results = index.vectorstore._collection.query(
+            query_embeddings=embeddings,
+            n_results=k,
+            where=filter or None,
+            include=["documents", "metadatas", "distances"]
+        )
+        batched = []
+        for documents, metadatas, distances in zip(results["documents"], results["metadatas"], results["distances"]):
+            batched.append([
+                (Document(page_content=content, metadata=metadata or {}), distance)
+                for content, metadata, distance in zip(documents, metadatas, distances)
+            ])
+        return batched
+    
+    def _retrieve(
+        self,
+        index: _ActiveIndex,
+        query: str,
+        embedding: List[float],
+        k: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+        vectors: Optional[Dict[str, np.ndarray]] = None
+    ) -> List[Tuple[Document, float]]:
+        """질의 검색 (BM25 색인이 있으면 벡터 + BM25 하이브리드, 없으면 벡터 검색만)
+        
+        vectors가 주어지면 결과 문서의 저장 임베딩을 문서 ID별로 채운다.
+        """
+        if index.sparse_index is None:
+            with stage_timer("vector_search"):
+                return self._search_by_vector(index, embedding, k=k, filter=filter, vectors=vectors)
+        candidate_k = k * HYBRID_CANDIDATE_MULTIPLIER
+        with stage_timer("vector_search"):
+            dense = self._search_by_vector(index, embedding, k=candidate_k, filter=filter, vectors=vectors)
+        return self._fuse_with_sparse(index, query, embedding, dense, k, filter, vectors)
+    
+    def _fuse_with_sparse(
+        self,
+        index: _ActiveIndex,
+        query: str,
+        embedding: List[float],
+        dense: List[Tuple[Document, float]],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        vectors: Optional[Dict[str, np.ndarray]] = None
+    ) -> List[Tuple[Document, float]]:
+        """벡터 검색 결과와 BM25 결과를 RRF로 결합하여 상위 k개 반환
+        
+        결합 순위만 RRF로 정하고 반환 점수는 벡터 거리로 유지하므로 유사도 임계값과 응답 형식은 그대로다.
+        BM25에서만 찾은 문서는 저장된 임베딩으로 거리를 계산한다.
+        """
+        with stage_timer("sparse_search"):
+            sparse = index.sparse_index.search(query, k=k * HYBRID_CANDIDATE_MULTIPLIER, filter=filter)
+        
+        dense_by_id: Dict[str, Tuple[Document, float]] = {}
+        for doc, distance in dense:
+            dense_by_id.setdefault(self._document_id(doc), (doc, distance))
+        sparse_by_id: Dict[str, int] = {}
+        for row, _ in sparse:
+            sparse_by_id.setdefault(self._document_id(index.sparse_index.document(row)), row)
+        
+        fused = reciprocal_rank_fusion([list(dense_by_id), list(sparse_by_id)], k=RRF_K)[:k]
+        
+        missing = [doc_id for doc_id, _ in fused if doc_id not in dense_by_id]
+        stored = self._stored_vectors_for_rows(index, [sparse_by_id[doc_id] for doc_id in missing])
+        query_vector = np.asarray(embedding, dtype=np.float32)
+        space = index.distance_space
+        for doc_id, vector in zip(missing, stored):
+            if vector is None:
+                distance = float("inf")
+            else:
+                # 벡터 검색 결과와 같은 거리 함수
+                distance = vector_distance(query_vector, vector, space)
+                if vectors is not None:
+                    vectors[doc_id] = vector
+            dense_by_id[doc_id] = (index.sparse_index.document(sparse_by_id[doc_id]), distance)
+        return [dense_by_id[doc_id] for doc_id, _ in fused]
+    
+    def _stored_vectors_for_rows(self, index: _ActiveIndex, rows: List[int]) -> List[Optional[np.ndarray]]:
+        """BM25 색인 행 번호에 해당하는 Chroma 저장 임베딩 (없으면 None)"""
+        if not rows:
+            return []
+        ids = [index.sparse_index.ids[row] for row in rows]
+        stored = index.vectorstore._collection.get(ids=ids, include=["embeddings"])
+        by_id = dict(zip(stored["ids"], stored["embeddings"]))
+        return [
+            np.asarray(by_id[doc_id], dtype=np.float32) if by_id.get(doc_id) is not None else None
+            for doc_id in ids
+        ]
+    
+    def _filter_documents(self, docs_and_scores: List[Tuple[Document, float]], space: str) -> List[Document]:
+        """유사도 임계값 이상인 문서만 선택 (space: 검색한 인덱스의 거리 함수)"""
         filtered_docs = []
-        for doc, score in docs:
-            similarity_score = 1 / (1 + score)
-            if similarity_score >= 0.3:
+        for doc, score in docs_and_scores:
+            similarity_score = distance_to_similarity(score, space)
+            if similarity_score >= SIMILARITY_THRESHOLD:
                 filtered_docs.append(doc)
-        if not filtered_docs:
-            logger.warning(f"쿼리 '{query}'에 대한 관련 문서를 찾을 수 없습니다.")
-            return {
-                "answer": "죄송합니다. 제공된 컨텍스트에 해당 정보가 없습니다. 다른 질문을 해주시거나, 재생에너지 관련 질문을 구체적으로 말씀해 주세요.",
-                "documents": []
-            }
+        return filtered_docs
+    
+    def _retrieve_context_documents(self, query: str, embedding: List[float], k: int) -> List[Document]:
+        """답변 생성에 사용할 문서 선택 (검색 + 유사도 필터링 + 토큰 예산 MMR 패킹)"""
+        vectors: Dict[str, np.ndarray] = {}
+        index = self._active_index()
+        docs = self._filter_documents(self._retrieve(index, query, embedding, k=k, vectors=vectors), index.distance_space)
+        with stage_timer("context_packing"):
+            return self.context_packer.pack(docs, embedding, [vectors.get(self._document_id(doc)) for doc in docs])
+    
+    def _format_search_results(
+        self,
+        docs_and_scores: List[Tuple[Document, float]],
+        space: str,
+        score_threshold: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """검색 결과를 순위/점수/메타데이터가 포함된 dict 목록으로 변환 (space: 검색한 인덱스의 거리 함수)"""
+        results = []
+        for doc, distance in docs_and_scores:
+            score = distance_to_similarity(distance, space)
+            if score_threshold is not None and score < score_threshold:
+                continue
+            results.append({
+                "rank": len(results) + 1,
+                "score": score,
+                "distance": distance,
+                "content": doc.page_content,
+                "metadata": public_metadata(doc)
+            })
+        return results
+    
+    def search(
+        self,
+        query: str,
+        k: int = 3,
+        score_threshold: Optional[float] = None,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """검색 전용 모드 (LLM 호출 없이 관련 문서만 반환)
+        
+        Args:
+            query: 검색 쿼리
+            k: 반환할 문서 수
+            score_threshold: 최소 유사도 점수 (0~1)
+            filter: 메타데이터 필터 (Chroma where 조건, 예: {"category": "REC"})
+            
+        Returns:
+            순위, 유사도 점수, 거리, 내용, 메타데이터가 포함된 결과 리스트
+        """
+        with stage_timer("query_embedding"):
+            embedding = self.embeddings.embed_query(query)
+        index = self._active_index()
+        docs = self._retrieve(index, query, embedding, k=k, filter=filter)
+        return self._format_search_results(docs, index.distance_space, score_threshold)
+    
+    async def asearch(
+        self,
+        query: str,
+        k: int = 3,
+        score_threshold: Optional[float] = None,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """검색 전용 모드 (비동기)"""
+        with stage_timer("query_embedding"):
+            embedding = await self.aembed_query(query)
+        index = self._active_index()
+        docs = await self._run_cpu(lambda: self._retrieve(index, query, embedding, k=k, filter=filter))
+        return self._format_search_results(docs, index.distance_space, score_threshold)
+    
+    def _build_context(self, filtered_docs: List[Document]) -> str:
+        """검색된 문서로 프롬프트 컨텍스트 구성 (적재 시 정리해 둔 컨텍스트 블록을 내용 해시로 중복 제거 후 연결)"""
         context_parts = []
         seen_content = set()
         for doc in filtered_docs:
-            content_hash = hash(doc.page_content.strip())
-            if content_hash not in seen_content:
-                seen_content.add(content_hash)
-                cleaned_content = doc.page_content.strip()
-                if cleaned_content and not cleaned_content.endswith('...'):
-                    sentences = cleaned_content.split('.')
-                    valid_sentences = []
-                    for sentence in sentences:
-                        sentence = sentence.strip()
-                        if sentence and not sentence.endswith('...') and len(sentence) > 10:
-                            valid_sentences.append(sentence)
-                    if valid_sentences:
-                        cleaned_content = '. '.join(valid_sentences) + '.'
-                        context_parts.append(cleaned_content)
-        context = "\n\n---\n\n".join(context_parts)
-        # history가 없으면 빈 문자열로
-        if history is None:
-            history = ""
-        # 답변 생성 (프롬프트에 history 추가)
-        response = self.prompt_template.invoke({
-            "history": history,
-            "context": context,
-            "question": query
-        })
-        response = self.llm.invoke(response)
-        response = StrOutputParser().invoke(response)
+            key = get_content_hash(doc)
+            if key in seen_content:
+                continue
+            seen_content.add(key)
+            block = get_context_block(doc)
+            if block:
+                context_parts.append(block)
+        return "\n\n---\n\n".join(context_parts)
+    
+    @staticmethod
+    def _document_id(doc: Document) -> str:
+        """결정적 문서 ID (article_id + 내용 해시, Chroma 저장 ID와 동일)
+        
+        같은 문서를 다시 적재해도 ID가 같으므로 upsert로 중복 없이 덮어쓰고,
+        내용이 바뀐 문서는 새 ID가 되어 이전 버전은 삭제 대상이 된다.
+        검색 경로에서는 적재 시 메타데이터에 기록한 내용 해시를 그대로 쓰므로 다시 해시하지 않는다.
+        """
+        content_hash = get_content_hash(doc)
+        article_id = str(doc.metadata.get("article_id") or "")
+        return f"{article_id}:{content_hash}" if article_id else content_hash
+    
+    def _no_documents_result(self, query: str) -> Dict[str, Any]:
+        """관련 문서가 없을 때의 응답"""
+        logger.warning(f"쿼리 '{query}'에 대한 관련 문서를 찾을 수 없습니다.")
+        metrics.inc("rag_empty_retrieval_total")
+        return {
+            "answer": "죄송합니다. 제공된 컨텍스트에 해당 정보가 없습니다. 다른 질문을 해주시거나, 재생에너지 관련 질문을 구체적으로 말씀해 주세요.",
+            "documents": []
+        }
+    
+    def _build_result(self, response: str, filtered_docs: List[Document]) -> Dict[str, Any]:
+        """LLM 응답과 참고 문서로 최종 결과 구성"""
         return {
             "answer": self._post_process_response(response),
             "documents": [
                 {
                     "content": doc.page_content,
-                    "metadata": doc.metadata
+                    "metadata": public_metadata(doc)
                 }
                 for doc in filtered_docs
             ]
         }
     
+    def search_batch(
+        self,
+        queries: List[str],
+        k: int = 3,
+        score_threshold: Optional[float] = None,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """여러 쿼리를 한 번에 검색 (질의 임베딩 캐시에 없는 쿼리만 배치 임베딩 1회 + 컬렉션 조회 1회)
+        
+        Args:
+            queries: 검색 쿼리 리스트
+            k: 쿼리별 반환할 문서 수
+            score_threshold: 최소 유사도 점수 (0~1)
+            filter: 메타데이터 필터 (모든 쿼리에 공통 적용)
+            
+        Returns:
+            입력 순서와 같은 쿼리별 검색 결과 리스트
+        """
+        unique_queries = list(dict.fromkeys(queries))
+        with stage_timer("query_embedding"):
+            embeddings = embed_queries(self.embeddings, unique_queries)
+        return self._expand_batch_results(queries, unique_queries, embeddings, k, score_threshold, filter)
+    
+    async def asearch_batch(
+        self,
+        queries: List[str],
+        k: int = 3,
+        score_threshold: Optional[float] = None,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """여러 쿼리를 한 번에 검색 (비동기)"""
+        loop = asyncio.get_running_loop()
+        unique_queries = list(dict.fromkeys(queries))
+        with stage_timer("query_embedding"):
+            if self.embedding_provider == "openai" or self.micro_batcher is not None:
+                embeddings = await aembed_queries(self.embeddings, unique_queries)
+            else:
+                embeddings = await loop.run_in_executor(self.cpu_executor, embed_queries, self.embeddings, unique_queries)
+        return await self._run_cpu(
+            lambda: self._expand_batch_results(queries, unique_queries, embeddings, k, score_threshold, filter)
+        )
+    
+    def _expand_batch_results(
+        self,
+        queries: List[str],
+        unique_queries: List[str],
+        embeddings: List[List[float]],
+        k: int,
+        score_threshold: Optional[float],
+        filter: Optional[Dict[str, Any]]
+    ) -> List[List[Dict[str, Any]]]:
+        """중복 제거된 쿼리의 검색 결과를 원래 쿼리 순서로 펼침"""
+        index = self._active_index()
+        if index.sparse_index is None:
+            batched = self._search_by_vectors(index, embeddings, k=k, filter=filter)
+        else:
+            dense_batched = self._search_by_vectors(index, embeddings, k=k * HYBRID_CANDIDATE_MULTIPLIER, filter=filter)
+            batched = [
+                self._fuse_with_sparse(index, query, embedding, dense, k, filter)
+                for query, embedding, dense in zip(unique_queries, embeddings, dense_batched)
+            ]
+        by_query = {
+            query: self._format_search_results(docs, index.distance_space, score_threshold)
+            for query, docs in zip(unique_queries, batched)
+        }
+        return [by_query[query] for query in queries]
+    
+    def query(self, query: str, history: Optional[str] = None, k: int = 5) -> Dict[str, Any]:
+        """질문에 대한 답변 생성 (이전 대화 히스토리 포함, 동시 동일 질의는 병합)"""
+        key = make_query_key(query, history, k)
+        return self.singleflight.do(key, lambda: self._query(query, history, k))
+    
+    def _query(self, query: str, history: Optional[str], k: int) -> Dict[str, Any]:
+        """질문에 대한 답변 생성 (병합 없이 실행)"""
+        with stage_timer("query_embedding"):
+            embedding = self.embeddings.embed_query(query)
+        # 히스토리가 없는 질의만 의미 캐시 사용 (히스토리에 따라 답변이 달라지므로)
+        cacheable = self.semantic_cache is not None and not history
+        if cacheable:
+            with stage_timer("semantic_cache_lookup"):
+                cached, cache_version = self.semantic_cache.lookup(query, embedding, k)
+            if cached is not None:
+                return cached
+        filtered_docs = self._retrieve_context_documents(query, embedding, k)
+        if not filtered_docs:
+            return self._no_documents_result(query)
+        with stage_timer("context_assembly"):
+            context = self._build_context(filtered_docs)
+        # 답변 생성 (프롬프트에 history 추가, history가 없으면 빈 문자열로)
+        prompt = self.prompt_template.invoke({
+            "history": history or "",
+            "context": context,
+            "question": query
+        })
+        llm_started = time.perf_counter()
+        with stage_timer("llm_call"):
+            message = self.llm.invoke(prompt)
+        llm_seconds = time.perf_counter() - llm_started
+        record_token_usage(message)
+        response = StrOutputParser().invoke(message)
+        result = self._build_result(response, filtered_docs)
+        if cacheable:
+            doc_ids = [self._document_id(doc) for doc in filtered_docs]
+            self.semantic_cache.store(query, embedding, doc_ids, result, llm_seconds, k, cache_version)
+        return result
+    
+    async def _run_cpu(self, fn):
+        """CPU 실행기에서 실행 (단계별 지연 시간의 의도 라벨이 유지되도록 컨텍스트 변수 복사)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.cpu_executor, contextvars.copy_context().run, fn)
+    
+    async def aembed_query(self, query: str) -> List[float]:
+        """쿼리 임베딩 (비동기)
+        
+        OpenAI 임베딩은 네이티브 비동기 호출을 사용하고, CPU 바운드인 HuggingFace 임베딩은
+        이벤트 루프를 막지 않도록 전용 실행기에서 실행한다.
+        마이크로 배처를 쓰면 실행기 스레드를 점유하지 않고 배치 결과를 이벤트 루프에서 기다린다.
+        """
+        if self.embedding_provider == "openai" or self.micro_batcher is not None:
+            return await self.embeddings.aembed_query(query)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.cpu_executor, self.embeddings.embed_query, query)
+    
+    async def _aretrieve(self, query: str, k: int = 5, embedding: Optional[List[float]] = None) -> List[Document]:
+        """쿼리 임베딩 + 검색 + 유사도 필터링 + 컨텍스트 패킹 (비동기, 임베딩이 주어지면 재사용)"""
+        if embedding is None:
+            with stage_timer("query_embedding"):
+                embedding = await self.aembed_query(query)
+        return await self._run_cpu(lambda: self._retrieve_context_documents(query, embedding, k))
+    
+    async def aquery(self, query: str, history: Optional[str] = None, k: int = 5) -> Dict[str, Any]:
+        """질문에 대한 답변 생성 (비동기, 이전 대화 히스토리 포함, 동시 동일 질의는 병합)"""
+        key = make_query_key(query, history, k)
+        return await self.singleflight.ado(key, lambda: self._aquery(query, history, k))
+    
+    async def _aquery(self, query: str, history: Optional[str], k: int) -> Dict[str, Any]:
+        """질문에 대한 답변 생성 (비동기, 병합 없이 실행)"""
+        loop = asyncio.get_running_loop()
+        with stage_timer("query_embedding"):
+            embedding = await self.aembed_query(query)
+        cacheable = self.semantic_cache is not None and not history
+        if cacheable:
+            with stage_timer("semantic_cache_lookup"):
+                # 유사도 행렬 계산과 sqlite 반영이 이벤트 루프를 막지 않도록 실행기에서 조회
+                cached, cache_version = await self._run_cpu(lambda: self.semantic_cache.lookup(query, embedding, k))
+            if cached is not None:
+                return cached
+        filtered_docs = await self._aretrieve(query, k=k, embedding=embedding)
+        if not filtered_docs:
+            return self._no_documents_result(query)
+        with stage_timer("context_assembly"):
+            context = self._build_context(filtered_docs)
+        prompt = self.prompt_template.invoke({
+            "history": history or "",
+            "context": context,
+            "question": query
+        })
+        llm_started = time.perf_counter()
+        with stage_timer("llm_call"):
+            message = await self.llm.ainvoke(prompt)
+        llm_seconds = time.perf_counter() - llm_started
+        record_token_usage(message)
+        response = StrOutputParser().invoke(message)
+        result = self._build_result(response, filtered_docs)
+        if cacheable:
+            doc_ids = [self._document_id(doc) for doc in filtered_docs]
+            await loop.run_in_executor(
+                self.cpu_executor,
+                lambda: self.semantic_cache.store(query, embedding, doc_ids, result, llm_seconds, k, cache_version)
+            )
+        return result
+    
+    async def astream_query(self, query: str, history: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """질문에 대한 답변을 스트리밍으로 생성
+        
+        검색된 참고 문서를 먼저 'sources' 이벤트로 보내고, LLM 토큰을 후처리하면서
+        'token' 이벤트로 흘려보낸 뒤 'done' 이벤트로 최종 답변을 전달한다.
+        
+        Yields:
+            {"event": "sources" | "token" | "done", "data": ...}
+        """
+        filtered_docs = await self._aretrieve(query)
+        documents = self._build_result("", filtered_docs)["documents"]
+        yield {
+            "event": "sources",
+            "data": {
+                "urls": [doc["metadata"].get("url") for doc in documents if doc["metadata"].get("url")],
+                "documents": documents
+            }
+        }
+        if not filtered_docs:
+            answer = self._no_documents_result(query)["answer"]
+            yield {"event": "token", "data": answer}
+            yield {"event": "done", "data": {"answer": answer}}
+            return
+        with stage_timer("context_assembly"):
+            context = self._build_context(filtered_docs)
+        prompt = self.prompt_template.invoke({
+            "history": history or "",
+            "context": context,
+            "question": query
+        })
+        processor = StreamingPostProcessor()
+        with stage_timer("llm_call"):
+            async for chunk in self.llm.astream(prompt):
+                text = processor.feed(chunk.content)
+                if text:
+                    yield {"event": "token", "data": text}
+        text = processor.flush()
+        if text:
+            yield {"event": "token", "data": text}
+        yield {"event": "done", "data": {"answer": processor.text}}
+    
     def _post_process_response(self, response: str) -> str:
         """응답 후처리 - 가독성 향상
         
@@ -329,34 +1131,163 @@ class RAGPipeline:
         # 문서 분할
         split_docs = self.text_splitter.split_documents(loaded_docs)
         
-        # Chroma에 문서 추가
-        self.vectorstore.add_documents(split_docs)
+        # Chroma에 문서 upsert (같은 파일에서 나온 이전 청크 중 없어진 것은 삭제)
+        report = self._upsert_documents(split_docs)
+        logger.info(f"디렉토리 문서 적재: {report}")
         
         if persist:
             # Chroma 저장
             self.vectorstore.persist()
+        if report["added"] or report["updated"] or report["deleted"]:
+            self._mark_corpus_changed()
     
-    def rebuild_vectorstore(self, documents: List[Dict[str, Any]]) -> None:
-        """벡터 저장소 재구성 (기존 데이터 삭제 후 새로운 분할 방식으로 재구성)
+    def rebuild_vectorstore(
+        self,
+        documents: List[Dict[str, Any]],
+        smoke_queries: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """벡터 저장소 무중단 재구성 (블루/그린)
+        
+        활성 인덱스는 그대로 둔 채 새 버전 디렉토리에 Chroma 컬렉션과 NumPy/BM25 스냅샷을 만들고,
+        검증(문서 수, 스모크 질의)을 통과하면 CURRENT 포인터를 원자적으로 교체한다.
+        이 프로세스는 즉시, 다른 워커는 감시 스레드가 다음 확인 주기에 새 버전으로 전환하며
+        전환 전에 시작된 질의는 이전 버전으로 끝까지 실행된다. 검증에 실패하면 새 버전을 지우고 예외를 던진다.
         
         Args:
             documents: 재구성할 문서 리스트
+            smoke_queries: 검증용 질의 (각각 유사도 임계값 이상의 문서가 1개 이상 검색되어야 함)
+            
+        Returns:
+            Dict[str, Any]: 적재 통계 (_upsert_documents 참고) + version, previous_version, removed_versions
         """
+        version, directory = self.index_versions.create_version()
+        logger.info(f"새 인덱스 버전을 생성합니다: {directory}")
         try:
-            # 기존 벡터 저장소 삭제
-            import shutil
-            if os.path.exists(self.persist_directory):
-                shutil.rmtree(self.persist_directory)
-                logger.info(f"기존 벡터 저장소를 삭제했습니다: {self.persist_directory}")
-            
-            # 새로운 벡터 저장소 초기화
-            self.vectorstore = self._initialize_vectorstore()
-            
-            # 문서 재로드
-            self.load_documents(documents)
-            
-            logger.info("벡터 저장소가 새로운 분할 방식으로 재구성되었습니다.")
+            vectorstore = self._initialize_vectorstore(directory)
+            loaded_docs = self.document_loader.load_documents(documents)
+            # 문서 임베딩 캐시는 인덱스 디렉토리 밖에 있으므로 바뀐 문서만 새로 임베딩
+            stats = self._upsert_documents(loaded_docs, vectorstore=vectorstore)
+            vectorstore.persist()
             
+            collection = vectorstore._collection
+            self._validate_index(collection, stats["unique"], loaded_docs, smoke_queries)
+            corpus_version = uuid.uuid4().hex
+            search_index = (
+                self._export_search_index(corpus_version, directory, collection)
+                if self.vector_backend == "numpy" else None
+            )
+            sparse_index = (
+                self._export_sparse_index(corpus_version, directory, collection)
+                if self.sparse_index is not None else None
+            )
         except Exception as e:
-            logger.error(f"벡터 저장소 재구성 중 오류 발생: {str(e)}")
-            raise 
\ No newline at end of file
+            logger.error(f"벡터 저장소 재구성 중 오류 발생 (활성 인덱스는 유지): {str(e)}")
+            self.index_versions.discard(version)
+            raise
+        
+        # 공유 코퍼스 버전을 먼저 갱신 → 새 버전으로 전환한 워커가 이전 코퍼스의 캐시 답변을 내주지 않도록
+        bump_corpus_version(self.corpus_version_path, corpus_version)
+        previous = self.index_versions.activate(version)
+        with self._index_lock:
+            self._swap_index(version, directory, vectorstore, search_index, sparse_index)
+        if self.semantic_cache is not None:
+            self.semantic_cache.invalidate()
+        
+        stats["version"] = version
+        stats["previous_version"] = previous
+        stats["removed_versions"] = self.index_versions.collect_garbage()
+        logger.info(f"벡터 저장소가 재구성되었습니다: 버전 {version} (이전: {previous or '루트'})")
+        return stats
+    
+    def _validate_index(
+        self,
+        collection,
+        expected_count: int,
+        docs: List[Document],
+        smoke_queries: Optional[List[str]] = None
+    ) -> None:
+        """교체 전 새 인덱스 검증 (실패 시 ValueError)
+        
+        - 컬렉션 문서 수가 입력의 고유 문서 수와 같아야 함 (빈 인덱스로는 교체하지 않음)
+        - 표본 문서의 저장 임베딩으로 검색했을 때 자기 자신이 상위 3개 안에 있어야 함
+        - smoke_queries가 있으면 각 질의마다 유사도 임계값 이상의 문서가 1개 이상 있어야 함
+        """
+        count = collection.count()
+        if expected_count == 0 or count != expected_count:
+            raise ValueError(f"새 인덱스 문서 수가 올바르지 않습니다: {count}개 (기대값 {expected_count}개)")
+        
+        sample_size = int(os.getenv("INDEX_VALIDATION_SAMPLES", "5"))
+        step = max(1, len(docs) // sample_size)
+        sample_ids = list(dict.fromkeys(self._document_id(doc) for doc in docs[::step]))[:sample_size]
+        stored = collection.get(ids=sample_ids, include=["embeddings"])
+        results = collection.query(query_embeddings=stored["embeddings"], n_results=min(3, count), include=[])
+        missing = [doc_id for doc_id, ids in zip(stored["ids"], results["ids"]) if doc_id not in ids]
+        if len(stored["ids"]) != len(sample_ids) or missing:
+            raise ValueError(f"새 인덱스 자기 검색 검증에 실패했습니다: {missing or sample_ids}")
+        
+        for query in smoke_queries or []:
+            embedding = self.embeddings.embed_query(query)
+            distances = collection.query(query_embeddings=[embedding], n_results=1, include=["distances"])["distances"][0]
+            if not distances or distance_to_similarity(distances[0], collection_space(collection)) < SIMILARITY_THRESHOLD:
+                raise ValueError(f"스모크 질의 검증에 실패했습니다: '{query}'")
+        logger.info(f"새 인덱스 검증 통과: {count}개 문서, 표본 {len(sample_ids)}개, 스모크 질의 {len(smoke_queries or [])}개")
+    
+    def _swap_index(self, version: str, directory: str, vectorstore, search_index, sparse_index) -> None:
+        """활성 인덱스 참조 교체 (_index_lock 안에서 호출)
+        
+        속성 대입만 하므로 진행 중인 질의는 이미 읽은 이전 객체로 끝나고, 이후 질의부터 새 버전을 사용한다.
+        문서 ID가 내용 기반이므로 한 질의가 교체 시점을 걸쳐 두 버전을 읽어도 결과가 어긋나지 않는다.
+        """
+        self.vectorstore = vectorstore
+        self.search_index = search_index
+        self.sparse_index = sparse_index
+        self.persist_directory = directory
+        self.index_version = version
+        self.chain = self._build_chain()
+    
+    def refresh_index(self) -> bool:
+        """CURRENT 포인터가 가리키는 버전이 바뀌었으면 새 버전을 열어 교체
+        
+        Returns:
+            bool: 교체 여부
+        """
+        version = self.index_versions.current()
+        if version is None or version == self.index_version:
+            return False
+        with self._index_lock:
+            if version == self.index_version:
+                return False
+            directory = self.index_versions.version_path(version)
+            vectorstore = self._initialize_vectorstore(directory)
+            collection = vectorstore._collection
+            # 재구축 시 함께 만든 스냅샷이므로 버전을 비교하지 않음 (전환 뒤 문서 적재로 코퍼스 버전이 다시 바뀌어도 그대로 사용)
+            search_index = self._initialize_search_index(directory, collection, check_version=False)
+            sparse_index = (
+                self._initialize_sparse_index(directory, collection, check_version=False)
+                if self.sparse_index is not None else None
+            )
+            self._swap_index(version, directory, vectorstore, search_index, sparse_index)
+        logger.info(f"인덱스 버전 {version}(으)로 전환했습니다.")
+        return True
+    
+    def _start_index_watcher(self) -> None:
+        """INDEX_WATCH_INTERVAL_SECONDS마다 CURRENT 포인터를 확인하는 데몬 스레드 시작 (0이면 사용 안 함)"""
+        interval = float(os.getenv("INDEX_WATCH_INTERVAL_SECONDS", "5"))
+        if interval <= 0:
+            return
+        
+        def watch():
+            while not self._closed.wait(interval):
+                try:
+                    self.refresh_index()
+                except Exception as e:
+                    logger.error(f"인덱스 버전 전환 중 오류 발생 (현재 버전 유지): {str(e)}")
+        
+        threading.Thread(target=watch, name="index-watcher", daemon=True).start()
+    
+    def close(self) -> None:
+        """백그라운드 작업 중지 (인덱스 감시 스레드, 임베딩 마이크로 배처, CPU 실행기)"""
+        self._closed.set()
+        if self.micro_batcher is not None:
+            self.micro_batcher.close()
+        self.cpu_executor.shutdown(wait=False) 
\ No newline at end of file
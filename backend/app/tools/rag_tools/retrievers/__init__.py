@@ -2,6 +2,27 @@
 검색 관련 모듈
 """
 
-from .retriever import Retriever
+import importlib
 
-__all__ = ['Retriever'] 
\ No newline at end of file
+# 공개 이름은 처음 접근할 때 해당 모듈에서 임포트 (PEP 562, 상위 패키지와 같은 방식)
+_ATTRIBUTES = {
+    'BM25Index': '.sparse_index',
+    'KoreanTokenizer': '.sparse_index',
+    'ParallelMultiQueryRetriever': '.multi_query',
+    'Retriever': '.retriever',
+    'reciprocal_rank_fusion': '.fusion'
+}
+
+__all__ = list(_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name not in _ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
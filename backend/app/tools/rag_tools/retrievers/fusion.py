@@ -0,0 +1,29 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+RRF_K = 60  # RRF 상수 (Cormack et al. 2009 기본값)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]],
+    k: int = RRF_K,
+    weights: Optional[Sequence[float]] = None
+) -> List[Tuple[str, float]]:
+    """여러 순위 목록을 Reciprocal Rank Fusion으로 결합
+
+    점수 척도가 다른 검색기(BM25 점수, 벡터 거리)의 결과를 순위만으로 합친다.
+    score(d) = Σ weight_i / (k + rank_i(d)), rank는 1부터 시작
+
+    Args:
+        rankings: 검색기별 문서 ID 순위 목록 (앞쪽이 상위)
+        k: RRF 상수 (클수록 하위 순위의 영향이 커짐)
+        weights: 검색기별 가중치 (기본값: 모두 1.0)
+
+    Returns:
+        List[Tuple[str, float]]: 결합 점수 내림차순 (문서 ID, 점수) 목록
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,192 @@
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain.schema import Document
+from langchain_openai import ChatOpenAI
+
+from app.tools.rag_tools.caches.embedding_cache import embed_queries
+from app.tools.rag_tools.retrievers.fusion import RRF_K, reciprocal_rank_fusion
+from app.tools.rag_tools.splitters.context_block import get_content_hash
+from app.tools.rag_tools.utils.logger import get_logger
+from app.tools.rag_tools.vectorstores.vector_store import VectorStore
+
+logger = get_logger(__name__)
+
+DEFAULT_PROMPT_TEMPLATE = """다음 질문과 같은 정보를 찾을 수 있도록 표현을 바꾼 검색 질의를 {num_queries}개 작성하세요.
+한 줄에 하나씩, 번호나 설명 없이 질의만 작성하세요.
+
+질문: {question}"""
+
+_LIST_PREFIX = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+# 모든 다중 질의 검색기가 공유하는 검색 실행기 (인스턴스마다 스레드 풀을 만들지 않음)
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_slots: Optional[threading.BoundedSemaphore] = None
+_executor_lock = threading.Lock()
+
+
+def _search_executor() -> Tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    """공유 검색 실행기와 제출 한도 세마포어 (처음 호출 시 생성)
+
+    실행 중이거나 대기 중인 변형 검색은 MULTI_QUERY_MAX_PENDING(기본값: 작업자 수의 2배)개를 넘지 않는다.
+    """
+    global _executor, _executor_slots
+    with _executor_lock:
+        if _executor is None:
+            workers = int(os.getenv("MULTI_QUERY_WORKERS", "8"))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="multi-query")
+            _executor_slots = threading.BoundedSemaphore(int(os.getenv("MULTI_QUERY_MAX_PENDING") or workers * 2))
+        return _executor, _executor_slots
+
+
+def shutdown_search_executor() -> None:
+    """공유 검색 실행기 종료 (대기 중인 검색은 취소, 이후 호출 시 새로 생성)"""
+    global _executor, _executor_slots
+    with _executor_lock:
+        executor, _executor, _executor_slots = _executor, None, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def document_key(doc: Document) -> str:
+    """중복 제거용 문서 키 (article_id + 내용 해시, 같은 청크는 질의가 달라도 같은 키)"""
+    article_id = str(doc.metadata.get("article_id") or "")
+    return f"{article_id}:{get_content_hash(doc)}"
+
+
+class ParallelMultiQueryRetriever:
+    """병렬 다중 질의 검색기
+
+    LLM으로 만든 질의 변형(원 질의 포함)을 질의 임베딩 캐시에서 찾고, 캐시에 없는 변형만 한 번의 배치 임베딩으로
+    벡터화한 뒤 변형별 벡터 검색을 공유 실행기에서 동시에 실행하고 RRF로 결합하여 문서 키 기준으로 중복을 제거한다.
+    요청마다 timeout 기한을 하나 두고(임베딩 시간 포함) 그 안에 끝난 변형만 결합하므로,
+    느린 변형 하나가 전체 응답을 붙잡지 않는다.
+    기한을 넘긴 변형 중 아직 시작하지 않은 검색은 취소하고, 공유 실행기의 제출 한도가 가득 차면
+    기한 안에 자리가 나지 않은 변형은 제출하지 않는다 (시간 초과된 요청의 작업이 실행기를 채우지 않도록).
+    필터와 k는 호출 인자로만 받으므로 여러 스레드에서 하나의 인스턴스를 공유해도 된다.
+    (변형을 순서대로 임베딩/검색하는 MultiQueryRetriever와 달리 검색 단계 지연이 단일 검색에 가깝다)
+    """
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        llm: ChatOpenAI,
+        prompt_template: Optional[str] = None,
+        num_queries: int = 3,
+        k: int = 3,
+        timeout: Optional[float] = None,
+        include_original: bool = True
+    ):
+        """병렬 다중 질의 검색기 초기화
+
+        Args:
+            vector_store: 벡터 저장소
+            llm: 질의 변형 생성용 LLM
+            prompt_template: 질의 변형 생성 프롬프트 ({question}, {num_queries} 사용 가능)
+            num_queries: 생성할 질의 변형 수
+            k: 최종 반환 문서 수 (변형별로도 k개씩 검색)
+            timeout: 요청별 변형 검색 제한 시간(초) (기본값: MULTI_QUERY_TIMEOUT_SECONDS 또는 2)
+            include_original: 원 질의도 검색에 포함할지 여부
+        """
+        self.vector_store = vector_store
+        self.llm = llm
+        self.prompt_template = prompt_template or DEFAULT_PROMPT_TEMPLATE
+        self.num_queries = num_queries
+        self.k = k
+        self.timeout = timeout if timeout is not None else float(os.getenv("MULTI_QUERY_TIMEOUT_SECONDS", "2"))
+        self.include_original = include_original
+
+    def generate_queries(self, query: str) -> List[str]:
+        """LLM으로 질의 변형 생성 (번호/기호 제거, 중복 제거, 원 질의가 맨 앞)"""
+        prompt = self.prompt_template.format(question=query, num_queries=self.num_queries)
+        try:
+            lines = self.llm.invoke(prompt).content.splitlines()
+        except Exception as e:
+            logger.error(f"질의 변형 생성 중 오류 발생 (원 질의만 검색): {str(e)}")
+            lines = []
+        variants = [_LIST_PREFIX.sub("", line).strip() for line in lines]
+        variants = [variant for variant in variants if variant][:self.num_queries]
+        if self.include_original or not variants:
+            variants.insert(0, query)
+        return list(dict.fromkeys(variants))
+
+    def retrieve_variants(
+        self,
+        variants: List[str],
+        filter: Optional[Dict[str, Any]] = None,
+        k: Optional[int] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """질의 변형들을 배치 임베딩 후 공유 실행기에서 동시에 검색 (요청 기한 안에 끝난 변형의 결과만 반환)"""
+        k = k or self.k
+        deadline = time.monotonic() + self.timeout
+        embeddings = embed_queries(self.vector_store.embedding_model.model, variants)
+        executor, slots = _search_executor()
+        futures: List[Optional[Future]] = []
+        for embedding in embeddings:
+            if not slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                futures.append(None)
+                continue
+            try:
+                future = executor.submit(
+                    self.vector_store.similarity_search_by_vector_with_score, embedding, k, filter
+                )
+            except RuntimeError:
+                # 종료 중인 실행기
+                slots.release()
+                futures.append(None)
+                continue
+            future.add_done_callback(lambda _, slots=slots: slots.release())
+            futures.append(future)
+
+        submitted = [future for future in futures if future is not None]
+        done, not_done = wait(submitted, timeout=max(0.0, deadline - time.monotonic()))
+        for future in not_done:
+            future.cancel()
+        skipped = len(futures) - len(done)
+        if skipped:
+            logger.warning(f"질의 변형 {skipped}/{len(futures)}개가 {self.timeout}초 안에 끝나지 않아 제외합니다.")
+
+        results = []
+        for variant, future in zip(variants, futures):
+            if future is None or future not in done:
+                continue
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"질의 변형 '{variant}' 검색 중 오류 발생: {str(e)}")
+        return results
+
+    def get_relevant_documents(
+        self,
+        query: str,
+        filter: Optional[Dict[str, Any]] = None,
+        k: Optional[int] = None
+    ) -> List[Document]:
+        """다중 질의 검색 후 RRF로 결합한 상위 k개 문서
+
+        Args:
+            query: 검색 쿼리
+            filter: 필터 조건
+            k: 반환할 문서 수 (기본값: 생성 시 k)
+
+        Returns:
+            List[Document]: 검색된 문서 리스트 (문서 키 기준 중복 제거)
+        """
+        k = k or self.k
+        variants = self.generate_queries(query)
+        rankings = []
+        docs_by_key: Dict[str, Document] = {}
+        for docs_and_scores in self.retrieve_variants(variants, filter, k):
+            ranking = []
+            for doc, _ in docs_and_scores:
+                key = document_key(doc)
+                docs_by_key.setdefault(key, doc)
+                if key not in ranking:
+                    ranking.append(key)
+            rankings.append(ranking)
+        fused = reciprocal_rank_fusion(rankings, k=RRF_K)[:k]
+        return [docs_by_key[key] for key, _ in fused]
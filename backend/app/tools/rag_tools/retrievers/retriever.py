@@ -1,110 +1,161 @@
-from typing import List, Dict, Any, Optional
+import os
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional
 from langchain.schema import Document
-from langchain.retrievers import (
-    ContextualCompressionRetriever,
-    MultiQueryRetriever
-)
-from langchain.retrievers.document_compressors import LLMChainExtractor
 from langchain_openai import ChatOpenAI
+from ..chains.extractive_compressor import ExtractiveCompressor
 from ..vectorstores.vector_store import VectorStore
+from .multi_query import ParallelMultiQueryRetriever
+
+SEARCH_TYPES = ("similarity", "similarity_score_threshold", "mmr")
 
 class Retriever:
-    """검색기 클래스 (Chroma 기반)"""
+    """검색기 클래스 (Chroma 기반)
+    
+    동시성 계약:
+    - 생성과 설정(create_multi_query_retriever)을 마친 뒤에는 재진입 가능하며, 하나의 인스턴스를
+      여러 스레드/요청에서 공유해도 된다. 검색 메서드는 인스턴스 상태를 바꾸지 않는다.
+    - search_kwargs는 생성 시 고정되는 읽기 전용 기본값이다. 필터, k 등 요청별 옵션은
+      get_relevant_documents(query, filter=..., k=...)처럼 호출 인자로 넘기며,
+      기본값과 합친 새 dict로만 사용하므로 다른 요청으로 새지 않는다.
+    - 벡터 저장소와 압축기는 읽기 전용으로만 호출한다 (VectorStore의 동시성 계약 참고).
+    """
     
     def __init__(
         self,
         vector_store: VectorStore,
         llm: Optional[ChatOpenAI] = None,
         search_type: str = "similarity",
-        search_kwargs: Optional[Dict[str, Any]] = None
+        search_kwargs: Optional[Dict[str, Any]] = None,
+        compress: Optional[bool] = None
     ):
         """검색기 초기화
         
         Args:
             vector_store: 벡터 저장소 (Chroma 기반)
-            llm: LLM 모델 (컨텍스트 압축에 사용)
-            search_type: 검색 타입
-            search_kwargs: 검색 파라미터
+            llm: LLM 모델 (다중 쿼리 생성에 사용)
+            search_type: 검색 타입 ('similarity', 'similarity_score_threshold', 'mmr')
+            search_kwargs: 기본 검색 파라미터 (k, filter, score_threshold, fetch_k, lambda_mult)
+            compress: 임베딩 기반 추출형 컨텍스트 압축 사용 여부 (기본값: CONTEXT_COMPRESSION_ENABLED 또는 False)
         """
+        if search_type not in SEARCH_TYPES:
+            raise ValueError(f"지원하지 않는 검색 타입입니다: {search_type}")
         self.vector_store = vector_store
         self.llm = llm
         self.search_type = search_type
-        self.search_kwargs = search_kwargs or {"k": 3}
+        self.search_kwargs: Mapping[str, Any] = MappingProxyType(dict(search_kwargs or {"k": 3}))
         
-        # 기본 검색기
-        self.base_retriever = vector_store.vector_store.as_retriever(
-            search_type=search_type,
-            search_kwargs=search_kwargs
-        )
+        # 다중 쿼리 검색기 (create_multi_query_retriever로 설정)
+        self.multi_query: Optional[ParallelMultiQueryRetriever] = None
         
-        # 컨텍스트 압축 검색기 (LLM이 제공된 경우)
-        if llm is not None:
-            compressor = LLMChainExtractor.from_llm(llm)
-            self.retriever = ContextualCompressionRetriever(
-                base_compressor=compressor,
-                base_retriever=self.base_retriever
+        # 컨텍스트 압축기 (문서별 LLM 호출 대신 검색에 쓰는 임베딩 모델로 관련 문장만 추출)
+        if compress is None:
+            compress = os.getenv("CONTEXT_COMPRESSION_ENABLED", "false").lower() == "true"
+        self.compressor = ExtractiveCompressor(vector_store.embedding_model.model) if compress else None
+    
+    def _call_kwargs(
+        self,
+        filter: Optional[Dict[str, Any]] = None,
+        k: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """기본 search_kwargs에 호출별 옵션을 덮어쓴 새 dict (공유 상태는 바꾸지 않음)"""
+        kwargs = dict(self.search_kwargs)
+        kwargs.setdefault("k", 3)
+        if filter is not None:
+            kwargs["filter"] = filter
+        if k is not None:
+            kwargs["k"] = k
+        return kwargs
+    
+    def _search(self, query: str, kwargs: Dict[str, Any]) -> List[Document]:
+        """검색 타입에 따라 문서 검색"""
+        if self.multi_query is not None:
+            return self.multi_query.get_relevant_documents(query, filter=kwargs.get("filter"), k=kwargs["k"])
+        if self.search_type == "mmr":
+            return self.vector_store.max_marginal_relevance_search(
+                query,
+                k=kwargs["k"],
+                fetch_k=kwargs.get("fetch_k", 20),
+                lambda_mult=kwargs.get("lambda_mult", 0.5),
+                filter=kwargs.get("filter")
             )
-        else:
-            self.retriever = self.base_retriever
+        if self.search_type == "similarity_score_threshold":
+            threshold = kwargs.get("score_threshold", 0.0)
+            return [
+                doc for doc, score in self.vector_store.similarity_search_with_relevance_scores(
+                    query, k=kwargs["k"], filter=kwargs.get("filter")
+                )
+                if score >= threshold
+            ]
+        return self.vector_store.similarity_search(query, k=kwargs["k"], filter=kwargs.get("filter"))
     
     def get_relevant_documents(
         self,
         query: str,
-        filter: Optional[Dict[str, Any]] = None
+        filter: Optional[Dict[str, Any]] = None,
+        k: Optional[int] = None
     ) -> List[Document]:
         """관련 문서 검색
         
         Args:
             query: 검색 쿼리
-            filter: 필터 조건
-            
+            filter: 필터 조건 (이 호출에만 적용)
+            k: 반환할 문서 수 (이 호출에만 적용, 기본값: search_kwargs의 k)
+        
         Returns:
             List[Document]: 검색된 문서 리스트
         """
-        if filter is not None:
-            self.search_kwargs["filter"] = filter
-            
-        return self.retriever.get_relevant_documents(query)
+        docs = self._search(query, self._call_kwargs(filter, k))
+        if self.compressor is not None:
+            docs = self.compressor.compress_documents(docs, query)
+        return docs
     
     def get_relevant_documents_with_scores(
         self,
         query: str,
-        filter: Optional[Dict[str, Any]] = None
+        filter: Optional[Dict[str, Any]] = None,
+        k: Optional[int] = None
     ) -> List[tuple[Document, float]]:
         """점수가 포함된 관련 문서 검색
         
         Args:
             query: 검색 쿼리
-            filter: 필터 조건
-            
+            filter: 필터 조건 (이 호출에만 적용)
+            k: 반환할 문서 수 (이 호출에만 적용, 기본값: search_kwargs의 k)
+        
         Returns:
             List[tuple[Document, float]]: (문서, 점수) 튜플 리스트
         """
-        if filter is not None:
-            self.search_kwargs["filter"] = filter
-            
+        kwargs = self._call_kwargs(filter, k)
         return self.vector_store.similarity_search_with_score(
             query=query,
-            **self.search_kwargs
+            k=kwargs["k"],
+            filter=kwargs.get("filter")
         )
     
     def create_multi_query_retriever(
         self,
-        prompt_template: str,
-        num_queries: int = 3
+        prompt_template: Optional[str] = None,
+        num_queries: int = 3,
+        timeout: Optional[float] = None
     ) -> None:
-        """다중 쿼리 검색기 생성
+        """다중 쿼리 검색기 생성 (질의 변형별 임베딩/검색을 공유 실행기에서 병렬 실행, RRF 결합)
+        
+        검색기를 여러 스레드에서 공유하기 전에 호출해야 한다.
         
         Args:
-            prompt_template: 쿼리 생성 프롬프트 템플릿
+            prompt_template: 쿼리 생성 프롬프트 템플릿 ({question}, {num_queries} 사용 가능)
             num_queries: 생성할 쿼리 수
+            timeout: 요청별 변형 검색 제한 시간(초) (기본값: MULTI_QUERY_TIMEOUT_SECONDS 또는 2)
         """
         if self.llm is None:
             raise ValueError("LLM이 초기화되지 않았습니다.")
-            
-        self.retriever = MultiQueryRetriever.from_llm(
-            retriever=self.base_retriever,
+        
+        self.multi_query = ParallelMultiQueryRetriever(
+            vector_store=self.vector_store,
             llm=self.llm,
             prompt_template=prompt_template,
-            num_queries=num_queries
-        ) 
\ No newline at end of file
+            num_queries=num_queries,
+            k=self.search_kwargs.get("k", 3),
+            timeout=timeout
+        )
@@ -0,0 +1,270 @@
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+from app.tools.rag_tools.utils.logger import get_logger
+from app.tools.rag_tools.vectorstores.numpy_store import build_metadata_masks, metadata_filter_mask
+
+logger = get_logger(__name__)
+
+WORD_PATTERN = re.compile(r'[0-9a-z가-힣]+')
+
+
+def ngram_tokenize(text: str) -> List[str]:
+    """문자 n-gram 토큰화
+
+    영문/숫자/한글 연속 구간(단어)마다 단어 전체와 문자 2-gram, 3-gram을 토큰으로 만든다.
+    조사가 붙은 형태('탄소검증제란')나 띄어쓰기가 다른 질의도 n-gram이 겹치고,
+    'RE100', 'REC', 'ESS' 같은 용어는 단어 전체 토큰으로 정확히 일치한다.
+    """
+    tokens = []
+    for word in WORD_PATTERN.findall(unicodedata.normalize('NFC', text).lower()):
+        tokens.append(word)
+        for n in (2, 3):
+            if n < len(word):
+                tokens.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return tokens
+
+
+class KoreanTokenizer:
+    """BM25 색인/질의용 한국어 토크나이저
+
+    'ngram'(기본값): 의존성 없는 문자 2/3-gram
+    'mecab': konlpy Mecab 형태소 + 영문/숫자 단어 (설치되어 있지 않으면 ngram으로 대체)
+    """
+
+    def __init__(self, kind: Optional[str] = None):
+        self.kind = kind or os.getenv("BM25_TOKENIZER", "ngram")
+        self._mecab = None
+        if self.kind == "mecab":
+            try:
+                from konlpy.tag import Mecab
+                self._mecab = Mecab()
+            except Exception as e:
+                logger.warning(f"Mecab을 사용할 수 없어 n-gram 토크나이저로 대체합니다: {str(e)}")
+                self.kind = "ngram"
+
+    def __call__(self, text: str) -> List[str]:
+        if self._mecab is None:
+            return ngram_tokenize(text)
+        normalized = unicodedata.normalize('NFC', text).lower()
+        morphs = [m for m in self._mecab.morphs(normalized) if WORD_PATTERN.fullmatch(m)]
+        return morphs + re.findall(r'[0-9a-z]+', normalized)
+
+
+class BM25Index:
+    """배열 기반 역색인 BM25 검색기
+
+    포스팅은 CSR 형태의 NumPy 배열로 보관한다.
+    - offsets[t]:offsets[t+1] 구간이 용어 t의 포스팅
+    - postings_doc (int32): 문서 행 번호, postings_tf (uint16): 용어 빈도
+    - doc_len (float32), idf (float32)
+    질의 시 용어별 포스팅 구간만 벡터 연산으로 점수에 더하므로 문서 수가 늘어도 파이썬 루프가 늘지 않는다.
+
+    스냅샷 파일:
+    - {collection_name}.npz: offsets, postings_doc, postings_tf, doc_len, idf
+    - {collection_name}.json: vocab, ids, documents, metadatas, tokenizer, corpus_version
+    """
+
+    def __init__(self, path: str, collection_name: str, k1: float = 1.5, b: float = 0.75):
+        """저장된 색인 로드 (없으면 빈 색인)
+
+        Args:
+            path: 색인 디렉토리
+            collection_name: 컬렉션 이름
+            k1: BM25 용어 빈도 포화 계수
+            b: BM25 문서 길이 정규화 계수
+        """
+        self.path = path
+        self.collection_name = collection_name
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self.vocab: Dict[str, int] = {}
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.corpus_version = ""
+        self.tokenizer = KoreanTokenizer()
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.postings_doc = np.zeros(0, dtype=np.int32)
+        self.postings_tf = np.zeros(0, dtype=np.uint16)
+        self.doc_len = np.zeros(0, dtype=np.float32)
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.avgdl = 0.0
+        self._masks: Dict[Tuple[str, Any], np.ndarray] = {}
+        self.load()
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.path, f"{self.collection_name}.json")
+
+    @property
+    def arrays_path(self) -> str:
+        return os.path.join(self.path, f"{self.collection_name}.npz")
+
+    @property
+    def count(self) -> int:
+        """색인된 문서 수"""
+        return len(self.ids)
+
+    def load(self) -> None:
+        """색인 파일 로드"""
+        if not (os.path.exists(self.meta_path) and os.path.exists(self.arrays_path)):
+            return
+        with open(self.meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with np.load(self.arrays_path) as arrays:
+            offsets = arrays["offsets"]
+            postings_doc = arrays["postings_doc"]
+            postings_tf = arrays["postings_tf"]
+            doc_len = arrays["doc_len"]
+            idf = arrays["idf"]
+        with self._lock:
+            self.vocab = {term: i for i, term in enumerate(meta["vocab"])}
+            self.ids = meta["ids"]
+            self.documents = meta["documents"]
+            self.metadatas = meta["metadatas"]
+            self.corpus_version = meta.get("corpus_version", "")
+            self.tokenizer = KoreanTokenizer(meta.get("tokenizer"))
+            self.offsets = offsets
+            self.postings_doc = postings_doc
+            self.postings_tf = postings_tf
+            self.doc_len = doc_len
+            self.idf = idf
+            self.avgdl = float(doc_len.mean()) if len(doc_len) else 0.0
+            self._masks = build_metadata_masks(self.metadatas)
+        logger.info(f"BM25 색인을 로드했습니다: {self.meta_path} ({len(self.ids)}개 문서, {len(self.vocab)}개 용어)")
+
+    @classmethod
+    def build(
+        cls,
+        path: str,
+        collection_name: str,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        metadatas: Sequence[Optional[Dict[str, Any]]],
+        corpus_version: str = "",
+        tokenizer: Optional[KoreanTokenizer] = None
+    ) -> "BM25Index":
+        """문서를 토큰화하여 색인 파일로 저장하고 로드한 색인 반환"""
+        tokenizer = tokenizer or KoreanTokenizer()
+        vocab: Dict[str, int] = {}
+        term_ids: List[int] = []
+        doc_rows: List[int] = []
+        tfs: List[int] = []
+        doc_len = np.zeros(len(documents), dtype=np.float32)
+        for row, text in enumerate(documents):
+            tokens = tokenizer(text or "")
+            doc_len[row] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_rows.append(row)
+                tfs.append(min(tf, np.iinfo(np.uint16).max))
+
+        term_array = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_array, kind='stable')
+        df = np.bincount(term_array, minlength=len(vocab))
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=offsets[1:])
+        n_docs = len(documents)
+        idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        os.makedirs(path, exist_ok=True)
+        arrays_path = os.path.join(path, f"{collection_name}.npz")
+        meta_path = os.path.join(path, f"{collection_name}.json")
+        tmp_arrays = os.path.join(path, f"{collection_name}.{os.getpid()}.tmp.npz")
+        np.savez(
+            tmp_arrays,
+            offsets=offsets,
+            postings_doc=np.asarray(doc_rows, dtype=np.int32)[order],
+            postings_tf=np.asarray(tfs, dtype=np.uint16)[order],
+            doc_len=doc_len,
+            idf=idf
+        )
+        meta = {
+            "vocab": list(vocab.keys()),
+            "ids": list(ids),
+            "documents": list(documents),
+            "metadatas": [metadata or {} for metadata in metadatas],
+            "tokenizer": tokenizer.kind,
+            "corpus_version": corpus_version
+        }
+        tmp_meta = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_arrays, arrays_path)
+        os.replace(tmp_meta, meta_path)
+        logger.info(f"BM25 색인을 생성했습니다: {n_docs}개 문서, {len(vocab)}개 용어, {len(doc_rows)}개 포스팅")
+        return cls(path, collection_name)
+
+    @classmethod
+    def from_chroma(cls, collection, path: str, collection_name: str, corpus_version: str = "") -> "BM25Index":
+        """Chroma 컬렉션 전체로 색인 생성"""
+        data = collection.get(include=["documents", "metadatas"])
+        return cls.build(path, collection_name, data["ids"], data["documents"], data["metadatas"], corpus_version)
+
+    def scores(self, query: str) -> np.ndarray:
+        """모든 문서의 BM25 점수"""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        if not self.ids:
+            return scores
+        for term in set(self.tokenizer(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            rows = self.postings_doc[start:end]
+            tf = self.postings_tf[start:end].astype(np.float32)
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_len[rows] / self.avgdl)
+            scores[rows] += self.idf[term_id] * tf * (self.k1 + 1.0) / (tf + norm)
+        return scores
+
+    def search(self, query: str, k: int = 10, filter: Optional[Dict[str, Any]] = None) -> List[Tuple[int, float]]:
+        """BM25 상위 k개 (문서 행 번호, 점수) 목록 (점수가 0인 문서는 제외)"""
+        scores = self.scores(query)
+        mask = metadata_filter_mask(filter, self.metadatas, self._masks)
+        if mask is not None:
+            scores[~mask] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        return [(int(row), float(scores[row])) for row in candidates]
+
+    def document(self, row: int) -> Document:
+        """행 번호의 문서"""
+        return Document(page_content=self.documents[row], metadata=dict(self.metadatas[row]))
+
+
+def test_bm25_index():
+    """BM25Index 테스트"""
+    import tempfile
+
+    documents = [
+        "제목: RE100이란?\n내용: 기업이 사용하는 전력의 100%를 재생에너지로 충당하는 캠페인입니다.",
+        "제목: REC 발급 절차\n내용: 신재생에너지 공급인증서(REC)는 설비 확인 후 발급됩니다.",
+        "제목: 탄소검증제 안내\n내용: 태양광 모듈의 탄소배출량을 검증하는 제도입니다.",
+        "제목: ESS·EMS 지원사업\n내용: 에너지저장장치와 에너지관리시스템 보급을 지원합니다.",
+    ]
+    print(f"토큰 예시: {ngram_tokenize('탄소검증제란?')}")
+    with tempfile.TemporaryDirectory() as path:
+        index = BM25Index.build(
+            path, "test", [str(i) for i in range(len(documents))], documents,
+            [{"source": "knrec_faq"} for _ in documents]
+        )
+        for query in ["RE100", "REC 발급", "탄소검증제란", "ESS"]:
+            results = index.search(query, k=2)
+            print(f"{query}: {[(index.documents[row][:15], round(score, 3)) for row, score in results]}")
+
+
+if __name__ == "__main__":
+    test_bm25_index()
@@ -2,7 +2,28 @@
 텍스트 분할 및 전처리 관련 모듈
 """
 
-from .text_splitter import TextSplitter
-from .text_preprocessor import KoreanTextPreprocessor, FAQPreprocessor
+import importlib
 
-__all__ = ['TextSplitter', 'KoreanTextPreprocessor', 'FAQPreprocessor'] 
\ No newline at end of file
+# 공개 이름은 처음 접근할 때 해당 모듈에서 임포트 (PEP 562, 상위 패키지와 같은 방식)
+_ATTRIBUTES = {
+    'TextSplitter': '.text_splitter',
+    'KoreanTextPreprocessor': '.text_preprocessor',
+    'FAQPreprocessor': '.text_preprocessor',
+    'attach_context_block': '.context_block',
+    'build_context_block': '.context_block',
+    'count_tokens': '.context_block'
+}
+
+__all__ = list(_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name not in _ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
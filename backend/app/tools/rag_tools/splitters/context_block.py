@@ -0,0 +1,100 @@
+"""
+인덱싱 시점 컨텍스트 블록 전처리
+검색된 청크를 프롬프트에 넣기 전에 하던 정리(불완전 문장 제거)와 토큰 수 계산을 적재 시 한 번만 수행
+"""
+
+import hashlib
+from typing import Any, Dict, Optional
+
+from langchain.schema import Document
+
+from app.tools.rag_tools.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CONTEXT_BLOCK_KEY = "context_block"
+CONTEXT_TOKENS_KEY = "context_tokens"
+CONTENT_HASH_KEY = "content_hash"
+INTERNAL_METADATA_KEYS = frozenset({CONTEXT_BLOCK_KEY, CONTEXT_TOKENS_KEY, CONTENT_HASH_KEY})
+TOKENIZER_MODEL = "gpt-4o"
+
+_encoding = None
+
+
+def build_context_block(content: str) -> str:
+    """청크 내용을 프롬프트용 컨텍스트 블록으로 정리
+
+    '.' 기준으로 문장을 나눠 10자 이하이거나 '...'로 끝나는 문장을 버리고 다시 잇는다.
+    내용 전체가 '...'로 끝나거나 남는 문장이 없으면 빈 문자열을 반환한다.
+    """
+    cleaned_content = content.strip()
+    if not cleaned_content or cleaned_content.endswith('...'):
+        return ""
+    valid_sentences = []
+    for sentence in cleaned_content.split('.'):
+        sentence = sentence.strip()
+        if sentence and not sentence.endswith('...') and len(sentence) > 10:
+            valid_sentences.append(sentence)
+    if not valid_sentences:
+        return ""
+    return '. '.join(valid_sentences) + '.'
+
+
+def content_hash(content: str) -> str:
+    """중복 제거용 내용 해시 (앞뒤 공백 무시)"""
+    return hashlib.sha256(content.strip().encode('utf-8')).hexdigest()[:32]
+
+
+def count_tokens(text: str) -> int:
+    """LLM 토크나이저 기준 토큰 수 (tiktoken이 없으면 글자 수 기반 추정)"""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            try:
+                _encoding = tiktoken.encoding_for_model(TOKENIZER_MODEL)
+            except KeyError:
+                _encoding = tiktoken.get_encoding("o200k_base")
+        except ImportError:
+            logger.warning("tiktoken이 설치되지 않아 글자 수로 토큰 수를 추정합니다.")
+            _encoding = False
+    if _encoding is False:
+        # 한국어는 대략 글자 2개당 토큰 1개
+        return (len(text) + 1) // 2
+    return len(_encoding.encode(text))
+
+
+def attach_context_block(doc: Document) -> Document:
+    """문서 메타데이터에 컨텍스트 블록, 토큰 수, 내용 해시를 기록 (제자리 수정)"""
+    block = build_context_block(doc.page_content)
+    doc.metadata[CONTEXT_BLOCK_KEY] = block
+    doc.metadata[CONTEXT_TOKENS_KEY] = count_tokens(block) if block else 0
+    doc.metadata[CONTENT_HASH_KEY] = content_hash(doc.page_content)
+    return doc
+
+
+def get_context_block(doc: Document) -> str:
+    """저장된 컨텍스트 블록 (메타데이터가 없는 이전 적재 문서는 즉시 계산)"""
+    block: Optional[str] = doc.metadata.get(CONTEXT_BLOCK_KEY)
+    if block is None:
+        block = build_context_block(doc.page_content)
+    return block
+
+
+def get_content_hash(doc: Document) -> str:
+    """저장된 내용 해시 (없으면 즉시 계산)"""
+    return doc.metadata.get(CONTENT_HASH_KEY) or content_hash(doc.page_content)
+
+
+def public_metadata(doc: Document) -> Dict[str, Any]:
+    """API 응답용 메타데이터 (적재 시 기록한 내부 전처리 키 제외)"""
+    return {key: value for key, value in doc.metadata.items() if key not in INTERNAL_METADATA_KEYS}
+
+
+def get_context_tokens(doc: Document) -> int:
+    """저장된 컨텍스트 블록 토큰 수 (없으면 즉시 계산)"""
+    tokens = doc.metadata.get(CONTEXT_TOKENS_KEY)
+    if tokens is None:
+        block = get_context_block(doc)
+        tokens = count_tokens(block) if block else 0
+    return tokens
@@ -5,7 +5,6 @@ RAG 시스템을 위한 텍스트 전처리 모듈
 
 import re
 import json
-import pandas as pd
 from typing import List, Dict, Tuple
 from pathlib import Path
 import html
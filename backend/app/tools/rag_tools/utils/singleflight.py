@@ -0,0 +1,113 @@
+"""
+동일 요청 병합 (Single-flight)
+같은 키로 동시에 들어온 요청은 하나의 계산만 실행하고 결과를 공유
+"""
+
+import asyncio
+import hashlib
+import re
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.metrics import metrics
+
+
+def make_query_key(query: str, history: Optional[str] = None, *parts: Any) -> str:
+    """정규화한 질의 텍스트 + 히스토리 해시로 병합 키 생성"""
+    normalized = re.sub(r'\s+', ' ', query).strip().lower()
+    history_hash = hashlib.sha1((history or "").encode('utf-8')).hexdigest()[:16]
+    suffix = ":".join(str(part) for part in parts)
+    return f"{normalized}|{history_hash}|{suffix}"
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """진행 중인 동일 요청 병합기
+
+    첫 호출자(leader)만 계산을 실행하고, 계산이 끝나기 전에 같은 키로 들어온 호출자는
+    그 결과(또는 예외)를 그대로 돌려받는다. 계산이 끝나면 키는 바로 제거되므로 결과를 캐시하지는 않는다.
+    동기 경로(do)는 스레드 간, 비동기 경로(ado)는 같은 이벤트 루프의 코루틴 간에 병합한다.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[str, "asyncio.Future[Any]"] = {}
+        self._executed = 0
+        self._collapsed = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """동기 호출 병합"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._collapsed += 1
+                metrics.inc("rag_cache_hits_total", (self.name,))
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._executed += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """비동기 호출 병합
+
+        계산은 별도 태스크로 실행하고 모든 호출자는 shield로 기다리므로,
+        한 호출자가 취소되어도 다른 호출자가 기다리는 계산은 계속 진행된다.
+        """
+        task = self._tasks.get(key)
+        if task is not None:
+            self._collapsed += 1
+            metrics.inc("rag_cache_hits_total", (self.name,))
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(fn())
+        self._tasks[key] = task
+        self._executed += 1
+        task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return await asyncio.shield(task)
+
+    @property
+    def collapsed(self) -> int:
+        """다른 호출의 결과를 공유한 호출 수"""
+        return self._collapsed
+
+    def stats(self) -> Dict[str, Any]:
+        """병합 통계 반환"""
+        total = self._executed + self._collapsed
+        return {
+            "name": self.name,
+            "executed": self._executed,
+            "collapsed": self._collapsed,
+            "in_flight": len(self._calls) + len(self._tasks),
+            "collapse_ratio": self._collapsed / total if total else 0.0
+        }
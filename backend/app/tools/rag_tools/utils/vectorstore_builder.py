@@ -6,15 +6,19 @@ FAQ 데이터를 로드하여 벡터스토어를 생성하는 도구 (Chroma 기
 
 import json
 import os
+import time
 from typing import List, Dict, Any
 from ..rag_pipeline import RAGPipeline
 
-def create_faq_vectorstore(data_path: str = None, embedding_type: str = None):
+SMOKE_QUERIES = ["탄소검증제", "REC 발급"]  # 재구축 후 교체 전 검증 질의
+
+def create_faq_vectorstore(data_path: str = None, embedding_type: str = None, rebuild: bool = False):
     """FAQ 벡터스토어 생성 (Chroma 기반)
     
     Args:
         data_path: FAQ 데이터 파일 경로 (기본값: 자동 탐지)
         embedding_type: 임베딩 유형 (기본값: None)
+        rebuild: True이면 새 인덱스 버전으로 무중단 재구축, False이면 활성 인덱스에 변경분만 upsert
     """
     if data_path is None:
         # 자동으로 최신 FAQ 데이터 파일 찾기
@@ -58,34 +62,38 @@ def create_faq_vectorstore(data_path: str = None, embedding_type: str = None):
     
     print("💾 벡터스토어에 저장 중...")
     
-    # 문서 로드 및 벡터스토어에 저장
-    rag.load_documents(documents)
+    # 문서 로드 및 벡터스토어에 저장 (내용이 바뀌지 않은 FAQ는 캐시된 임베딩 재사용)
+    started = time.perf_counter()
+    if rebuild:
+        stats = rag.rebuild_vectorstore(documents, smoke_queries=SMOKE_QUERIES)
+        print(f"🔀 활성 인덱스 버전: {stats['previous_version'] or '(루트)'} → {stats['version']}")
+        if stats['removed_versions']:
+            print(f"🗑️ 삭제한 이전 버전: {', '.join(stats['removed_versions'])}")
+    else:
+        stats = rag.load_documents(documents)
     
-    print("✅ FAQ 벡터스토어 생성 완료!")
+    print(f"✅ FAQ 벡터스토어 생성 완료! ({time.perf_counter() - started:.1f}초)")
+    print(f"   추가 {stats['added']}개, 갱신 {stats['updated']}개, 유지 {stats['unchanged']}개, 삭제 {stats['deleted']}개")
+    print(f"   임베딩 캐시 적중 {stats['cache_hits']}개, 새로 임베딩 {stats['embedded']}개")
     
     return rag
 
 def rebuild_vectorstore():
-    """Chroma 벡터스토어 재구축 (OpenAI, HuggingFace 모두)"""
-    print("🔄 Chroma 벡터스토어 재구축 시작...")
+    """Chroma 벡터스토어 무중단 재구축 (OpenAI, HuggingFace 모두)
     
-    # 기존 벡터스토어 삭제
-    openai_path = "./data/vectorstores/openai"
-    huggingface_path = "./data/vectorstores/huggingface"
-    for vectorstore_path in [openai_path, huggingface_path]:
-        if os.path.exists(vectorstore_path):
-            import shutil
-            shutil.rmtree(vectorstore_path)
-            print(f"🗑️ 기존 {vectorstore_path} 벡터스토어 삭제 완료")
+    활성 인덱스를 지우지 않고 새 버전 디렉토리에 만든 뒤 검증을 통과하면 교체하므로,
+    재구축 중에도 실행 중인 API 워커는 이전 버전으로 계속 응답한다.
+    """
+    print("🔄 Chroma 벡터스토어 재구축 시작...")
     
     # OpenAI 임베딩용 벡터스토어 생성
     print("\n[OpenAI 임베딩] 벡터스토어 생성...")
-    rag_openai = create_faq_vectorstore(embedding_type='openai')
+    rag_openai = create_faq_vectorstore(embedding_type='openai', rebuild=True)
     print("✅ OpenAI 임베딩 벡터스토어 생성 완료!")
     
     # HuggingFace 임베딩용 벡터스토어 생성
     print("\n[HuggingFace 임베딩] 벡터스토어 생성...")
-    rag_hf = create_faq_vectorstore(embedding_type='huggingface')
+    rag_hf = create_faq_vectorstore(embedding_type='huggingface', rebuild=True)
     print("✅ HuggingFace 임베딩 벡터스토어 생성 완료!")
     
     print("\n🧪 테스트 검색 (OpenAI 임베딩)...")
@@ -2,6 +2,26 @@
 RAG 시스템용 벡터 저장소 모듈
 """
 
-from .vector_store import VectorStore
+import importlib
 
-__all__ = ['VectorStore'] 
\ No newline at end of file
+# 공개 이름은 처음 접근할 때 해당 모듈에서 임포트 (PEP 562, 상위 패키지와 같은 방식)
+_ATTRIBUTES = {
+    'hnsw_metadata': '.hnsw_config',
+    'IndexVersionManager': '.index_versions',
+    'NumpyVectorStore': '.numpy_store',
+    'VectorStore': '.vector_store'
+}
+
+__all__ = list(_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name not in _ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
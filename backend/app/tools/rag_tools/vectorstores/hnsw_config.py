@@ -0,0 +1,87 @@
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+HNSW_SPACES = ("l2", "cosine", "ip")
+DEFAULT_SPACE = "l2"  # Chroma 기본 거리 함수 (hnsw:space가 없는 기존 컬렉션)
+
+
+def hnsw_metadata(
+    space: Optional[str] = None,
+    M: Optional[int] = None,
+    construction_ef: Optional[int] = None,
+    search_ef: Optional[int] = None
+) -> Dict[str, Any]:
+    """Chroma 컬렉션 생성용 HNSW 메타데이터
+
+    인자가 없으면 CHROMA_HNSW_SPACE / CHROMA_HNSW_M / CHROMA_HNSW_CONSTRUCTION_EF / CHROMA_HNSW_SEARCH_EF를 사용하고,
+    그마저 비어 있는 값은 넣지 않아 Chroma 기본값(l2, M=16, construction_ef=100, search_ef=10)을 따른다.
+    HNSW 파라미터는 컬렉션을 만들 때만 적용되므로 바꾼 값은 인덱스 재구축 시 반영된다.
+
+    Args:
+        space: 거리 함수 'l2', 'cosine', 'ip'
+        M: 노드당 최대 이웃 수 (클수록 recall과 메모리 증가)
+        construction_ef: 색인 구축 시 후보 목록 크기 (클수록 구축이 느리고 그래프 품질 향상)
+        search_ef: 검색 시 후보 목록 크기 (클수록 recall 증가, 지연 시간 증가)
+
+    Returns:
+        Dict[str, Any]: collection_metadata (예: {"hnsw:space": "cosine", "hnsw:M": 32})
+    """
+    space = space or os.getenv("CHROMA_HNSW_SPACE", "")
+    if space and space not in HNSW_SPACES:
+        raise ValueError(f"지원하지 않는 HNSW 거리 함수입니다: {space} (지원: {', '.join(HNSW_SPACES)})")
+    params = {
+        "hnsw:space": space,
+        "hnsw:M": M or os.getenv("CHROMA_HNSW_M", ""),
+        "hnsw:construction_ef": construction_ef or os.getenv("CHROMA_HNSW_CONSTRUCTION_EF", ""),
+        "hnsw:search_ef": search_ef or os.getenv("CHROMA_HNSW_SEARCH_EF", ""),
+    }
+    return {
+        key: value if key == "hnsw:space" else int(value)
+        for key, value in params.items() if value
+    }
+
+
+def collection_space(collection) -> str:
+    """Chroma 컬렉션의 거리 함수 (메타데이터에 없으면 l2)"""
+    return (collection.metadata or {}).get("hnsw:space", DEFAULT_SPACE)
+
+
+def distance_to_similarity(distance: float, space: str = DEFAULT_SPACE) -> float:
+    """거리를 0~1 유사도 점수로 변환
+
+    정규화 임베딩에서 제곱 L2 = 2 - 2·cos 이므로 cosine/ip 거리(1 - cos)는 2배 해서 제곱 L2로 맞춘 뒤
+    1 / (1 + d)로 변환한다. 거리 함수와 관계없이 같은 문서에 같은 점수가 나오므로
+    SIMILARITY_THRESHOLD 등 기존 임계값을 그대로 쓸 수 있다.
+    """
+    if space != "l2":
+        distance = 2 * distance
+    return 1 / (1 + distance)
+
+
+def vector_distance(query: np.ndarray, vector: np.ndarray, space: str = DEFAULT_SPACE) -> float:
+    """Chroma와 같은 정의의 두 벡터 간 거리 (l2: 제곱 L2, cosine: 1 - cos, ip: 1 - 내적)"""
+    if space == "l2":
+        diff = vector - query
+        return float(diff @ diff)
+    if space == "cosine":
+        norm = float(np.linalg.norm(query) * np.linalg.norm(vector)) or 1.0
+        return 1.0 - float(query @ vector) / norm
+    return 1.0 - float(query @ vector)
+
+
+def test_hnsw_config():
+    """HNSW 설정/거리 변환 테스트"""
+    print(f"기본 메타데이터: {hnsw_metadata()}")
+    print(f"cosine, M=32: {hnsw_metadata(space='cosine', M=32, search_ef=64)}")
+
+    rng = np.random.default_rng(0)
+    query, vector = rng.normal(size=(2, 8)).astype(np.float32)
+    query, vector = query / np.linalg.norm(query), vector / np.linalg.norm(vector)
+    scores = {space: distance_to_similarity(vector_distance(query, vector, space), space) for space in HNSW_SPACES}
+    print(f"거리 함수별 유사도 (정규화 벡터에서 같아야 함): {scores}")
+
+
+if __name__ == "__main__":
+    test_hnsw_config()
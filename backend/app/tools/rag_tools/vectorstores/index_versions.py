@@ -0,0 +1,157 @@
+import os
+import shutil
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+from app.tools.rag_tools.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+RETIRED_FILE = "RETIRED"
+
+
+class IndexVersionManager:
+    """블루/그린 벡터 인덱스 버전 관리
+
+    재구축은 {root}/versions/{version}/ 새 디렉토리에 인덱스 전체(Chroma, NumPy/BM25 스냅샷)를 만들고,
+    검증이 끝나면 {root}/CURRENT 파일을 원자적으로 교체(os.replace)해 활성 버전을 바꾼다.
+    실행 중인 워커는 CURRENT를 주기적으로 확인해 새 버전을 열고 참조를 교체하며,
+    이전 버전 객체로 진행 중이던 질의는 그대로 끝난다.
+    교체된 버전은 RETIRED 시각을 기록해 두고, 유예 시간이 지난 뒤 최근 keep개를 제외하고 삭제한다.
+
+    CURRENT가 없으면 이전처럼 루트 디렉토리 자체를 인덱스로 사용한다 (기존 배치와 호환).
+    """
+
+    def __init__(self, root: str):
+        """버전 관리자 초기화
+
+        Args:
+            root: 인덱스 루트 디렉토리 (예: data/vectorstores/huggingface)
+        """
+        self.root = root
+
+    @property
+    def current_path(self) -> str:
+        return os.path.join(self.root, CURRENT_FILE)
+
+    @property
+    def versions_path(self) -> str:
+        return os.path.join(self.root, VERSIONS_DIR)
+
+    def version_path(self, version: str) -> str:
+        """버전 디렉토리 경로"""
+        return os.path.join(self.versions_path, version)
+
+    def current(self) -> Optional[str]:
+        """활성 버전 (CURRENT가 없으면 None)"""
+        try:
+            with open(self.current_path, 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def active_directory(self) -> str:
+        """활성 버전 디렉토리 (CURRENT가 없거나 가리키는 디렉토리가 없으면 루트)"""
+        version = self.current()
+        if version and os.path.isdir(self.version_path(version)):
+            return self.version_path(version)
+        return self.root
+
+    def list_versions(self) -> List[str]:
+        """버전 목록 (최신순, 버전 이름이 생성 시각으로 시작)"""
+        if not os.path.isdir(self.versions_path):
+            return []
+        return sorted(
+            (name for name in os.listdir(self.versions_path) if os.path.isdir(self.version_path(name))),
+            reverse=True
+        )
+
+    def create_version(self) -> Tuple[str, str]:
+        """새 버전 디렉토리 생성 후 (버전, 경로) 반환"""
+        version = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        path = self.version_path(version)
+        os.makedirs(path)
+        return version, path
+
+    def activate(self, version: str) -> Optional[str]:
+        """CURRENT를 원자적으로 교체하고 이전 활성 버전 반환"""
+        if not os.path.isdir(self.version_path(version)):
+            raise ValueError(f"존재하지 않는 인덱스 버전입니다: {version}")
+        previous = self.current()
+        tmp_path = f"{self.current_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(version)
+        os.replace(tmp_path, self.current_path)
+        if previous and previous != version and os.path.isdir(self.version_path(previous)):
+            with open(os.path.join(self.version_path(previous), RETIRED_FILE), 'w', encoding='utf-8') as f:
+                f.write(str(time.time()))
+        logger.info(f"활성 인덱스 버전을 교체했습니다: {previous or '(루트)'} → {version}")
+        return previous
+
+    def discard(self, version: str) -> None:
+        """활성화하지 않은 버전 삭제 (검증 실패 등)"""
+        if version == self.current():
+            raise ValueError(f"활성 인덱스 버전은 삭제할 수 없습니다: {version}")
+        shutil.rmtree(self.version_path(version), ignore_errors=True)
+
+    def _retired_at(self, version: str) -> float:
+        """교체된 시각 (활성화된 적 없는 버전은 디렉토리 수정 시각)"""
+        path = self.version_path(version)
+        try:
+            with open(os.path.join(path, RETIRED_FILE), 'r', encoding='utf-8') as f:
+                return float(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return os.path.getmtime(path)
+
+    def collect_garbage(self, keep: Optional[int] = None, grace_seconds: Optional[float] = None) -> List[str]:
+        """오래된 버전 삭제
+
+        활성 버전과 최근 keep개 버전(롤백용)은 남기고, 교체된 지 grace_seconds가 지나지 않은 버전도
+        (다른 워커가 아직 열어 두었거나 다른 프로세스가 만드는 중일 수 있으므로) 남긴다.
+
+        Args:
+            keep: 남길 이전 버전 수 (기본값: INDEX_KEEP_VERSIONS 또는 1)
+            grace_seconds: 삭제 유예 시간 (기본값: INDEX_GC_GRACE_SECONDS 또는 600)
+
+        Returns:
+            List[str]: 삭제한 버전 목록
+        """
+        keep = keep if keep is not None else int(os.getenv("INDEX_KEEP_VERSIONS", "1"))
+        grace_seconds = grace_seconds if grace_seconds is not None else float(os.getenv("INDEX_GC_GRACE_SECONDS", "600"))
+        current = self.current()
+        now = time.time()
+        removed = []
+        for version in [v for v in self.list_versions() if v != current][keep:]:
+            if now - self._retired_at(version) < grace_seconds:
+                continue
+            shutil.rmtree(self.version_path(version), ignore_errors=True)
+            removed.append(version)
+        if removed:
+            logger.info(f"이전 인덱스 버전을 삭제했습니다: {removed}")
+        return removed
+
+
+def test_index_versions():
+    """IndexVersionManager 테스트"""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as root:
+        manager = IndexVersionManager(root)
+        print(f"CURRENT 없음 → 활성 디렉토리: {manager.active_directory() == root}")
+        versions = []
+        for _ in range(3):
+            version, _ = manager.create_version()
+            manager.activate(version)
+            versions.append(version)
+            time.sleep(1)
+        print(f"활성 버전: {manager.current()} (마지막 생성: {versions[-1]})")
+        print(f"유예 시간 내 삭제: {manager.collect_garbage(keep=0, grace_seconds=600)}")
+        print(f"유예 시간 0 삭제: {manager.collect_garbage(keep=1, grace_seconds=0)}")
+        print(f"남은 버전: {manager.list_versions()}")
+
+
+if __name__ == "__main__":
+    test_index_versions()
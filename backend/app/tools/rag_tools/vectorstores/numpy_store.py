@@ -0,0 +1,488 @@
+import json
+import operator
+import os
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+from app.tools.rag_tools.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MAX_MASK_CARDINALITY = 256  # 값 종류가 이보다 많은 메타데이터 키는 마스크를 미리 만들지 않음
+STORAGE_TYPES = ("float32", "float16", "int8")
+CODE_FILE_SUFFIX = {"float16": "f16", "int8": "i8"}
+SCORE_CHUNK_ROWS = 16384  # 압축 행렬을 float32로 변환해 점수를 계산할 블록 크기(행)
+COMPARISON_OPERATORS = {"$gt": operator.gt, "$gte": operator.ge, "$lt": operator.lt, "$lte": operator.le}
+
+
+def quantize_int8(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """차원별 스케일 int8 스칼라 양자화 (x ≈ code · scale, scale = max|x_d| / 127)"""
+    scales = np.abs(matrix).max(axis=0) / 127.0 if len(matrix) else np.ones(matrix.shape[1], dtype=np.float32)
+    scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(matrix / scales), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def build_metadata_masks(metadatas: List[Dict[str, Any]]) -> Dict[Tuple[str, Any], np.ndarray]:
+    """값 종류가 적은 메타데이터 키마다 (키, 값) → 불리언 마스크 생성"""
+    values_by_key: Dict[str, Dict[Any, List[int]]] = {}
+    for row, metadata in enumerate(metadatas):
+        for key, value in (metadata or {}).items():
+            values_by_key.setdefault(key, {}).setdefault(value, []).append(row)
+    masks: Dict[Tuple[str, Any], np.ndarray] = {}
+    for key, rows_by_value in values_by_key.items():
+        if len(rows_by_value) > MAX_MASK_CARDINALITY:
+            continue
+        for value, rows in rows_by_value.items():
+            mask = np.zeros(len(metadatas), dtype=bool)
+            mask[rows] = True
+            masks[(key, value)] = mask
+    return masks
+
+
+def metadata_filter_mask(
+    where: Optional[Dict[str, Any]],
+    metadatas: List[Dict[str, Any]],
+    masks: Dict[Tuple[str, Any], np.ndarray]
+) -> Optional[np.ndarray]:
+    """Chroma where 문법($and, $or, $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin)을 불리언 마스크로 변환 (필터 없으면 None)
+
+    비교 연산자는 Chroma와 같이 숫자 값에만 적용되며, 값이 숫자가 아닌 문서는 조건을 만족하지 않는다.
+    지원하지 않는 연산자나 잘못된 피연산자는 ValueError.
+    """
+    if not where:
+        return None
+
+    def is_number(value: Any) -> bool:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    def equals(key: str, value: Any) -> np.ndarray:
+        mask = masks.get((key, value))
+        if mask is None:
+            # 미리 만들지 않은(값 종류가 많은) 키는 메타데이터를 직접 비교
+            mask = np.fromiter(
+                ((metadata or {}).get(key) == value for metadata in metadatas),
+                dtype=bool, count=len(metadatas)
+            )
+        return mask
+
+    def compare(key: str, op: str, value: Any) -> np.ndarray:
+        if not is_number(value):
+            raise ValueError(f"{op} 연산자는 숫자 값만 지원합니다: {value!r}")
+        compare_values = COMPARISON_OPERATORS[op]
+        values = ((metadata or {}).get(key) for metadata in metadatas)
+        return np.fromiter(
+            (is_number(v) and compare_values(v, value) for v in values),
+            dtype=bool, count=len(metadatas)
+        )
+
+    def any_equals(key: str, op: str, values: Any) -> np.ndarray:
+        if not isinstance(values, list):
+            raise ValueError(f"{op} 연산자는 값 목록이 필요합니다: {values!r}")
+        if not values:
+            return np.zeros(len(metadatas), dtype=bool)
+        return np.logical_or.reduce([equals(key, v) for v in values])
+
+    conditions = []
+    for key, condition in where.items():
+        if key == "$and":
+            conditions.append(np.logical_and.reduce([metadata_filter_mask(c, metadatas, masks) for c in condition]))
+        elif key == "$or":
+            conditions.append(np.logical_or.reduce([metadata_filter_mask(c, metadatas, masks) for c in condition]))
+        elif isinstance(condition, dict):
+            for op, value in condition.items():
+                if op == "$eq":
+                    conditions.append(equals(key, value))
+                elif op == "$ne":
+                    conditions.append(~equals(key, value))
+                elif op in COMPARISON_OPERATORS:
+                    conditions.append(compare(key, op, value))
+                elif op == "$in":
+                    conditions.append(any_equals(key, op, value))
+                elif op == "$nin":
+                    conditions.append(~any_equals(key, op, value))
+                else:
+                    raise ValueError(f"지원하지 않는 필터 연산자입니다: {op}")
+        else:
+            conditions.append(equals(key, condition))
+    return np.logical_and.reduce(conditions)
+
+
+class _Snapshot:
+    """로드된 스냅샷 상태 묶음 (load가 통째로 교체하므로 검색은 한 번 읽은 묶음을 끝까지 사용)"""
+    __slots__ = ("ids", "documents", "metadatas", "corpus_version", "dim", "storage", "matrix", "codes", "scales", "masks")
+
+    def __init__(self, ids, documents, metadatas, corpus_version, dim, storage, matrix, codes, scales, masks):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.corpus_version = corpus_version
+        self.dim = dim
+        self.storage = storage
+        self.matrix = matrix
+        self.codes = codes
+        self.scales = scales
+        self.masks = masks
+
+
+EMPTY_SNAPSHOT = _Snapshot([], [], [], "", 0, "float32", np.zeros((0, 0), dtype=np.float32), None, None, {})
+
+
+class NumpyVectorStore:
+    """NumPy 기반 정확(brute-force) 검색 벡터 저장소
+
+    정규화된 float32 임베딩을 연속 행렬 하나로 디스크에 저장하고 numpy.memmap으로 읽는다.
+    - 단일 질의: 행렬-벡터 곱 한 번 + argpartition으로 top-k
+    - 배치 질의: 행렬-행렬 곱 한 번
+    - 메타데이터 필터: (키, 값)별 불리언 마스크를 로드 시점에 미리 만들어 두고 조합
+    점수는 Chroma(l2)와 같은 의미가 되도록 정규화 벡터 간 제곱 L2 거리(2 - 2·cos)로 반환하므로
+    RAGPipeline의 거리→유사도 변환과 임계값을 그대로 사용할 수 있다.
+
+    압축 저장 (storage='float16' 또는 'int8'):
+    전체 스캔은 압축 행렬(float16 또는 차원별 스케일 int8)로 근사 점수를 계산해 상위 k × rescore_multiplier개를 고르고,
+    이 후보만 float32 원본 행렬(memmap 사이드 파일)에서 읽어 정확한 점수로 다시 정렬한다.
+    질의마다 훑는 데이터가 2~4배 작아지고, 원본은 재채점할 행의 페이지만 메모리에 올라온다.
+
+    스냅샷 파일 ({path}/{collection_name}.json이 현재 행렬 파일을 가리킴):
+    - {collection_name}.{version}.f32: (count, dim) float32 행렬 (압축 저장 시 재채점용 사이드 파일)
+    - {collection_name}.{version}.f16 / .i8: 압축 행렬 (압축 저장 시)
+    - {collection_name}.json: ids, documents, metadatas, dim, count, matrix_file, storage, codes_file, scales, corpus_version
+
+    동시성: load(다시 읽기)는 _lock으로 직렬화하고 새 상태 묶음을 만든 뒤 참조 하나만 교체한다.
+    검색은 잠금 없이 호출 시작 시 상태 묶음을 한 번 읽으므로 행렬과 메타데이터/마스크가 서로 다른 스냅샷에서 섞이지 않는다.
+    """
+
+    def __init__(self, path: str, collection_name: str, rescore_multiplier: Optional[int] = None):
+        """저장된 스냅샷 로드 (없으면 빈 저장소)
+
+        Args:
+            path: 스냅샷 디렉토리
+            collection_name: 컬렉션 이름
+            rescore_multiplier: 압축 저장 시 재채점할 후보 수 (k의 배수, 기본값: NUMPY_RESCORE_MULTIPLIER 또는 4)
+        """
+        self.path = path
+        self.collection_name = collection_name
+        self.rescore_multiplier = rescore_multiplier or int(os.getenv("NUMPY_RESCORE_MULTIPLIER", "4"))
+        self._lock = threading.Lock()
+        self._snapshot = EMPTY_SNAPSHOT
+        self.load()
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.path, f"{self.collection_name}.json")
+
+    @property
+    def count(self) -> int:
+        """저장된 문서 수"""
+        return len(self._snapshot.ids)
+
+    @property
+    def ids(self) -> List[str]:
+        return self._snapshot.ids
+
+    @property
+    def documents(self) -> List[str]:
+        return self._snapshot.documents
+
+    @property
+    def metadatas(self) -> List[Dict[str, Any]]:
+        return self._snapshot.metadatas
+
+    @property
+    def corpus_version(self) -> str:
+        return self._snapshot.corpus_version
+
+    @property
+    def dim(self) -> int:
+        return self._snapshot.dim
+
+    @property
+    def storage(self) -> str:
+        return self._snapshot.storage
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._snapshot.matrix
+
+    @property
+    def codes(self) -> Optional[np.ndarray]:
+        return self._snapshot.codes
+
+    @property
+    def scales(self) -> Optional[np.ndarray]:
+        return self._snapshot.scales
+
+    def load(self) -> None:
+        """스냅샷 메타데이터와 memmap 행렬 로드 (동시에 여러 번 호출되면 순서대로 실행)"""
+        with self._lock:
+            self._load_locked()
+
+    def _load_locked(self) -> None:
+        if not os.path.exists(self.meta_path):
+            return
+        with open(self.meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        count, dim = meta["count"], meta["dim"]
+        storage = meta.get("storage", "float32")
+        matrix_path = os.path.join(self.path, meta["matrix_file"])
+        matrix = (
+            np.memmap(matrix_path, dtype=np.float32, mode='r', shape=(count, dim))
+            if count else np.zeros((0, dim), dtype=np.float32)
+        )
+        codes = scales = None
+        if storage != "float32":
+            code_dtype = np.float16 if storage == "float16" else np.int8
+            codes = (
+                np.memmap(os.path.join(self.path, meta["codes_file"]), dtype=code_dtype, mode='r', shape=(count, dim))
+                if count else np.zeros((0, dim), dtype=code_dtype)
+            )
+            if storage == "int8":
+                scales = np.asarray(meta["scales"], dtype=np.float32)
+        metadatas = meta["metadatas"]
+        self._snapshot = _Snapshot(
+            meta["ids"], meta["documents"], metadatas, meta.get("corpus_version", ""), dim, storage,
+            matrix, codes, scales, build_metadata_masks(metadatas)
+        )
+        logger.info(f"NumPy 벡터 스냅샷을 로드했습니다: {self.meta_path} ({count}개, {dim}차원, {storage})")
+
+    @classmethod
+    def build(
+        cls,
+        path: str,
+        collection_name: str,
+        ids: Sequence[str],
+        embeddings: Any,
+        documents: Sequence[str],
+        metadatas: Sequence[Optional[Dict[str, Any]]],
+        corpus_version: str = "",
+        storage: Optional[str] = None
+    ) -> "NumpyVectorStore":
+        """임베딩을 정규화하여 스냅샷 파일로 저장하고 로드한 저장소 반환
+
+        행렬 파일은 버전별 새 이름으로 쓰고 메타데이터 파일을 마지막에 원자적으로 교체하므로,
+        이미 이전 스냅샷을 memmap한 프로세스는 영향을 받지 않는다.
+        storage: 'float32', 'float16', 'int8' (기본값: NUMPY_VECTOR_STORAGE 또는 'float32')
+        """
+        storage = storage or os.getenv("NUMPY_VECTOR_STORAGE", "float32")
+        if storage not in STORAGE_TYPES:
+            raise ValueError(f"지원하지 않는 저장 형식입니다: {storage}")
+        os.makedirs(path, exist_ok=True)
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2:
+            matrix = matrix.reshape(len(ids), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms > 0, norms, 1.0)
+
+        meta_path = os.path.join(path, f"{collection_name}.json")
+        previous_files = []
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+            previous_files = [previous.get("matrix_file"), previous.get("codes_file")]
+
+        version = uuid.uuid4().hex[:12]
+        matrix_file = f"{collection_name}.{version}.f32"
+        matrix.tofile(os.path.join(path, matrix_file))
+        meta = {
+            "ids": list(ids),
+            "documents": list(documents),
+            "metadatas": [metadata or {} for metadata in metadatas],
+            "count": int(matrix.shape[0]),
+            "dim": int(matrix.shape[1]),
+            "matrix_file": matrix_file,
+            "storage": storage,
+            "corpus_version": corpus_version
+        }
+        if storage != "float32":
+            if storage == "float16":
+                codes = matrix.astype(np.float16)
+            else:
+                codes, scales = quantize_int8(matrix)
+                meta["scales"] = scales.tolist()
+            meta["codes_file"] = f"{collection_name}.{version}.{CODE_FILE_SUFFIX[storage]}"
+            codes.tofile(os.path.join(path, meta["codes_file"]))
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, meta_path)
+
+        # 이전 행렬 파일 삭제 (이미 memmap한 프로세스는 열린 inode를 계속 사용)
+        for previous_file in previous_files:
+            if previous_file and previous_file not in (matrix_file, meta.get("codes_file")):
+                try:
+                    os.remove(os.path.join(path, previous_file))
+                except FileNotFoundError:
+                    pass
+        return cls(path, collection_name)
+
+    @classmethod
+    def from_chroma(
+        cls,
+        collection,
+        path: str,
+        collection_name: str,
+        corpus_version: str = "",
+        storage: Optional[str] = None
+    ) -> "NumpyVectorStore":
+        """Chroma 컬렉션 전체를 스냅샷으로 내보내기"""
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        embeddings = data["embeddings"]
+        if embeddings is None or len(embeddings) == 0:
+            embeddings = np.zeros((0, 0), dtype=np.float32)
+        logger.info(f"Chroma 컬렉션에서 NumPy 스냅샷을 생성합니다: {len(data['ids'])}개")
+        return cls.build(
+            path, collection_name, data["ids"], embeddings, data["documents"], data["metadatas"], corpus_version, storage
+        )
+
+
+    def _top_rows(self, scores: np.ndarray, rows: Optional[np.ndarray], k: int) -> List[Tuple[int, float]]:
+        """코사인 점수 벡터에서 상위 k개의 (원래 행 번호, 제곱 L2 거리)"""
+        k = min(k, scores.shape[0])
+        if k <= 0:
+            return []
+        if k < scores.shape[0]:
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+        else:
+            top = np.argsort(-scores)
+        results = []
+        for index in top:
+            row = int(rows[index]) if rows is not None else int(index)
+            results.append((row, max(0.0, 2.0 - 2.0 * float(scores[index]))))
+        return results
+
+    @staticmethod
+    def _document(snapshot: _Snapshot, row: int) -> Document:
+        return Document(page_content=snapshot.documents[row], metadata=dict(snapshot.metadatas[row]))
+
+    @staticmethod
+    def _approximate_scores(snapshot: _Snapshot, queries: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """압축 행렬로 근사 코사인 점수 계산 (블록 단위로 float32 변환, int8은 스케일을 질의에 곱함)"""
+        codes = snapshot.codes if rows is None else snapshot.codes[rows]
+        if snapshot.scales is not None:
+            queries = queries * snapshot.scales
+        scores = np.empty((queries.shape[0], codes.shape[0]), dtype=np.float32)
+        for start in range(0, codes.shape[0], SCORE_CHUNK_ROWS):
+            block = np.asarray(codes[start:start + SCORE_CHUNK_ROWS], dtype=np.float32)
+            scores[:, start:start + block.shape[0]] = queries @ block.T
+        return scores
+
+    def _search_rows(
+        self,
+        snapshot: _Snapshot,
+        queries: np.ndarray,
+        k: int,
+        filter: Optional[Dict[str, Any]]
+    ) -> List[List[Tuple[int, float]]]:
+        """정규화된 질의 행렬의 질의별 상위 k개 (행 번호, 제곱 L2 거리)
+
+        float32 저장은 원본 행렬로 바로 정확 검색하고,
+        압축 저장은 근사 점수 상위 k × rescore_multiplier개를 원본 행렬에서 다시 채점한다.
+        """
+        mask = metadata_filter_mask(filter, snapshot.metadatas, snapshot.masks)
+        rows = None if mask is None else np.flatnonzero(mask)
+        if snapshot.codes is None:
+            candidates = snapshot.matrix if rows is None else snapshot.matrix[rows]
+            return [self._top_rows(row_scores, rows, k) for row_scores in queries @ candidates.T]
+        results = []
+        shortlist_k = k * self.rescore_multiplier
+        for query, row_scores in zip(queries, self._approximate_scores(snapshot, queries, rows)):
+            shortlist = np.sort(np.asarray([row for row, _ in self._top_rows(row_scores, rows, shortlist_k)], dtype=np.int64))
+            results.append(self._top_rows(np.asarray(snapshot.matrix[shortlist]) @ query, shortlist, k))
+        return results
+
+    @staticmethod
+    def _normalize(embeddings: Any) -> np.ndarray:
+        queries = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        return queries / np.where(norms > 0, norms, 1.0)
+
+    def similarity_search_by_vector_with_relevance_scores(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        """임베딩 벡터로 검색 (Chroma와 같은 시그니처, 점수는 거리)"""
+        snapshot = self._snapshot
+        if not snapshot.ids:
+            return []
+        return [
+            (self._document(snapshot, row), distance)
+            for row, distance in self._search_rows(snapshot, self._normalize(embedding), k, filter)[0]
+        ]
+
+    def similarity_search_by_vector_with_embeddings(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float, np.ndarray]]:
+        """임베딩 벡터로 검색 (문서, 거리, 저장된 정규화 임베딩) 반환"""
+        snapshot = self._snapshot
+        if not snapshot.ids:
+            return []
+        return [
+            (self._document(snapshot, row), distance, np.asarray(snapshot.matrix[row]))
+            for row, distance in self._search_rows(snapshot, self._normalize(embedding), k, filter)[0]
+        ]
+
+    def similarity_search_by_vectors(
+        self,
+        embeddings: List[List[float]],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """여러 임베딩 벡터를 행렬-행렬 곱 한 번으로 검색"""
+        if not embeddings:
+            return []
+        snapshot = self._snapshot
+        if not snapshot.ids:
+            return [[] for _ in embeddings]
+        return [
+            [(self._document(snapshot, row), distance) for row, distance in rows]
+            for rows in self._search_rows(snapshot, self._normalize(embeddings), k, filter)
+        ]
+
+def test_numpy_vector_store():
+    """NumpyVectorStore 테스트"""
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(50, 8)).astype(np.float32)
+    metadatas = [{"source": "knrec_faq" if i % 2 == 0 else "manual", "article_id": str(i), "order": i} for i in range(50)]
+    with tempfile.TemporaryDirectory() as path:
+        store = NumpyVectorStore.build(
+            path, "test", [str(i) for i in range(50)], embeddings,
+            [f"문서 {i}" for i in range(50)], metadatas
+        )
+        results = store.similarity_search_by_vector_with_relevance_scores(embeddings[3].tolist(), k=3)
+        print(f"상위 문서: {[doc.page_content for doc, _ in results]}")
+        filtered = store.similarity_search_by_vector_with_relevance_scores(
+            embeddings[3].tolist(), k=3, filter={"source": "manual"}
+        )
+        print(f"필터 결과: {[doc.metadata['source'] for doc, _ in filtered]}")
+        ranged = store.similarity_search_by_vector_with_relevance_scores(
+            embeddings[3].tolist(), k=3, filter={"$and": [{"order": {"$gte": 10}}, {"order": {"$lt": 20}}]}
+        )
+        print(f"범위 필터 결과: {[doc.metadata['order'] for doc, _ in ranged]}")
+        batched = store.similarity_search_by_vectors(embeddings[:4].tolist(), k=2)
+        print(f"배치 결과: {[[doc.page_content for doc, _ in rows] for rows in batched]}")
+
+        exact = [[doc.page_content for doc, _ in rows] for rows in store.similarity_search_by_vectors(embeddings.tolist(), k=5)]
+        for storage in ("float16", "int8"):
+            compact = NumpyVectorStore.build(
+                path, f"test_{storage}", [str(i) for i in range(50)], embeddings,
+                [f"문서 {i}" for i in range(50)], metadatas, storage=storage
+            )
+            approx = [[doc.page_content for doc, _ in rows] for rows in compact.similarity_search_by_vectors(embeddings.tolist(), k=5)]
+            recall = np.mean([len(set(a) & set(b)) / 5 for a, b in zip(approx, exact)])
+            print(f"{storage} 저장 recall@5: {recall:.3f}")
+
+
+if __name__ == "__main__":
+    test_numpy_vector_store()
@@ -1,17 +1,34 @@
 from typing import List, Dict, Any, Optional
+import numpy as np
 from langchain_community.vectorstores import Chroma
 from langchain.schema import Document
 from app.tools.rag_tools.embeddings.embeddings import EmbeddingModel
+from app.tools.rag_tools.vectorstores.hnsw_config import collection_space, distance_to_similarity, hnsw_metadata
+from app.tools.rag_tools.vectorstores.numpy_store import NumpyVectorStore
 import os
+import shutil
+import threading
+import uuid
 
 class VectorStore:
-    """RAG 시스템용 벡터 저장소 클래스 (Chroma 기반)"""
+    """RAG 시스템용 벡터 저장소 클래스 (Chroma 또는 NumPy 정확 검색)
+    
+    동시성 계약:
+    - 검색 메서드(similarity_search*, max_marginal_relevance_search)는 공유 상태를 바꾸지 않으며
+      여러 스레드에서 동시에 호출해도 안전하다. 호출 시작 시 내부 저장소 참조를 한 번만 읽으므로
+      진행 중인 검색은 쓰기 작업이 저장소를 교체하더라도 읽기 시작한 저장소로 끝난다.
+    - 쓰기 메서드(create_from_*, load, add_documents, delete_collection)는 내부 잠금으로 서로 직렬화된다.
+      검색과 동시에 호출할 수 있으며, 검색은 쓰기 이전 또는 이후 상태 중 하나를 본다.
+    - 필터, k 등 검색 옵션은 모두 호출 인자로만 받고 인스턴스에 저장하지 않는다.
+    """
     
     def __init__(
         self,
         embedding_model: EmbeddingModel,
         persist_directory: str = "./data/vectorstores",
-        collection_name: str = "faq"
+        collection_name: str = "faq",
+        backend: str = "chroma",
+        hnsw_params: Optional[Dict[str, Any]] = None
     ):
         """벡터 저장소 초기화
         
@@ -19,11 +36,46 @@ class VectorStore:
             embedding_model: 임베딩 모델
             persist_directory: 저장 디렉토리
             collection_name: 컬렉션 이름
+            backend: 'chroma' 또는 'numpy' (memmap 행렬 기반 정확 검색)
+            hnsw_params: Chroma 컬렉션 생성 시 HNSW 파라미터 (space, M, construction_ef, search_ef, 기본값: CHROMA_HNSW_* 환경 변수)
         """
+        if backend not in ("chroma", "numpy"):
+            raise ValueError(f"지원하지 않는 벡터 저장소 백엔드입니다: {backend}")
         self.embedding_model = embedding_model
         self.persist_directory = persist_directory
         self.collection_name = collection_name
+        self.backend = backend
+        self.collection_metadata = hnsw_metadata(**(hnsw_params or {}))
         self.vector_store = None
+        self._write_lock = threading.RLock()
+    
+    @property
+    def numpy_path(self) -> str:
+        """NumPy 백엔드 스냅샷 디렉토리"""
+        return os.path.join(self.persist_directory, "numpy_index")
+    
+    def _build_numpy(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        append: bool = True
+    ) -> None:
+        """텍스트를 임베딩하여 NumPy 스냅샷 생성 (append=True이면 기존 스냅샷에 이어 붙임, _write_lock 안에서 호출)
+        
+        새 스냅샷을 다 만든 뒤 참조를 한 번에 교체하므로 검색 중인 스레드는 이전 스냅샷으로 끝난다.
+        """
+        metadatas = metadatas or [{} for _ in texts]
+        embeddings = np.asarray(self.embedding_model.embed_documents(texts), dtype=np.float32)
+        ids = [str(uuid.uuid4()) for _ in texts]
+        current = self.vector_store
+        if append and current is not None and current.count:
+            embeddings = np.vstack([np.asarray(current.matrix), embeddings])
+            ids = current.ids + ids
+            texts = current.documents + list(texts)
+            metadatas = current.metadatas + list(metadatas)
+        self.vector_store = NumpyVectorStore.build(
+            self.numpy_path, self.collection_name, ids, embeddings, texts, metadatas
+        )
     
     def create_from_documents(
         self,
@@ -36,12 +88,19 @@ class VectorStore:
             documents: 문서 리스트
             persist: 저장 여부
         """
-        self.vector_store = Chroma.from_documents(
-            documents=documents,
-            embedding=self.embedding_model.model,
-            persist_directory=self.persist_directory if persist else None,
-            collection_name=self.collection_name
-        )
+        with self._write_lock:
+            if self.backend == "numpy":
+                self._build_numpy(
+                    [doc.page_content for doc in documents], [doc.metadata for doc in documents], append=False
+                )
+                return
+            self.vector_store = Chroma.from_documents(
+                documents=documents,
+                embedding=self.embedding_model.model,
+                persist_directory=self.persist_directory if persist else None,
+                collection_name=self.collection_name,
+                collection_metadata=self.collection_metadata or None
+            )
     
     def create_from_texts(
         self,
@@ -56,21 +115,30 @@ class VectorStore:
             metadatas: 메타데이터 리스트
             persist: 저장 여부
         """
-        self.vector_store = Chroma.from_texts(
-            texts=texts,
-            embedding=self.embedding_model.model,
-            metadatas=metadatas,
-            persist_directory=self.persist_directory if persist else None,
-            collection_name=self.collection_name
-        )
+        with self._write_lock:
+            if self.backend == "numpy":
+                self._build_numpy(texts, metadatas, append=False)
+                return
+            self.vector_store = Chroma.from_texts(
+                texts=texts,
+                embedding=self.embedding_model.model,
+                metadatas=metadatas,
+                persist_directory=self.persist_directory if persist else None,
+                collection_name=self.collection_name,
+                collection_metadata=self.collection_metadata or None
+            )
     
     def load(self) -> None:
         """저장된 벡터 저장소 로드"""
-        self.vector_store = Chroma(
-            persist_directory=self.persist_directory,
-            embedding_function=self.embedding_model.model,
-            collection_name=self.collection_name
-        )
+        with self._write_lock:
+            if self.backend == "numpy":
+                self.vector_store = NumpyVectorStore(self.numpy_path, self.collection_name)
+                return
+            self.vector_store = Chroma(
+                persist_directory=self.persist_directory,
+                embedding_function=self.embedding_model.model,
+                collection_name=self.collection_name
+            )
     
     def add_documents(
         self,
@@ -83,12 +151,22 @@ class VectorStore:
             documents: 추가할 문서 리스트
             persist: 저장 여부
         """
-        if self.vector_store is None:
-            self.create_from_documents(documents, persist)
-        else:
-            self.vector_store.add_documents(documents)
-            if persist:
-                self.vector_store.persist()
+        with self._write_lock:
+            if self.vector_store is None:
+                self.create_from_documents(documents, persist)
+            elif self.backend == "numpy":
+                self._build_numpy([doc.page_content for doc in documents], [doc.metadata for doc in documents])
+            else:
+                self.vector_store.add_documents(documents)
+                if persist:
+                    self.vector_store.persist()
+    
+    def _store(self):
+        """검색에 사용할 내부 저장소 참조 (검색 호출마다 한 번만 읽음)"""
+        store = self.vector_store
+        if store is None:
+            raise ValueError("벡터 저장소가 초기화되지 않았습니다.")
+        return store
     
     def similarity_search(
         self,
@@ -106,10 +184,16 @@ class VectorStore:
         Returns:
             List[Document]: 검색된 문서 리스트
         """
-        if self.vector_store is None:
-            raise ValueError("벡터 저장소가 초기화되지 않았습니다.")
+        store = self._store()
+        
+        if self.backend == "numpy":
+            return [
+                doc for doc, _ in store.similarity_search_by_vector_with_relevance_scores(
+                    self.embedding_model.embed_query(query), k=k, filter=filter
+                )
+            ]
             
-        return self.vector_store.similarity_search(
+        return store.similarity_search(
             query=query,
             k=k,
             filter=filter
@@ -131,17 +215,114 @@ class VectorStore:
         Returns:
             List[tuple[Document, float]]: (문서, 점수) 튜플 리스트
         """
-        if self.vector_store is None:
-            raise ValueError("벡터 저장소가 초기화되지 않았습니다.")
+        return self._search_with_score(self._store(), query, k, filter)
+    
+    def _search_with_score(
+        self,
+        store,
+        query: str,
+        k: int,
+        filter: Optional[Dict[str, Any]]
+    ) -> List[tuple[Document, float]]:
+        """주어진 저장소 참조로 (문서, 거리) 검색"""
+        if self.backend == "numpy":
+            return store.similarity_search_by_vector_with_relevance_scores(
+                self.embedding_model.embed_query(query), k=k, filter=filter
+            )
             
-        return self.vector_store.similarity_search_with_score(
+        return store.similarity_search_with_score(
             query=query,
             k=k,
             filter=filter
         )
     
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 3,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[tuple[Document, float]]:
+        """임베딩 벡터로 점수(거리)가 포함된 검색 (질의를 미리 배치 임베딩한 경우)
+        
+        Args:
+            embedding: 질의 임베딩 벡터
+            k: 반환할 문서 수
+            filter: 필터 조건
+            
+        Returns:
+            List[tuple[Document, float]]: (문서, 거리) 튜플 리스트
+        """
+        return self._store().similarity_search_by_vector_with_relevance_scores(
+            embedding, k=k, filter=filter
+        )
+    
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 3,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        """MMR 검색 (Chroma 백엔드 전용)
+        
+        Args:
+            query: 검색 쿼리
+            k: 반환할 문서 수
+            fetch_k: MMR 후보 문서 수
+            lambda_mult: 관련도 가중치 (1이면 관련도만, 0이면 다양성만)
+            filter: 필터 조건
+            
+        Returns:
+            List[Document]: 검색된 문서 리스트
+        """
+        if self.backend == "numpy":
+            raise ValueError("NumPy 백엔드는 MMR 검색을 지원하지 않습니다.")
+        return self._store().max_marginal_relevance_search(
+            query, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter
+        )
+    
+    @staticmethod
+    def _distance_space(store, backend: str) -> str:
+        if backend == "numpy" or store is None:
+            return "l2"
+        return collection_space(store._collection)
+    
+    @property
+    def distance_space(self) -> str:
+        """similarity_search_with_score 점수(거리)의 종류 (NumPy 백엔드는 제곱 L2)"""
+        return self._distance_space(self.vector_store, self.backend)
+    
+    def similarity_search_with_relevance_scores(
+        self,
+        query: str,
+        k: int = 3,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[tuple[Document, float]]:
+        """0~1 유사도 점수가 포함된 검색 (거리 함수와 관계없이 같은 척도, 높을수록 유사)
+        
+        Args:
+            query: 검색 쿼리
+            k: 반환할 문서 수
+            filter: 필터 조건
+            
+        Returns:
+            List[tuple[Document, float]]: (문서, 유사도) 튜플 리스트
+        """
+        store = self._store()
+        space = self._distance_space(store, self.backend)
+        return [
+            (doc, distance_to_similarity(distance, space))
+            for doc, distance in self._search_with_score(store, query, k, filter)
+        ]
+    
     def delete_collection(self) -> None:
-        """컬렉션 삭제"""
-        if self.vector_store is not None:
-            self.vector_store.delete_collection()
-            self.vector_store = None 
\ No newline at end of file
+        """컬렉션 삭제 (이후 검색은 ValueError, 진행 중이던 Chroma 검색은 실패할 수 있음)"""
+        with self._write_lock:
+            store, self.vector_store = self.vector_store, None
+            if self.backend == "numpy":
+                # 이미 memmap한 검색은 열린 파일로 끝까지 실행됨
+                if os.path.exists(self.numpy_path):
+                    shutil.rmtree(self.numpy_path)
+            elif store is not None:
+                store.delete_collection()
\ No newline at end of file
@@ -4,21 +4,25 @@ import json
 
 API_URL = "http://localhost:8000/api/chat"
 
-def chat_with_api(message: str):
-    payload = {"message": message}
+def chat_with_api(message: str, session_id: str = None):
+    """메시지를 전송하고 이어서 사용할 세션 ID 반환"""
+    payload = {"message": message, "session_id": session_id}
     try:
         response = requests.post(API_URL, json=payload, timeout=30)
         response.raise_for_status()
         data = response.json()
         print(f"[질문] {message}")
         print(f"[응답] {data.get('response')}")
+        return data.get('session_id', session_id)
     except Exception as e:
         print(f"[오류] {e}")
         if hasattr(e, 'response') and e.response is not None:
             print(e.response.text)
+        return session_id
 
 def main():
     print("재생에너지 AI 챗봇 API CLI (종료: exit)")
+    session_id = None
     while True:
         try:
             user_input = input("[사용자] ").strip()
@@ -27,7 +31,7 @@ def main():
                 break
             if not user_input:
                 continue
-            chat_with_api(user_input)
+            session_id = chat_with_api(user_input, session_id)
         except KeyboardInterrupt:
             print("\n[시스템] 챗봇을 종료합니다.")
             break
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+임베딩 백엔드 벤치마크: PyTorch(sentence-transformers) vs ONNX Runtime(fp32 / int8)
+번들된 FAQ 데이터로 질의 1건 지연 시간(p50/p99), 문서 배치 처리량, PyTorch 대비 코사인 일치도 비교
+
+사용법:
+    python cli/bench_embeddings.py
+    python cli/bench_embeddings.py --queries 300 --threads 4 --batch-size 64
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+from app.tools.rag_tools.embeddings.onnx_embeddings import OnnxEmbeddings
+
+BACKUP_EMBEDDING_MODEL = "snunlp/KR-SBERT-V40K-klueNLI-augSTS"
+
+
+def load_faq_texts(path: str):
+    """FAQ 제목(질의용)과 '제목 + 내용'(문서용) 텍스트"""
+    with open(path, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+    titles = [item['title'] for item in items if item.get('title')]
+    documents = [f"제목: {item.get('title', '')}\n내용: {item.get('content', '')}" for item in items]
+    return titles, documents
+
+
+def query_latency(embeddings, queries, warmup: int = 5) -> np.ndarray:
+    """질의별 지연 시간(ms)"""
+    for query in queries[:warmup]:
+        embeddings.embed_query(query)
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        embeddings.embed_query(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return np.asarray(latencies)
+
+
+def document_throughput(embeddings, documents):
+    """문서 전체 임베딩의 처리량(문서/초)과 결과 벡터"""
+    embeddings.embed_documents(documents[:8])
+    started = time.perf_counter()
+    vectors = np.asarray(embeddings.embed_documents(documents), dtype=np.float32)
+    return len(documents) / (time.perf_counter() - started), vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PyTorch vs ONNX Runtime 임베딩 벤치마크")
+    parser.add_argument("--faq-file", default="data/crawled_data/knrec_faq_selenium_20250618_110452.json")
+    parser.add_argument("--model", default=BACKUP_EMBEDDING_MODEL)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime intra-op 스레드 수 (0: 기본값)")
+    args = parser.parse_args()
+
+    titles, documents = load_faq_texts(args.faq_file)
+    queries = (titles * (args.queries // max(len(titles), 1) + 1))[:args.queries]
+    print(f"📂 FAQ {len(documents)}개 문서, 질의 {len(queries)}개, 모델 {args.model}\n")
+
+    backends = [
+        ("torch", lambda: HuggingFaceEmbeddings(
+            model_name=args.model,
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'normalize_embeddings': True, 'batch_size': args.batch_size}
+        )),
+        ("onnx-fp32", lambda: OnnxEmbeddings(
+            args.model, quantize=False, intra_op_threads=args.threads, batch_size=args.batch_size)),
+        ("onnx-int8", lambda: OnnxEmbeddings(
+            args.model, quantize=True, intra_op_threads=args.threads, batch_size=args.batch_size)),
+    ]
+
+    rows = []
+    reference = None
+    reference_top = None
+    for name, factory in backends:
+        started = time.perf_counter()
+        embeddings = factory()
+        load_seconds = time.perf_counter() - started
+        latency = query_latency(embeddings, queries)
+        throughput, vectors = document_throughput(embeddings, documents)
+        # 검색 순위 일치도: FAQ 제목을 질의로 했을 때 top-5 문서가 PyTorch 결과와 겹치는 비율
+        title_vectors = np.asarray(embeddings.embed_documents(titles), dtype=np.float32)
+        top = np.argsort(-(title_vectors @ vectors.T), axis=1)[:, :5]
+        if reference is None:
+            reference, reference_top = vectors, top
+        cosine = (vectors * reference).sum(axis=1)
+        overlap = np.mean([len(set(a) & set(b)) / 5 for a, b in zip(top, reference_top)])
+        rows.append((name, load_seconds, latency, throughput, cosine, overlap))
+
+    print(f"{'backend':<11}{'load(s)':>9}{'p50(ms)':>10}{'p99(ms)':>10}{'docs/s':>10}"
+          f"{'cos mean':>10}{'cos min':>10}{'top5 일치':>10}")
+    for name, load_seconds, latency, throughput, cosine, overlap in rows:
+        print(f"{name:<11}{load_seconds:>9.2f}{np.percentile(latency, 50):>10.2f}{np.percentile(latency, 99):>10.2f}"
+              f"{throughput:>10.1f}{cosine.mean():>10.4f}{cosine.min():>10.4f}{overlap:>10.3f}")
+    torch_p50 = np.percentile(rows[0][2], 50)
+    for name, _, latency, throughput, _, _ in rows[1:]:
+        print(f"\n⚡ {name}: 질의 p50 {torch_p50 / np.percentile(latency, 50):.1f}x, "
+              f"문서 처리량 {throughput / rows[0][3]:.1f}x (PyTorch 대비)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+HNSW 파라미터 스윕 벤치마크: Chroma 컬렉션의 space / M / construction_ef / search_ef 조합별
+정확 검색(brute force) 정답 대비 recall@k, 질의 p50/p99 지연 시간, 색인 구축 시간, 색인 크기 비교
+
+번들된 data/vectorstores/huggingface 코퍼스 임베딩을 사용하고, --scale로 잡음을 더해 복제한 합성 코퍼스로 키울 수 있다.
+disk MB는 Chroma가 디스크에 기록한 크기(작은 컬렉션은 HNSW 파일이 아직 기록되지 않을 수 있음), graph MB는 HNSW 메모리 추정치다.
+조합마다 컬렉션을 새로 구축하므로 코퍼스가 크면 --m, --construction-ef, --search-ef로 격자를 줄여서 실행한다.
+
+사용법:
+    python cli/bench_hnsw.py
+    python cli/bench_hnsw.py --scale 100000 --space cosine --m 16 32 --construction-ef 100 --search-ef 10 50 100 --k 5
+"""
+
+import sys
+import os
+import time
+import argparse
+import itertools
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+import numpy as np
+from langchain_community.vectorstores import Chroma
+
+from app.tools.rag_tools.vectorstores.hnsw_config import HNSW_SPACES, hnsw_metadata
+
+ADD_BATCH_SIZE = 1000
+
+
+def load_corpus(args) -> np.ndarray:
+    """Chroma 컬렉션 임베딩 (필요하면 잡음을 더해 scale개로 확장)"""
+    chroma = Chroma(persist_directory=args.persist_directory, collection_name=args.collection)
+    base = np.asarray(chroma._collection.get(include=["embeddings"])["embeddings"], dtype=np.float32)
+    if args.scale <= len(base):
+        return base
+    rng = np.random.default_rng(args.seed)
+    rows = rng.integers(0, len(base), size=args.scale - len(base))
+    extra = base[rows] + rng.normal(scale=args.noise, size=(len(rows), base.shape[1])).astype(np.float32)
+    extra /= np.linalg.norm(extra, axis=1, keepdims=True)
+    return np.vstack([base, extra])
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int, space: str) -> np.ndarray:
+    """거리 함수별 brute force 정답 (질의별 top-k 행 번호)"""
+    if space == "l2":
+        scores = -((queries ** 2).sum(axis=1, keepdims=True) - 2 * queries @ corpus.T + (corpus ** 2).sum(axis=1))
+    elif space == "cosine":
+        normalized = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+        scores = (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ normalized.T
+    else:
+        scores = queries @ corpus.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+
+def directory_size(path: str) -> int:
+    """디렉토리 전체 파일 크기 (바이트)"""
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+
+def build_collection(path: str, corpus: np.ndarray, metadata):
+    """새 persistent 클라이언트에 컬렉션을 만들고 (클라이언트, 컬렉션, 구축 시간(초)) 반환"""
+    client = chromadb.PersistentClient(path=path)
+    collection = client.create_collection(name="bench", metadata=metadata)
+    ids = [str(i) for i in range(len(corpus))]
+    started = time.perf_counter()
+    for start in range(0, len(corpus), ADD_BATCH_SIZE):
+        collection.add(ids=ids[start:start + ADD_BATCH_SIZE], embeddings=corpus[start:start + ADD_BATCH_SIZE].tolist())
+    return client, collection, time.perf_counter() - started
+
+
+def search_all(collection, queries: np.ndarray, k: int):
+    """질의별 지연 시간(ms)과 top-k 행 번호"""
+    for query in queries[:10]:
+        collection.query(query_embeddings=[query.tolist()], n_results=k, include=["distances"])
+    latencies, results = [], []
+    for query in queries:
+        vector = query.tolist()
+        started = time.perf_counter()
+        data = collection.query(query_embeddings=[vector], n_results=k, include=["distances"])
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append([int(doc_id) for doc_id in data["ids"][0]])
+    return np.asarray(latencies), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chroma HNSW 파라미터 recall/지연 시간 스윕")
+    parser.add_argument("--persist-directory", default="data/vectorstores/huggingface")
+    parser.add_argument("--collection", default="knrec_faq")
+    parser.add_argument("--scale", type=int, default=0, help="합성 코퍼스 크기 (0이면 번들 코퍼스 그대로)")
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--space", nargs="+", choices=HNSW_SPACES, default=["l2", "cosine"])
+    parser.add_argument("--m", type=int, nargs="+", default=[16, 32])
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args)
+    count, dim = corpus.shape
+    rng = np.random.default_rng(args.seed)
+    queries = corpus[rng.integers(0, count, size=args.queries)]
+    queries = queries + rng.normal(scale=args.noise, size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = {space: exact_top_k(corpus, queries, args.k, space) for space in args.space}
+    print(f"📂 코퍼스 {count}개 × {dim}차원, 질의 {len(queries)}개, k={args.k}\n")
+
+    print(f"{'space':<8}{'M':>4}{'c_ef':>6}{'s_ef':>6}{'recall@k':>10}{'p50(ms)':>10}{'p99(ms)':>10}"
+          f"{'build(s)':>10}{'disk MB':>10}{'graph MB':>10}")
+    for space, m, construction_ef, search_ef in itertools.product(args.space, args.m, args.construction_ef, args.search_ef):
+        metadata = hnsw_metadata(space=space, M=m, construction_ef=construction_ef, search_ef=search_ef)
+        with tempfile.TemporaryDirectory() as path:
+            client, collection, build_seconds = build_collection(path, corpus, metadata)
+            latency, results = search_all(collection, queries, args.k)
+            recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(results, truth[space].tolist())])
+            disk_mb = directory_size(path) / 1e6
+            del collection, client
+        # hnswlib 0층 메모리 추정: 벡터(dim·4) + 이웃 목록(2M·4 + 4) + 라벨(8) 바이트
+        graph_mb = count * (dim * 4 + 2 * m * 4 + 4 + 8) / 1e6
+        print(f"{space:<8}{m:>4}{construction_ef:>6}{search_ef:>6}{recall:>10.3f}"
+              f"{np.percentile(latency, 50):>10.3f}{np.percentile(latency, 99):>10.3f}"
+              f"{build_seconds:>10.2f}{disk_mb:>10.1f}{graph_mb:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+질의 임베딩 마이크로 배칭 벤치마크
+동시 요청 수별로 개별 forward(직접 호출)와 마이크로 배처의 처리량, p50/p99 지연 시간 비교
+(동시성 1의 지연 시간 차이가 단일 요청에 추가되는 대기 비용)
+
+사용법:
+    python cli/bench_micro_batching.py
+    python cli/bench_micro_batching.py --concurrency 1 8 50 100 --runtime onnx --max-wait-ms 5
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+from app.tools.rag_tools.embeddings.micro_batcher import MicroBatchingEmbeddings
+
+BACKUP_EMBEDDING_MODEL = "snunlp/KR-SBERT-V40K-klueNLI-augSTS"
+
+
+def run_load(embeddings, queries, concurrency: int):
+    """동시 요청 concurrency개로 전체 질의를 임베딩한 (처리량(질의/초), 요청별 지연 시간(ms))"""
+    def timed(query):
+        started = time.perf_counter()
+        embeddings.embed_query(query)
+        return (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        started = time.perf_counter()
+        latencies = list(executor.map(timed, queries))
+        elapsed = time.perf_counter() - started
+    return len(queries) / elapsed, np.asarray(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="질의 임베딩 마이크로 배칭 벤치마크")
+    parser.add_argument("--faq-file", default="data/crawled_data/knrec_faq_selenium_20250618_110452.json")
+    parser.add_argument("--runtime", choices=["torch", "onnx"], default="torch")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=3.0)
+    args = parser.parse_args()
+
+    with open(args.faq_file, 'r', encoding='utf-8') as f:
+        titles = [item['title'] for item in json.load(f) if item.get('title')]
+    queries = (titles * (args.queries // len(titles) + 1))[:args.queries]
+
+    if args.runtime == "onnx":
+        from app.tools.rag_tools.embeddings.onnx_embeddings import OnnxEmbeddings
+        base = OnnxEmbeddings(BACKUP_EMBEDDING_MODEL)
+    else:
+        base = HuggingFaceEmbeddings(
+            model_name=BACKUP_EMBEDDING_MODEL,
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'normalize_embeddings': True}
+        )
+    batcher = MicroBatchingEmbeddings(base, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    base.embed_documents(queries[:8])
+
+    print(f"❓ 질의 {len(queries)}개, runtime={args.runtime}, "
+          f"max_batch_size={args.max_batch_size}, max_wait_ms={args.max_wait_ms}\n")
+    print(f"{'concurrency':<13}{'mode':<8}{'qps':>9}{'p50(ms)':>10}{'p99(ms)':>10}")
+    for concurrency in args.concurrency:
+        results = {}
+        for mode, embeddings in (("direct", base), ("batched", batcher)):
+            qps, latencies = run_load(embeddings, queries, concurrency)
+            results[mode] = qps
+            print(f"{concurrency:<13}{mode:<8}{qps:>9.1f}{np.percentile(latencies, 50):>10.2f}"
+                  f"{np.percentile(latencies, 99):>10.2f}")
+        print(f"{'':<13}⚡ 처리량 {results['batched'] / results['direct']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+콜드 스타트 벤치마크
+새 인터프리터에서 app.main, cli/rag_qa.py, cli/load_data.py를 임포트하는 데 걸리는 시간과 최대 RSS를 측정
+(스크립트는 main()을 실행하지 않고 모듈 최상위 임포트만 실행)
+
+사용법:
+    python cli/bench_startup.py
+    python cli/bench_startup.py --repeat 10 --importtime 15
+"""
+
+import sys
+import os
+import json
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_TARGETS = ["app.main", "cli/rag_qa.py", "cli/load_data.py"]
+
+# 자식 프로세스에서 실행할 측정 코드
+CHILD_CODE = """
+import importlib, resource, runpy, sys, time
+target = sys.argv[1]
+sys.path.insert(0, '.')
+started = time.perf_counter()
+if target.endswith('.py'):
+    runpy.run_path(target, run_name='__bench__')
+else:
+    importlib.import_module(target)
+elapsed = time.perf_counter() - started
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+import json
+print(json.dumps({"seconds": elapsed, "rss_mb": rss_kb / 1024, "modules": len(sys.modules)}))
+"""
+
+
+def measure(target: str, importtime: bool = False):
+    """새 인터프리터에서 대상 임포트 1회 측정"""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", CHILD_CODE, target]
+    proc = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result, proc.stderr
+
+
+def slowest_imports(stderr: str, top: int):
+    """-X importtime 출력에서 누적 시간이 큰 최상위(들여쓰기 없는) 임포트"""
+    totals = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if name[1:].startswith(" "):
+            continue  # 다른 모듈이 임포트한 하위 모듈
+        totals.append((name.strip(), int(cumulative_us)))
+    return sorted(totals, key=lambda item: item[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임포트 시간 / RSS 콜드 스타트 벤치마크")
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS, help="모듈 이름 또는 backend 기준 스크립트 경로")
+    parser.add_argument("--repeat", type=int, default=5, help="대상별 측정 횟수")
+    parser.add_argument("--importtime", type=int, default=0, help="누적 임포트 시간 상위 N개 패키지 출력")
+    args = parser.parse_args()
+
+    print(f"{'target':<22}{'median(s)':>11}{'min(s)':>9}{'rss(MB)':>10}{'modules':>9}")
+    for target in args.targets:
+        try:
+            runs = [measure(target)[0] for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{target:<22}  실패: {e}")
+            continue
+        seconds = [run["seconds"] for run in runs]
+        print(f"{target:<22}{statistics.median(seconds):>11.3f}{min(seconds):>9.3f}"
+              f"{statistics.median(run['rss_mb'] for run in runs):>10.1f}{runs[-1]['modules']:>9}")
+        if args.importtime:
+            _, stderr = measure(target, importtime=True)
+            for name, cumulative_us in slowest_imports(stderr, args.importtime):
+                print(f"    {name:<30}{cumulative_us / 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
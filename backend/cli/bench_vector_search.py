@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+벡터 검색 벤치마크: Chroma(HNSW) vs NumPy 정확 검색(memmap)
+번들된 data/vectorstores/huggingface 코퍼스에서 질의당 p50/p99 지연 시간, 배치 처리량, recall@k 비교
+
+사용법:
+    python cli/bench_vector_search.py
+    python cli/bench_vector_search.py --query-source titles --queries 300 --k 5
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from langchain_community.vectorstores import Chroma
+
+from app.tools.rag_tools.vectorstores.numpy_store import NumpyVectorStore
+
+BACKUP_EMBEDDING_MODEL = "snunlp/KR-SBERT-V40K-klueNLI-augSTS"
+
+
+def load_queries(args, store: NumpyVectorStore) -> np.ndarray:
+    """질의 임베딩 준비 (임베딩 시간은 측정에서 제외)"""
+    rng = np.random.default_rng(args.seed)
+    if args.query_source == "titles":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        with open(args.faq_file, 'r', encoding='utf-8') as f:
+            titles = [item.get('title', '') for item in json.load(f) if item.get('title')]
+        titles = [titles[i] for i in rng.integers(0, len(titles), size=args.queries)]
+        embeddings = HuggingFaceEmbeddings(
+            model_name=BACKUP_EMBEDDING_MODEL,
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'normalize_embeddings': True}
+        )
+        return np.asarray(embeddings.embed_documents(titles), dtype=np.float32)
+
+    # 저장된 문서 임베딩에 잡음을 더해 질의로 사용 (모델 없이 실행 가능)
+    rows = rng.integers(0, store.count, size=args.queries)
+    queries = np.asarray(store.matrix[rows]) + rng.normal(scale=args.noise, size=(args.queries, store.dim)).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def time_per_query(fn, queries: np.ndarray, warmup: int = 10) -> np.ndarray:
+    """질의별 지연 시간(ms)"""
+    for query in queries[:warmup]:
+        fn(query.tolist())
+    latencies = []
+    for query in queries:
+        vector = query.tolist()
+        started = time.perf_counter()
+        fn(vector)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return np.asarray(latencies)
+
+
+def time_batched(fn, queries: np.ndarray, batch_size: int) -> float:
+    """배치 질의의 질의당 평균 지연 시간(ms)"""
+    batches = [queries[i:i + batch_size].tolist() for i in range(0, len(queries), batch_size)]
+    fn(batches[0])
+    started = time.perf_counter()
+    for batch in batches:
+        fn(batch)
+    return (time.perf_counter() - started) * 1000 / len(queries)
+
+
+def exact_top_ids(store: NumpyVectorStore, queries: np.ndarray, k: int):
+    """정답 top-k ID (전체 행렬과의 내적 정렬)"""
+    scores = queries @ np.asarray(store.matrix).T
+    return [[store.ids[i] for i in np.argsort(-row)[:k]] for row in scores]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chroma vs NumPy 벡터 검색 벤치마크")
+    parser.add_argument("--persist-directory", default="data/vectorstores/huggingface")
+    parser.add_argument("--collection", default="knrec_faq")
+    parser.add_argument("--faq-file", default="data/crawled_data/knrec_faq_selenium_20250618_110452.json")
+    parser.add_argument("--query-source", choices=["noise", "titles"], default="noise",
+                        help="noise: 문서 임베딩+잡음, titles: FAQ 제목을 KR-SBERT로 임베딩")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--filter", default=None, help='메타데이터 필터 JSON (예: {"source": "knrec_faq"})')
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    where = json.loads(args.filter) if args.filter else None
+
+    print(f"📂 Chroma 컬렉션 로드: {args.persist_directory} ({args.collection})")
+    chroma = Chroma(persist_directory=args.persist_directory, collection_name=args.collection)
+    collection = chroma._collection
+
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        started = time.perf_counter()
+        store = NumpyVectorStore.from_chroma(collection, snapshot_dir, args.collection)
+        print(f"🧮 NumPy 스냅샷 생성: {store.count}개, {store.dim}차원 ({(time.perf_counter() - started) * 1000:.1f}ms)")
+
+        queries = load_queries(args, store)
+        print(f"❓ 질의 {len(queries)}개 (source={args.query_source}), k={args.k}, filter={where}\n")
+
+        chroma_latency = time_per_query(
+            lambda v: chroma.similarity_search_by_vector_with_relevance_scores(v, k=args.k, filter=where), queries)
+        numpy_latency = time_per_query(
+            lambda v: store.similarity_search_by_vector_with_relevance_scores(v, k=args.k, filter=where), queries)
+        chroma_batch = time_batched(
+            lambda b: collection.query(query_embeddings=b, n_results=args.k, where=where,
+                                       include=["documents", "metadatas", "distances"]),
+            queries, args.batch_size)
+        numpy_batch = time_batched(
+            lambda b: store.similarity_search_by_vectors(b, k=args.k, filter=where), queries, args.batch_size)
+
+        # recall@k: 필터 없는 검색 기준으로 정확 검색 결과와 비교
+        exact = exact_top_ids(store, queries, args.k)
+        chroma_ids = collection.query(query_embeddings=queries.tolist(), n_results=args.k, include=[])["ids"]
+        numpy_ids = []
+        for query in queries:
+            scores = store.matrix @ query
+            top = np.argpartition(-scores, args.k - 1)[:args.k]
+            numpy_ids.append([store.ids[i] for i in top])
+        chroma_recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(chroma_ids, exact)])
+        numpy_recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(numpy_ids, exact)])
+
+        print(f"{'backend':<10}{'p50(ms)':>10}{'p99(ms)':>10}{'batch/query(ms)':>18}{'recall@k':>10}")
+        for name, latency, batch, recall in (
+            ("chroma", chroma_latency, chroma_batch, chroma_recall),
+            ("numpy", numpy_latency, numpy_batch, numpy_recall),
+        ):
+            print(f"{name:<10}{np.percentile(latency, 50):>10.3f}{np.percentile(latency, 99):>10.3f}"
+                  f"{batch:>18.3f}{recall:>10.3f}")
+        print(f"\n⚡ p50 속도 향상: {np.percentile(chroma_latency, 50) / np.percentile(numpy_latency, 50):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+압축 벡터 저장 벤치마크: NumPy 스냅샷 float32 vs float16 vs int8 (+ float32 재채점)
+저장 형식과 재채점 배수별 100만 벡터당 메모리, 질의 p50/p99 지연 시간, float32 정확 검색 대비 recall@k 비교
+
+번들된 data/vectorstores/huggingface 코퍼스 임베딩을 사용하고, --scale로 잡음을 더해 복제한 합성 코퍼스로 키울 수 있다.
+
+사용법:
+    python cli/bench_vector_storage.py
+    python cli/bench_vector_storage.py --scale 200000 --rescore 1 2 4 8 --k 5
+"""
+
+import sys
+import os
+import time
+import argparse
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from langchain_community.vectorstores import Chroma
+
+from app.tools.rag_tools.vectorstores.numpy_store import NumpyVectorStore
+
+BYTES_PER_VALUE = {"float32": 4, "float16": 2, "int8": 1}
+
+
+def load_corpus(args) -> np.ndarray:
+    """Chroma 컬렉션 임베딩 (필요하면 잡음을 더해 scale개로 확장)"""
+    chroma = Chroma(persist_directory=args.persist_directory, collection_name=args.collection)
+    base = np.asarray(chroma._collection.get(include=["embeddings"])["embeddings"], dtype=np.float32)
+    if args.scale <= len(base):
+        return base
+    rng = np.random.default_rng(args.seed)
+    rows = rng.integers(0, len(base), size=args.scale - len(base))
+    extra = base[rows] + rng.normal(scale=args.noise, size=(len(rows), base.shape[1])).astype(np.float32)
+    return np.vstack([base, extra])
+
+
+def search_all(store: NumpyVectorStore, queries: np.ndarray, k: int):
+    """질의별 지연 시간(ms)과 top-k 행 ID"""
+    for query in queries[:10]:
+        store.similarity_search_by_vector_with_relevance_scores(query.tolist(), k=k)
+    latencies, results = [], []
+    for query in queries:
+        vector = query.tolist()
+        started = time.perf_counter()
+        docs = store.similarity_search_by_vector_with_relevance_scores(vector, k=k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append([doc.page_content for doc, _ in docs])
+    return np.asarray(latencies), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="float32 / float16 / int8 벡터 저장 벤치마크")
+    parser.add_argument("--persist-directory", default="data/vectorstores/huggingface")
+    parser.add_argument("--collection", default="knrec_faq")
+    parser.add_argument("--scale", type=int, default=0, help="합성 코퍼스 크기 (0이면 번들 코퍼스 그대로)")
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rescore", type=int, nargs="+", default=[1, 4, 10], help="재채점 후보 배수 (k의 배수)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args)
+    count, dim = corpus.shape
+    ids = [str(i) for i in range(count)]
+    documents = ids  # 결과 비교용으로 행 번호를 문서 내용으로 사용
+    metadatas = [{} for _ in range(count)]
+    rng = np.random.default_rng(args.seed)
+    queries = corpus[rng.integers(0, count, size=args.queries)]
+    queries = queries + rng.normal(scale=args.noise, size=queries.shape).astype(np.float32)
+    print(f"📂 코퍼스 {count}개 × {dim}차원, 질의 {len(queries)}개, k={args.k}\n")
+
+    with tempfile.TemporaryDirectory() as path:
+        reference = NumpyVectorStore.build(path, "float32", ids, corpus, documents, metadatas, storage="float32")
+        exact_latency, exact = search_all(reference, queries, args.k)
+
+        print(f"{'storage':<9}{'rescore':>8}{'scan MB/1M':>12}{'disk MB/1M':>12}{'p50(ms)':>10}{'p99(ms)':>10}{'recall@k':>10}")
+        print(f"{'float32':<9}{'-':>8}{dim * 4:>12.0f}{dim * 4:>12.0f}"
+              f"{np.percentile(exact_latency, 50):>10.3f}{np.percentile(exact_latency, 99):>10.3f}{1.0:>10.3f}")
+        for storage in ("float16", "int8"):
+            NumpyVectorStore.build(path, storage, ids, corpus, documents, metadatas, storage=storage)
+            # 100만 벡터당: 스캔 대상(압축 행렬)과 디스크 전체(압축 행렬 + float32 재채점 사이드 파일), 1MB = 10^6바이트
+            scan_mb = dim * BYTES_PER_VALUE[storage]
+            disk_mb = scan_mb + dim * 4
+            for multiplier in args.rescore:
+                store = NumpyVectorStore(path, storage, rescore_multiplier=multiplier)
+                latency, results = search_all(store, queries, args.k)
+                recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(results, exact)])
+                print(f"{storage:<9}{multiplier:>8}{scan_mb:>12.0f}{disk_mb:>12.0f}"
+                      f"{np.percentile(latency, 50):>10.3f}{np.percentile(latency, 99):>10.3f}{recall:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@
 import sys
 import os
 import json
+import argparse
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.tools.rag_tools.rag_pipeline import RAGPipeline
@@ -14,8 +15,23 @@ def clean_crawled_data(data):
     # 데이터 생략 없이 원본 데이터 그대로 반환
     return data
 
-def load_crawled_data():
-    """크롤링된 데이터를 벡터 DB에 로드"""
+def print_report(stats):
+    """적재 결과(또는 dry-run 차이) 출력"""
+    prefix = "[dry-run] " if stats['dry_run'] else ""
+    print(f"   {prefix}추가 {stats['added']}개, 갱신 {stats['updated']}개, 유지 {stats['unchanged']}개, 삭제 {stats['deleted']}개")
+    if stats['dry_run']:
+        for kind in ('added', 'updated', 'deleted'):
+            if stats['sample'][kind]:
+                print(f"   {kind} 예시: {', '.join(stats['sample'][kind])}")
+    else:
+        print(f"   임베딩 캐시 적중 {stats['cache_hits']}개, 새로 임베딩 {stats['embedded']}개")
+
+def load_crawled_data(dry_run=False):
+    """크롤링된 데이터를 벡터 DB에 로드
+    
+    Args:
+        dry_run: True이면 저장하지 않고 현재 벡터 DB와의 차이만 출력
+    """
     try:
         # 크롤링된 데이터 파일 경로
         data_file = "data/crawled_data/knrec_faq_selenium_20250618_110452.json"
@@ -56,8 +72,9 @@ def load_crawled_data():
         print("\n🔧 OpenAI 임베딩으로 벡터 DB 생성 중...")
         try:
             rag_openai = RAGPipeline(embedding_type="openai")
-            rag_openai.load_documents(documents)
-            print(f"✅ OpenAI 벡터 DB 생성 완료: {rag_openai.persist_directory}")
+            stats = rag_openai.load_documents(documents, dry_run=dry_run)
+            print(f"✅ OpenAI 벡터 DB {'비교' if dry_run else '생성'} 완료: {rag_openai.persist_directory}")
+            print_report(stats)
         except Exception as e:
             print(f"⚠️ OpenAI 벡터 DB 생성 실패: {str(e)}")
         
@@ -65,8 +82,9 @@ def load_crawled_data():
         print("\n🔧 HuggingFace 임베딩으로 벡터 DB 생성 중...")
         try:
             rag_hf = RAGPipeline(embedding_type="huggingface")
-            rag_hf.load_documents(documents)
-            print(f"✅ HuggingFace 벡터 DB 생성 완료: {rag_hf.persist_directory}")
+            stats = rag_hf.load_documents(documents, dry_run=dry_run)
+            print(f"✅ HuggingFace 벡터 DB {'비교' if dry_run else '생성'} 완료: {rag_hf.persist_directory}")
+            print_report(stats)
         except Exception as e:
             print(f"⚠️ HuggingFace 벡터 DB 생성 실패: {str(e)}")
         
@@ -120,9 +138,17 @@ def test_query():
 
 def main():
     """메인 함수"""
+    parser = argparse.ArgumentParser(description="크롤링 데이터 벡터 DB 적재")
+    parser.add_argument("--dry-run", action="store_true", help="저장하지 않고 현재 벡터 DB와의 차이만 출력")
+    args = parser.parse_args()
+    
     print("🚀 크롤링 데이터 로드 및 테스트")
     print("=" * 50)
     
+    if args.dry_run:
+        load_crawled_data(dry_run=True)
+        return
+    
     # 1. 데이터 로드
     if load_crawled_data():
         print("\n" + "=" * 50)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Retriever / VectorStore 동시성 스트레스 테스트
+하나의 공유 Retriever를 여러 스레드에서 서로 다른 필터(article_id별, 필터 없음)로 동시에 호출하고,
+- 필터를 준 요청은 결과가 모두 그 article_id인지 (다른 요청의 필터가 새지 않는지)
+- 모든 요청의 결과가 같은 (질의, 필터)를 단일 스레드로 실행한 기준 결과와 같은지
+- 공유 search_kwargs가 바뀌지 않았는지
+확인한다. 하나라도 어긋나면 종료 코드 1.
+
+사용법:
+    python cli/stress_retriever.py
+    python cli/stress_retriever.py --threads 64 --iterations 50 --backend numpy --compress
+"""
+
+import sys
+import os
+import json
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tools.rag_tools.embeddings.embeddings import EmbeddingModel
+from app.tools.rag_tools.retrievers.retriever import Retriever
+from app.tools.rag_tools.vectorstores.vector_store import VectorStore
+
+BACKUP_EMBEDDING_MODEL = "snunlp/KR-SBERT-V40K-klueNLI-augSTS"
+
+
+def load_cases(faq_file: str, count: int, seed: int):
+    """(질의, 필터) 목록: FAQ 제목을 질의로, 절반은 해당 article_id 필터, 나머지는 필터 없음"""
+    with open(faq_file, 'r', encoding='utf-8') as f:
+        items = [item for item in json.load(f) if item.get('title') and item.get('article_id')]
+    rng = random.Random(seed)
+    cases = []
+    for i, item in enumerate(rng.sample(items, min(count, len(items)))):
+        other = rng.choice(items)  # 다른 문서의 질의에 필터를 걸어 필터가 실제로 결과를 바꾸도록 함
+        if i % 2 == 0:
+            cases.append((item['title'], {"article_id": other['article_id']}))
+        else:
+            cases.append((item['title'], None))
+    return cases
+
+
+def result_key(docs):
+    return [(doc.metadata.get("article_id"), doc.page_content) for doc in docs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="공유 Retriever 필터 격리 스트레스 테스트")
+    parser.add_argument("--faq-file", default="data/crawled_data/knrec_faq_selenium_20250618_110452.json")
+    parser.add_argument("--persist-directory", default="data/vectorstores/huggingface")
+    parser.add_argument("--collection", default="knrec_faq")
+    parser.add_argument("--backend", choices=["chroma", "numpy"], default="chroma")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--iterations", type=int, default=20, help="스레드당 요청 수")
+    parser.add_argument("--cases", type=int, default=40, help="서로 다른 (질의, 필터) 조합 수")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--compress", action="store_true", help="추출형 컨텍스트 압축 포함")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    embedding_model = EmbeddingModel(model_name=BACKUP_EMBEDDING_MODEL)
+    vector_store = VectorStore(embedding_model, args.persist_directory, args.collection, backend=args.backend)
+    vector_store.load()
+    retriever = Retriever(vector_store, search_kwargs={"k": args.k}, compress=args.compress)
+    default_kwargs = dict(retriever.search_kwargs)
+
+    cases = load_cases(args.faq_file, args.cases, args.seed)
+    # 단일 스레드 기준 결과
+    expected = [result_key(retriever.get_relevant_documents(query, filter=filter)) for query, filter in cases]
+    print(f"🧪 조합 {len(cases)}개, 스레드 {args.threads}개 × {args.iterations}회, backend={args.backend}, k={args.k}")
+
+    failures = []
+    failures_lock = threading.Lock()
+    start = threading.Barrier(args.threads)
+
+    def worker(worker_id: int):
+        rng = random.Random(args.seed + worker_id)
+        start.wait()
+        for _ in range(args.iterations):
+            index = rng.randrange(len(cases))
+            query, filter = cases[index]
+            docs = retriever.get_relevant_documents(query, filter=filter)
+            problems = []
+            if filter is not None and any(doc.metadata.get("article_id") != filter["article_id"] for doc in docs):
+                problems.append("필터 불일치")
+            if result_key(docs) != expected[index]:
+                problems.append("기준 결과와 다름")
+            if problems:
+                with failures_lock:
+                    failures.append((worker_id, query, filter, problems))
+
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        list(executor.map(worker, range(args.threads)))
+
+    if dict(retriever.search_kwargs) != default_kwargs:
+        failures.append((None, None, None, [f"search_kwargs 변경됨: {dict(retriever.search_kwargs)}"]))
+
+    total = args.threads * args.iterations
+    if failures:
+        print(f"❌ 실패 {len(failures)}/{total}건")
+        for worker_id, query, filter, problems in failures[:10]:
+            print(f"   스레드 {worker_id}: '{query}' filter={filter} → {', '.join(problems)}")
+        sys.exit(1)
+    print(f"✅ 요청 {total}건 모두 격리됨 (필터 누수 없음, 기준 결과와 일치, search_kwargs 불변)")
+
+
+if __name__ == "__main__":
+    main()
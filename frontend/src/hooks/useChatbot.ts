@@ -1,10 +1,12 @@
-import { useState, useCallback } from "react";
+import { useState, useCallback, useRef } from "react";
 import { api, ChatMessage } from "@/services/api";
 
 export function useChatbot() {
   const [chatHistory, setChatHistory] = useState<ChatMessage[]>([]);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  // 서버가 발급한 대화 세션 ID (후속 질문에 이전 대화를 이어서 사용)
+  const sessionIdRef = useRef<string | undefined>(undefined);
 
   const sendMessage = useCallback(
     async (message: string) => {
@@ -24,9 +26,14 @@ export function useChatbot() {
 
       try {
         // 백엔드 API 호출
-        const response = await api.chatWithBot(message);
+        const response = await api.chatWithBot(message, sessionIdRef.current);
         console.log("[Chatbot] API 응답:", response);
 
+        const sessionId = (response as any).session_id;
+        if (sessionId) {
+          sessionIdRef.current = sessionId;
+        }
+
         // 실제 응답 구조에 맞게 content 파싱 (response.data?.response, response.response, response.message)
         const content =
           (response.data && (response.data as any).response) ??
@@ -79,6 +86,7 @@ export function useChatbot() {
   const clearChat = useCallback(() => {
     setChatHistory([]);
     setError(null);
+    sessionIdRef.current = undefined;
     console.log("[Chatbot] 대화 초기화");
   }, []);
 
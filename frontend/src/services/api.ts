@@ -20,6 +20,7 @@ export interface ChatResponse {
   status: "success" | "error";
   message: string;
   response: string;
+  session_id?: string;
 }
 
 // 시스템 정보 타입
@@ -30,10 +31,19 @@ export interface SystemInfo {
 }
 
 // RAG 검색 결과 타입
+export interface RAGSearchDocument {
+  rank: number;
+  score: number;
+  distance: number;
+  content: string;
+  metadata: Record<string, unknown>;
+}
+
 export interface RAGSearchResult {
   status: "success" | "error";
   query: string;
-  result: Record<string, unknown>;
+  documents?: RAGSearchDocument[];
+  result?: Record<string, unknown>;
 }
 
 // API 클라이언트 클래스
@@ -96,8 +106,14 @@ class ApiClient {
   }
 
   // 챗봇과 대화
-  async chatWithBot(message: string): Promise<ApiResponse<ChatResponse>> {
-    return this.post<ChatResponse>("/api/chat", { message });
+  async chatWithBot(
+    message: string,
+    sessionId?: string
+  ): Promise<ApiResponse<ChatResponse>> {
+    return this.post<ChatResponse>("/api/chat", {
+      message,
+      session_id: sessionId,
+    });
   }
 
   // 챗봇 상태 확인
@@ -127,7 +143,8 @@ export const apiClient = new ApiClient();
 // 편의 함수들
 export const api = {
   healthCheck: () => apiClient.healthCheck(),
-  chatWithBot: (message: string) => apiClient.chatWithBot(message),
+  chatWithBot: (message: string, sessionId?: string) =>
+    apiClient.chatWithBot(message, sessionId),
   getChatbotStatus: () => apiClient.getChatbotStatus(),
   ragSearch: (query: string, k?: number) => apiClient.ragSearch(query, k),
   getSystemInfo: () => apiClient.getSystemInfo(),